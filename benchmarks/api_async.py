@@ -0,0 +1,90 @@
+"""Compare the read API served three ways at high concurrency.
+
+* ``wsgi``       - DRF viewsets under gunicorn's threaded WSGI worker
+* ``sync-asgi``  - the same DRF viewsets under uvicorn (thread-pool hop per request)
+* ``async-asgi`` - the native async views from ``shop.async_api`` under uvicorn
+
+Requires ``gunicorn`` and ``uvicorn``. Seed the database first so the
+payloads are realistic, then run from the project root::
+
+    python benchmarks/api_async.py --concurrency 200 --duration 20
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from shop.loadtest import run_load, wait_for_server  # noqa: E402
+
+RESOURCES = ('products', 'categories', 'banners')
+SERVERS = (
+    ('wsgi', 'wsgi', '/api/'),
+    ('sync-asgi', 'asgi', '/api/'),
+    ('async-asgi', 'asgi', '/api/async/'),
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(kind, port, workers):
+    bind = f'127.0.0.1:{port}'
+    if kind == 'wsgi':
+        return [
+            sys.executable, '-m', 'gunicorn', 'dariganga_goyol.wsgi:application',
+            '--bind', bind, '--workers', str(workers), '--worker-class', 'gthread', '--threads', '8',
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'dariganga_goyol.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--no-access-log',
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='dariganga_goyol.settings')
+    results = []
+    for kind, interface, prefix in SERVERS:
+        port = free_port()
+        server = subprocess.Popen(
+            server_command(interface, port, args.workers),
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_server(f'http://127.0.0.1:{port}/')
+            for resource in RESOURCES:
+                url = f'http://127.0.0.1:{port}{prefix}{resource}/'
+                run_load(url, concurrency=min(args.concurrency, 10), duration=2)  # warm-up
+                result = run_load(url, concurrency=args.concurrency, duration=args.duration)
+                result.update(server=kind, resource=resource)
+                results.append(result)
+                print(
+                    f"{kind:<11} {resource:<11} {result['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {result['p50_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  "
+                    f"errors {result['errors']}"
+                )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Compare the JSON, MessagePack and CBOR API renderers.
+
+Builds ``/api/products/`` and ``/api/categories/`` payloads of the
+requested size in the shapes from ``shop.serializers``. For each renderer
+it times encoding (the server's cost) and decoding (the phone's cost) and
+reports the payload size, raw and gzipped. No server or data is needed.
+Run from the project root::
+
+    python benchmarks/api_renderers.py --products 5000 --iterations 20
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dariganga_goyol.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import cbor2  # noqa: E402
+import msgpack  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from shop.renderers import CBORRenderer, MessagePackRenderer  # noqa: E402
+
+RENDERERS = (
+    ('json', JSONRenderer(), json.loads),
+    ('msgpack', MessagePackRenderer(), lambda body: msgpack.unpackb(body, raw=False)),
+    ('cbor', CBORRenderer(), cbor2.loads),
+)
+MEDIA = 'https://darigangagoyol.mn/media'
+
+
+def product_payload(count):
+    return [
+        {
+            'id': index,
+            'slug': f'cashmere-scarf-{index}',
+            'name': f'Ноолууран ороолт {index}',
+            'image': f'{MEDIA}/products/scarf-{index}.jpg',
+            'description': 'Говийн ямааны самнасан ноолуураар нэхсэн зөөлөн ороолт. ' * 3,
+            'images': [
+                {'id': index * 10 + order, 'image': f'{MEDIA}/products/gallery/scarf-{index}-{order}.jpg', 'sort_order': order}
+                for order in range(3)
+            ],
+            'category': index % 20 + 1,
+            'category_name': f'Ангилал {index % 20}',
+            'subcategory': index % 100 + 1,
+            'subcategory_name': f'Дэд ангилал {index % 100}',
+        }
+        for index in range(count)
+    ]
+
+
+def category_payload(count):
+    return [
+        {
+            'id': index,
+            'name': f'Ангилал {index}',
+            'slug': f'category-{index}',
+            'image': f'{MEDIA}/categories/{index}.png',
+            'sort_order': index,
+            'subcategories': [
+                {'id': index * 100 + sub, 'name': f'Дэд ангилал {sub}', 'slug': f'category-{index}-{sub}', 'sort_order': sub}
+                for sub in range(10)
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def per_call_ms(function, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--categories', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    payloads = {'products': product_payload(args.products), 'categories': category_payload(args.categories)}
+    results = {}
+    for resource, data in payloads.items():
+        results[resource] = {}
+        for name, renderer, decode in RENDERERS:
+            body = renderer.render(data)
+            assert decode(body) == data, f'{name} does not round-trip the {resource} payload'
+            encode_ms = per_call_ms(lambda: renderer.render(data), args.iterations)
+            decode_ms = per_call_ms(lambda: decode(body), args.iterations)
+            gzipped = len(gzip.compress(body, 6))
+            results[resource][name] = {
+                'encode_ms': round(encode_ms, 2),
+                'decode_ms': round(decode_ms, 2),
+                'bytes': len(body),
+                'gzip_bytes': gzipped,
+            }
+            print(
+                f'{resource:<10} {name:<8} encode {encode_ms:>8.2f} ms  decode {decode_ms:>8.2f} ms  '
+                f'{len(body) / 1024:>9.1f} KiB  gzip {gzipped / 1024:>8.1f} KiB'
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
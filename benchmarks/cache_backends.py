@@ -0,0 +1,114 @@
+"""Compare the shared SQLite cache with Django's LocMemCache and FileBasedCache.
+
+Times single-key and batched reads and writes plus ``incr`` from one
+process, then runs ``incr`` from several processes at once to show which
+backends are actually shared (LocMemCache is not, so its count is wrong by
+design). Run from the project root::
+
+    python benchmarks/cache_backends.py --operations 5000 --processes 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dariganga_goyol.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache.backends.filebased import FileBasedCache  # noqa: E402
+from django.core.cache.backends.locmem import LocMemCache  # noqa: E402
+
+from shop.cache import SQLiteCache  # noqa: E402
+
+BATCH = 50
+PAYLOAD = {'id': 1, 'name': 'Cashmere scarf', 'html': '<tr>' + 'x' * 400 + '</tr>'}
+
+
+def make_backend(kind, directory):
+    params = {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 100000}}
+    if kind == 'locmem':
+        return LocMemCache('benchmark', params)
+    if kind == 'filebased':
+        return FileBasedCache(str(Path(directory) / 'filebased'), params)
+    return SQLiteCache(Path(directory) / 'sqlite' / 'cache.sqlite3', params)
+
+
+def per_op_us(function, operations):
+    started = time.perf_counter()
+    for index in range(operations):
+        function(index)
+    return (time.perf_counter() - started) / operations * 1e6
+
+
+def single_process(cache, operations):
+    keys = [f'row-{index}' for index in range(BATCH)]
+    cache.set('counter', 0)
+    results = {
+        'set_us': per_op_us(lambda index: cache.set(f'key-{index % 1000}', PAYLOAD), operations),
+        'get_hit_us': per_op_us(lambda index: cache.get(f'key-{index % 1000}'), operations),
+        'get_miss_us': per_op_us(lambda index: cache.get(f'missing-{index}'), operations),
+        'incr_us': per_op_us(lambda index: cache.incr('counter'), operations),
+    }
+    batches = max(operations // BATCH, 1)
+    results['set_many_50_us'] = per_op_us(lambda index: cache.set_many({key: PAYLOAD for key in keys}), batches)
+    results['get_many_50_us'] = per_op_us(lambda index: cache.get_many(keys), batches)
+    return {name: round(value, 2) for name, value in results.items()}
+
+
+def _increment(kind, directory, operations):
+    cache = make_backend(kind, directory)
+    for _ in range(operations):
+        try:
+            cache.incr('shared-counter')
+        except ValueError:
+            cache.add('shared-counter', 0)
+            cache.incr('shared-counter')
+
+
+def multi_process(kind, directory, processes, operations):
+    make_backend(kind, directory).delete('shared-counter')
+    started = time.perf_counter()
+    workers = [
+        multiprocessing.Process(target=_increment, args=(kind, directory, operations)) for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'expected': processes * operations,
+        'counted': make_backend(kind, directory).get('shared-counter'),
+        'incr_per_s': round(processes * operations / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in ('locmem', 'filebased', 'sqlite'):
+            results[kind] = single_process(make_backend(kind, directory), args.operations)
+            results[kind]['shared_incr'] = multi_process(kind, directory, args.processes, args.operations // 5)
+            print(kind, json.dumps(results[kind]))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
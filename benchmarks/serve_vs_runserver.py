@@ -0,0 +1,72 @@
+"""Load-test ``manage.py runserver`` (the old start.sh) against ``manage.py serve``.
+
+Both servers run against the configured database; seed it first. Run from
+the project root::
+
+    python benchmarks/serve_vs_runserver.py --concurrency 100 --duration 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from benchmarks.api_async import free_port  # noqa: E402
+from shop.loadtest import run_load, wait_for_server  # noqa: E402
+
+PATHS = ('/api/products/', '/api/categories/', '/api/banners/', '/login/')
+
+
+def server_command(kind, port, workers):
+    manage = str(BASE_DIR / 'manage.py')
+    if kind == 'runserver':
+        return [sys.executable, manage, 'runserver', f'127.0.0.1:{port}', '--noreload']
+    command = [sys.executable, manage, 'serve', '--bind', f'127.0.0.1:{port}', '--interface', kind.split('-')[1]]
+    if workers:
+        command += ['--workers', str(workers)]
+    return command
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--workers', type=int, help='Workers for `serve` (default: CPU count)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='dariganga_goyol.settings')
+    results = []
+    for kind in ('runserver', 'serve-wsgi', 'serve-asgi'):
+        port = free_port()
+        server = subprocess.Popen(
+            server_command(kind, port, args.workers),
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_server(f'http://127.0.0.1:{port}/')
+            for path in PATHS:
+                url = f'http://127.0.0.1:{port}{path}'
+                run_load(url, concurrency=min(args.concurrency, 10), duration=2)
+                result = run_load(url, concurrency=args.concurrency, duration=args.duration)
+                result.update(server=kind, path=path)
+                results.append(result)
+                print(
+                    f"{kind:<11} {path:<18} {result['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {result['p50_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  "
+                    f"errors {result['errors']}"
+                )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
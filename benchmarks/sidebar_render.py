@@ -0,0 +1,80 @@
+"""Measure the sidebar's share of rendering each admin page.
+
+For every admin list and create page this times the
+``sidebar_navigation`` context processor on its own, and a render of
+``shop/base.html`` with and without it, so the difference is the menu's
+per-page overhead. No server or data is needed. Run from the project root::
+
+    python benchmarks/sidebar_render.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dariganga_goyol.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.template.loader import get_template  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.urls import resolve, reverse  # noqa: E402
+
+from shop.context_processors import sidebar_navigation  # noqa: E402
+
+URL_NAMES = (
+    'dashboard', 'category_list', 'category_create', 'product_list', 'product_create',
+    'landing_content_list', 'banner_list', 'banner_create',
+)
+
+
+def per_call_us(function, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    factory = RequestFactory()
+    template = get_template('shop/base.html')
+    sidebar_navigation(factory.get('/'))
+
+    results = {}
+    for name in URL_NAMES:
+        request = factory.get(reverse(name))
+        request.resolver_match = resolve(request.path)
+        request.user = get_user_model()(username='benchmark')
+        context = {'user': request.user, **sidebar_navigation(request)}
+        processor = per_call_us(lambda: sidebar_navigation(request), args.iterations)
+        render_iterations = max(args.iterations // 10, 1)
+        with_menu = per_call_us(lambda: template.render(context), render_iterations)
+        without_menu = per_call_us(lambda: template.render({'user': request.user, 'sidebar_menu': ()}), render_iterations)
+        results[name] = {
+            'context_processor_us': round(processor, 3),
+            'render_us': round(with_menu, 1),
+            'menu_render_overhead_us': round(with_menu - without_menu, 1),
+        }
+        print(
+            f'{name:<22} processor {processor:>7.3f} us  render {with_menu:>8.1f} us  '
+            f'menu overhead {with_menu - without_menu:>7.1f} us'
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -43,7 +43,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shop.middleware.PerformanceMetricsMiddleware',
+    'shop.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,7 +60,7 @@ ROOT_URLCONF = 'dariganga_goyol.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'shop.template_backend.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -125,6 +128,18 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Collected static files are served by WhiteNoise from the app workers:
+# precompressed, with content-hashed names cached forever by browsers.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+WHITENOISE_MANIFEST_STRICT = False
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -134,6 +149,11 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Sessions and users are read from the shared cache, falling back to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['shop.auth.CachedModelBackend']
+AUTH_CACHE_TIMEOUT = 300
+
 # Login URL
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
@@ -145,3 +165,125 @@ CORS_ALLOWED_ORIGINS = [
     'https://admin.darigangagoyol.mn',
     'http://admin.darigangagoyol.mn',
 ]
+
+# Cache shared by every worker on the host (SQLite in WAL mode, see shop/cache.py).
+# Least recently read entries are evicted past MAX_ENTRIES or MAX_SIZE bytes.
+CACHES = {
+    'default': {
+        'BACKEND': 'shop.cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'shop-cache.sqlite3',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
+    },
+}
+
+# Runs the tests against a throwaway cache rather than the shared file above.
+TEST_RUNNER = 'shop.test_runner.IsolatedCacheRunner'
+
+# Dashboard statistics snapshot lifetime (seconds); model signals invalidate it earlier
+DASHBOARD_STATS_TIMEOUT = 60
+
+# Admin product list: rows per keyset page and lifetime of cached filtered counts
+PRODUCT_LIST_PAGE_SIZE = 50
+PRODUCT_LIST_COUNT_TIMEOUT = 300
+
+# /api/products/?facets=1: above this many products the facet counts are
+# estimated from a sample of about PRODUCT_FACET_SAMPLE_SIZE rows.
+PRODUCT_FACET_EXACT_LIMIT = 50000
+PRODUCT_FACET_SAMPLE_SIZE = 10000
+
+# Rendered admin list rows, keyed by pk and updated_at (seconds)
+ROW_FRAGMENT_TIMEOUT = 3600
+
+# /api/landing/ payload: categories featured on the home page, server-side
+# lifetime (model signals invalidate it earlier) and browser max-age (seconds)
+LANDING_FEATURED_CATEGORIES = 8
+LANDING_PAYLOAD_TIMEOUT = 3600
+LANDING_PAYLOAD_MAX_AGE = 0
+
+# Batched data backfills (shop/backfill.py). With BACKFILL_DEFER, migrations
+# only queue their backfills and `manage.py backfill --pending` runs them.
+BACKFILL_BATCH_SIZE = 1000
+BACKFILL_PAUSE = 0.1
+BACKFILL_DEFER = False
+
+# Bulk product upsert API (POST /api/products/bulk-upsert/): records per
+# request, and rows written per bulk_create statement
+PRODUCT_UPSERT_MAX_RECORDS = 10000
+PRODUCT_UPSERT_CHUNK_SIZE = 500
+
+# Products loaded per batch when rebuilding Product.card (shop/cards.py)
+PRODUCT_CARD_BATCH_SIZE = 500
+
+# Rows read per chunk by the streaming CSV/XLSX list exports (shop/export.py)
+EXPORT_CHUNK_SIZE = 2000
+
+# Gzipped sitemap shards written by `manage.py build_sitemaps` (shop/sitemap.py)
+# into SITEMAP_ROOT, which the storefront serves at SITEMAP_URL. Page URLs
+# are SITEMAP_BASE_URL plus the pattern of each kind.
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_URL = 'https://darigangagoyol.mn/sitemaps/'
+SITEMAP_BASE_URL = 'https://darigangagoyol.mn'
+SITEMAP_URLS = {
+    'category': '/categories/{slug}/',
+    'subcategory': '/categories/{category__slug}/{slug}/',
+    'product': '/products/{slug}/',
+}
+SITEMAP_SHARD_SIZE = 10000
+SITEMAP_CHUNK_SIZE = 2000
+
+# Product/category detail by slug (shop/details.py): lifetime of a cached
+# detail and slug mapping (seconds); model signals invalidate them earlier
+DETAIL_CACHE_TIMEOUT = 3600
+
+# Category deletion jobs (shop/deletion.py): rows per batch, pause between
+# batches, and how long a job may sit idle before worker warm-up or
+# resume_category_deletions considers it abandoned (seconds)
+CATEGORY_DELETION_BATCH_SIZE = 500
+CATEGORY_DELETION_PAUSE = 0.05
+CATEGORY_DELETION_STALE_AFTER = 60
+CATEGORY_DELETION_IN_BACKGROUND = True
+
+# Live dashboard stream (served from dariganga_goyol.asgi)
+DASHBOARD_STREAM_KEEPALIVE = 15
+DASHBOARD_STREAM_POLL_INTERVAL = 30
+
+# Per-view latency histograms served at /metrics. With several worker
+# processes, set METRICS_DIR so /metrics merges every worker's snapshot.
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
+# Optional per-request query budget (None disables QueryBudgetMiddleware).
+# QUERY_BUDGET_ACTION is 'log' or 'raise'; overrides are keyed by view name.
+QUERY_BUDGET = None
+QUERY_BUDGET_ACTION = 'log'
+QUERY_BUDGET_OVERRIDES = {}
+
+# Slow-query log: queries over the threshold are logged with their EXPLAIN
+# plan to SLOW_QUERY_LOG_FILE (summarize with `manage.py slow_queries`).
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_SAMPLE_RATE = 1.0
+SLOW_QUERY_MIN_INTERVAL = 60
+SLOW_QUERY_LOG_FILE = BASE_DIR / 'logs' / 'slow_queries.jsonl'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_queries': {
+            'class': 'shop.slowlog.JsonLinesHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'shop.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
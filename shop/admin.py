@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, Banner, LandingPageContent, SubCategory, ProductImage
+from .models import Category, Product, Banner, LandingPageContent, SubCategory, ProductImage, BackfillCheckpoint, CategoryDeletionJob, SlugRedirect
 
 
 @admin.register(Category)
@@ -49,3 +49,28 @@ class LandingPageContentAdmin(admin.ModelAdmin):
     list_filter = ['section_type', 'is_active', 'created_at']
     search_fields = ['title', 'content']
     ordering = ['sort_order']
+
+
+@admin.register(BackfillCheckpoint)
+class BackfillCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'processed', 'total', 'updated', 'last_pk', 'updated_at']
+    list_filter = ['status']
+    readonly_fields = ['name', 'status', 'last_pk', 'processed', 'updated', 'total', 'started_at', 'finished_at']
+
+
+@admin.register(CategoryDeletionJob)
+class CategoryDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ['category_name', 'status', 'products_deleted', 'products_total', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = [
+        'category_id', 'category_name', 'status', 'products_total', 'products_deleted', 'images_deleted',
+        'subcategories_deleted', 'files_deleted', 'error', 'finished_at',
+    ]
+
+
+@admin.register(SlugRedirect)
+class SlugRedirectAdmin(admin.ModelAdmin):
+    list_display = ['old_slug', 'kind', 'object_id', 'created_at']
+    list_filter = ['kind']
+    search_fields = ['old_slug']
+    readonly_fields = ['created_at']
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .metrics import install_query_recorder
+        from .slowlog import install_slow_query_logger
+
+        connection_created.connect(install_query_recorder, dispatch_uid='shop-query-recorder')
+        connection_created.connect(install_slow_query_logger, dispatch_uid='shop-slow-query-logger')
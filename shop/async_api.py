@@ -0,0 +1,94 @@
+"""Native async read-only API endpoints.
+
+These mirror the list/detail responses of ``BannerViewSet``,
+``CategoryViewSet`` and ``ProductViewSet`` but run on Django's async ORM,
+so under ASGI they are served on the event loop without the thread-pool
+hop a sync DRF view needs.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import ValidationError
+
+from .cards import absolute_card, card_rows
+from .listing import api_product_filters, filter_products, product_facets
+from .models import Category, Product, Banner
+from .serializers import CategorySerializer, ProductSerializer, BannerSerializer
+
+CHUNK_SIZE = 500
+
+
+def _not_found(model):
+    return JsonResponse({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
+
+
+async def _list_data(request, queryset, serializer_class):
+    objects = [obj async for obj in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+    return serializer_class(objects, many=True, context={'request': request}).data
+
+
+async def _list_response(request, queryset, serializer_class):
+    return JsonResponse(await _list_data(request, queryset, serializer_class), safe=False)
+
+
+async def _detail_response(request, queryset, serializer_class, pk):
+    obj = await queryset.filter(pk=pk).afirst()
+    if obj is None:
+        return _not_found(queryset.model)
+    serializer = serializer_class(obj, context={'request': request})
+    return JsonResponse(serializer.data)
+
+
+def _banner_queryset():
+    return Banner.objects.all().order_by('order', 'id')
+
+
+def _category_queryset():
+    return Category.objects.filter(is_hidden=False).order_by('sort_order', 'name').prefetch_related('subcategories')
+
+
+def _product_queryset():
+    return Product.objects.filter(category__is_hidden=False).select_related('category', 'subcategory').prefetch_related('images').order_by('-created_at')
+
+
+@require_safe
+async def banner_list(request):
+    return await _list_response(request, _banner_queryset(), BannerSerializer)
+
+
+@require_safe
+async def banner_detail(request, pk):
+    return await _detail_response(request, _banner_queryset(), BannerSerializer, pk)
+
+
+@require_safe
+async def category_list(request):
+    return await _list_response(request, _category_queryset(), CategorySerializer)
+
+
+@require_safe
+async def category_detail(request, pk):
+    return await _detail_response(request, _category_queryset(), CategorySerializer, pk)
+
+
+@require_safe
+async def product_list(request):
+    try:
+        filters = api_product_filters(request.GET)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    data = await _list_data(request, filter_products(_product_queryset(), **filters), ProductSerializer)
+    if request.GET.get('facets') in ('1', 'true'):
+        return JsonResponse({'results': data, 'facets': await sync_to_async(product_facets)(filters)})
+    return JsonResponse(data, safe=False)
+
+
+@require_safe
+async def product_cards(request):
+    rows = card_rows(request.GET.get('category')).aiterator(chunk_size=CHUNK_SIZE)
+    return JsonResponse([absolute_card(request, row) async for row in rows], safe=False)
+
+
+@require_safe
+async def product_detail(request, pk):
+    return await _detail_response(request, _product_queryset(), ProductSerializer, pk)
@@ -0,0 +1,87 @@
+"""Authentication backend that keeps users and their permissions in the cache.
+
+``AuthenticationMiddleware`` loads the session's user on every request. With
+this backend the user row, and the permission sets when something checks
+them, come from the shared cache instead of the database. The signal
+handlers in ``shop.signals`` drop a user's entries when the user is saved,
+deleted or logged out, or when their groups or permissions change. Changes to
+a group's permissions move every user onto a new permissions version.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+PERMISSIONS_VERSION_KEY = 'shop:auth:permissions-version'
+PERMISSION_SOURCES = ('user', 'group')
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_CACHE_TIMEOUT', 300)
+
+
+def _user_key(user_id):
+    return f'shop:auth:user:{user_id}'
+
+
+def _permissions_version():
+    # Seeded from the clock so an evicted version never revives old permission sets.
+    return cache.get_or_set(PERMISSIONS_VERSION_KEY, time.time_ns, None)
+
+
+def _permissions_key(version, source, user_id):
+    return f'shop:auth:{source}-permissions:{version}:{user_id}'
+
+
+def invalidate_users(user_ids):
+    """Forget the cached rows and permission sets of ``user_ids``."""
+    version = _permissions_version()
+    cache.delete_many([
+        key
+        for user_id in user_ids
+        for key in (_user_key(user_id), *(_permissions_key(version, source, user_id) for source in PERMISSION_SOURCES))
+    ])
+
+
+def invalidate_all_permissions():
+    try:
+        cache.incr(PERMISSIONS_VERSION_KEY)
+    except ValueError:
+        cache.set(PERMISSIONS_VERSION_KEY, time.time_ns(), None)
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose user and permission lookups go through the cache."""
+
+    def get_user(self, user_id):
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, _timeout())
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
+
+    def _cached_permissions(self, user_obj, obj, source, load):
+        if obj is not None or not user_obj.is_active or user_obj.is_anonymous:
+            return load(user_obj, obj)
+        attribute = f'_{source}_perm_cache'
+        if not hasattr(user_obj, attribute):
+            key = _permissions_key(_permissions_version(), source, user_obj.pk)
+            permissions = cache.get(key)
+            if permissions is None:
+                permissions = load(user_obj, obj)
+                cache.set(key, permissions, _timeout())
+            setattr(user_obj, attribute, permissions)
+        return getattr(user_obj, attribute)
+
+    def get_user_permissions(self, user_obj, obj=None):
+        return self._cached_permissions(user_obj, obj, 'user', super().get_user_permissions)
+
+    def get_group_permissions(self, user_obj, obj=None):
+        return self._cached_permissions(user_obj, obj, 'group', super().get_group_permissions)
@@ -0,0 +1,159 @@
+"""Batched, resumable data backfills for large catalog tables.
+
+A backfill walks a model in primary-key order, ``BACKFILL_BATCH_SIZE`` rows
+at a time. Each batch passes every row to the backfill's ``update``
+function and writes the changed rows with one ``bulk_update``. It then
+records the last primary key in a ``BackfillCheckpoint``, all in a short
+transaction of its own. Between batches it sleeps ``BACKFILL_PAUSE``
+seconds so the API keeps getting the database. An interrupted run resumes
+after the last committed batch.
+
+Backfills are registered by name with ``register`` and run either from a
+migration with ``RunBackfill`` or from ``manage.py backfill``. With
+``BACKFILL_DEFER = True``, migrations only record the backfill as pending
+and ``manage.py backfill --pending`` runs it after the deploy.
+"""
+import logging
+import time
+from typing import Callable, NamedTuple
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class Backfill(NamedTuple):
+    name: str
+    model: str
+    fields: tuple
+    update: Callable
+    filters: dict
+    related: tuple = ()
+    prefetch: tuple = ()
+
+
+BACKFILLS = {}
+
+
+def register(name, model, fields, filters=None, related=(), prefetch=()):
+    """Register ``update(obj) -> bool`` as the backfill ``name``.
+
+    ``model`` is an ``'app_label.ModelName'`` label so the backfill can run
+    against historical models inside a migration. ``update`` changes
+    ``fields`` on the row in place and returns whether it changed anything.
+    ``related`` and ``prefetch`` are loaded with each batch for updates that
+    read other tables.
+    """
+    def decorator(update):
+        BACKFILLS[name] = Backfill(name, model, tuple(fields), update, filters or {}, tuple(related), tuple(prefetch))
+        return update
+    return decorator
+
+
+def get_backfill(name):
+    try:
+        return BACKFILLS[name]
+    except KeyError:
+        raise LookupError(f'No backfill named {name!r}; registered: {", ".join(sorted(BACKFILLS)) or "none"}')
+
+
+def log_progress(checkpoint):
+    total = f'/{checkpoint.total}' if checkpoint.total is not None else ''
+    logger.info(
+        '%s: %s%s rows checked, %s updated (last pk %s)',
+        checkpoint.name, checkpoint.processed, total, checkpoint.updated, checkpoint.last_pk,
+    )
+
+
+def mark_pending(name, apps=global_apps, using=DEFAULT_DB_ALIAS):
+    checkpoints = apps.get_model('shop', 'BackfillCheckpoint')._default_manager.using(using)
+    checkpoint, _ = checkpoints.get_or_create(name=name)
+    if checkpoint.status == 'done':
+        checkpoint.status, checkpoint.started_at = 'pending', None
+        checkpoint.save(update_fields=['status', 'started_at', 'updated_at'])
+    return checkpoint
+
+
+def run_backfill(name, apps=global_apps, using=DEFAULT_DB_ALIAS, batch_size=None, pause=None,
+                 restart=False, progress=log_progress):
+    """Run (or resume) the backfill ``name`` and return its checkpoint."""
+    backfill = get_backfill(name)
+    batch_size = batch_size or getattr(settings, 'BACKFILL_BATCH_SIZE', 1000)
+    pause = getattr(settings, 'BACKFILL_PAUSE', 0.1) if pause is None else pause
+    model = apps.get_model(backfill.model)
+    checkpoints = apps.get_model('shop', 'BackfillCheckpoint')._default_manager.using(using)
+    rows = model._default_manager.using(using).filter(**backfill.filters)
+    batches = rows.prefetch_related(*backfill.prefetch)
+    if backfill.related:
+        batches = batches.select_related(*backfill.related)
+
+    checkpoint, _ = checkpoints.get_or_create(name=name)
+    if checkpoint.status == 'done' and not restart:
+        return checkpoint
+    if restart or checkpoint.started_at is None:
+        checkpoint.last_pk = checkpoint.processed = checkpoint.updated = 0
+        checkpoint.started_at, checkpoint.finished_at = timezone.now(), None
+    checkpoint.status = 'running'
+    checkpoint.total = checkpoint.processed + rows.filter(pk__gt=checkpoint.last_pk).count()
+    checkpoint.save()
+
+    while True:
+        with transaction.atomic(using=using):
+            batch = list(batches.filter(pk__gt=checkpoint.last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            changed = [obj for obj in batch if backfill.update(obj)]
+            if changed:
+                model._default_manager.using(using).bulk_update(changed, backfill.fields)
+            checkpoint.last_pk = batch[-1].pk
+            checkpoint.processed += len(batch)
+            checkpoint.updated += len(changed)
+            checkpoint.save()
+        if progress is not None:
+            progress(checkpoint)
+        if len(batch) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    checkpoint.status, checkpoint.finished_at = 'done', timezone.now()
+    checkpoint.save()
+    return checkpoint
+
+
+class RunBackfill(migrations.RunPython):
+    """Migration operation running a registered backfill against historical models.
+
+    Put it in a migration with ``atomic = False`` so every batch commits on
+    its own instead of holding one lock for the whole table.
+    """
+
+    def __init__(self, name, batch_size=None, pause=None):
+        self.backfill_name = name
+        self.batch_size = batch_size
+        self.pause = pause
+        super().__init__(self.run, migrations.RunPython.noop, elidable=True)
+
+    def run(self, apps, schema_editor):
+        using = schema_editor.connection.alias
+        if getattr(settings, 'BACKFILL_DEFER', False):
+            mark_pending(self.backfill_name, apps, using)
+            return
+        run_backfill(self.backfill_name, apps, using, self.batch_size, self.pause)
+
+    def describe(self):
+        return f'Backfill {self.backfill_name}'
+
+
+@register('product-cards', 'shop.Product', ['card'], related=['category', 'subcategory'], prefetch=['images'])
+def fill_product_card(product):
+    from .cards import build_card
+
+    card = build_card(product)
+    if card == product.card:
+        return False
+    product.card = card
+    return True
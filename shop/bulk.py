@@ -0,0 +1,108 @@
+"""Bulk reorder, move and re-categorize operations for the admin lists.
+
+A drag-and-drop of many rows is written as a single statement. Reordering
+uses ``bulk_update``, which sets every row's position with one
+``UPDATE ... SET sort_order = CASE id WHEN ... END``. Moves give all their
+rows the same values, so they use a plain ``UPDATE ... WHERE id IN``.
+Both run in a transaction and never call ``save()``. They therefore set
+``updated_at`` themselves and run the cache invalidation that the model
+signals would have run, once per operation instead of once per row, and
+rebuild the product cards the change affects.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .cards import rebuild_cards
+from .models import Category, SubCategory, Product, ProductImage, Banner
+
+# kind -> (model, position field)
+REORDERABLE = {
+    'category': (Category, 'sort_order'),
+    'subcategory': (SubCategory, 'sort_order'),
+    'banner': (Banner, 'order'),
+    'image': (ProductImage, 'sort_order'),
+}
+
+
+def _has_updated_at(model):
+    return any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+
+
+def _check_exist(model, pks, queryset=None):
+    queryset = model.objects.all() if queryset is None else queryset
+    missing = set(pks) - set(queryset.filter(pk__in=pks).values_list('pk', flat=True))
+    if missing:
+        raise model.DoesNotExist(f'No {model._meta.model_name} with id {", ".join(map(str, sorted(missing)))}')
+
+
+def _check_target(category_pk):
+    # A hidden category is being deleted; rows moved into it would go with it.
+    _check_exist(Category, [category_pk], Category.objects.filter(is_hidden=False))
+
+
+def _invalidate(*models):
+    from .signals import invalidate_after_bulk_write
+
+    invalidate_after_bulk_write(*models)
+
+
+def set_positions(kind, positions):
+    """Write ``{pk: position}`` for the objects of ``kind`` in one statement."""
+    model, field = REORDERABLE[kind]
+    if not positions:
+        return 0
+    fields = [field]
+    objects = [model(pk=pk, **{field: position}) for pk, position in positions.items()]
+    if _has_updated_at(model):
+        now = timezone.now()
+        for obj in objects:
+            obj.updated_at = now
+        fields.append('updated_at')
+    with transaction.atomic():
+        _check_exist(model, positions)
+        updated = model.objects.bulk_update(objects, fields)
+        if model is ProductImage:
+            rebuild_cards(Product.objects.filter(images__pk__in=positions).distinct())
+        _invalidate(model)
+    return updated
+
+
+def reorder(kind, pks):
+    """Number the objects ``pks`` 0, 1, 2, ... in list order."""
+    return set_positions(kind, {pk: position for position, pk in enumerate(dict.fromkeys(pks))})
+
+
+def move_subcategories(pks, category_pk):
+    """Move subcategories, and their products with them, to another category."""
+    pks = list(dict.fromkeys(pks))
+    with transaction.atomic():
+        _check_exist(SubCategory, pks)
+        _check_target(category_pk)
+        now = timezone.now()
+        updated = SubCategory.objects.filter(pk__in=pks).update(category_id=category_pk, updated_at=now)
+        Product.objects.filter(subcategory_id__in=pks).update(category_id=category_pk, updated_at=now)
+        rebuild_cards(Product.objects.filter(subcategory_id__in=pks))
+        _invalidate(Category, SubCategory, Product)
+    return updated
+
+
+def recategorize_products(pks, category_pk=None, subcategory_pk=None):
+    """Put products in a category or subcategory.
+
+    A subcategory implies its category. Moving products to a category only
+    drops their subcategory, which belongs to the old category.
+    """
+    pks = list(dict.fromkeys(pks))
+    if subcategory_pk is not None:
+        category_pk = SubCategory.objects.values_list('category_id', flat=True).get(pk=subcategory_pk)
+    elif category_pk is None:
+        raise ValueError('Give a category or a subcategory')
+    with transaction.atomic():
+        _check_exist(Product, pks)
+        _check_target(category_pk)
+        updated = Product.objects.filter(pk__in=pks).update(
+            category_id=category_pk, subcategory_id=subcategory_pk, updated_at=timezone.now(),
+        )
+        rebuild_cards(Product.objects.filter(pk__in=pks))
+        _invalidate(Product)
+    return updated
@@ -0,0 +1,297 @@
+"""Cache backend shared by every worker on a host, stored in SQLite.
+
+All processes open the same database file in WAL mode, so readers never
+block the single writer and a value set by one worker is seen by the rest.
+Integers are stored as native SQLite integers so ``incr`` is one atomic
+``UPDATE``; everything else is pickled. The cache is bounded by
+``MAX_ENTRIES`` and, optionally, ``MAX_SIZE`` bytes: once either is passed,
+expired rows and then the least recently read rows are evicted.
+
+``get_or_set`` takes a short-lived lock entry before computing a missing
+value, so when a hot key expires one caller rebuilds it while the others
+wait for the result instead of all hitting the database at once.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# SQLite's default limit on host parameters in one statement.
+MAX_VARIABLES = 999
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed);
+CREATE TABLE IF NOT EXISTS cache_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_totals (id, entries, bytes) VALUES (1, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries BEGIN
+    UPDATE cache_totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_update AFTER UPDATE OF size ON cache_entries BEGIN
+    UPDATE cache_totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries BEGIN
+    UPDATE cache_totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 1;
+END;
+"""
+
+UPSERT = """
+INSERT INTO cache_entries (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, expires = excluded.expires, accessed = excluded.accessed, size = excluded.size
+"""
+
+
+def _encode(value):
+    if type(value) is int:
+        return value, 8
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return data, len(data)
+
+
+def _decode(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+def _chunks(items, size=MAX_VARIABLES):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteCache(BaseCache):
+    """Process-shared cache in a SQLite database at ``LOCATION``.
+
+    ``OPTIONS`` accepts the usual ``MAX_ENTRIES`` and ``CULL_FREQUENCY``
+    plus ``MAX_SIZE`` (bytes of stored values), ``LOCK_TIMEOUT`` (seconds a
+    ``get_or_set`` rebuild may hold its lock) and ``TOUCH_BATCH`` (reads
+    buffered before their access times are written).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = Path(location)
+        self.max_size = options.get('MAX_SIZE')
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        self.touch_batch = options.get('TOUCH_BATCH', 64)
+        self._local = threading.local()
+        self._touched = {}
+        self._touched_lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    # Connections -------------------------------------------------------
+
+    @property
+    def _db(self):
+        # One connection per thread, reopened after a fork.
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.executescript(SCHEMA)
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def _write(self):
+        """Start an immediate write transaction and flush buffered access times into it."""
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            db.executemany(
+                'UPDATE cache_entries SET accessed = ? WHERE key = ?',
+                [(accessed, key) for key, accessed in touched.items()],
+            )
+        return db
+
+    def _touch(self, keys, now):
+        with self._touched_lock:
+            for key in keys:
+                self._touched[key] = now
+            flush = len(self._touched) >= self.touch_batch
+        if flush:
+            db = self._write()
+            db.execute('COMMIT')
+
+    # Reads -------------------------------------------------------------
+
+    def _fetch(self, keys):
+        now = time.time()
+        found = {}
+        for chunk in _chunks(keys):
+            rows = self._db.execute(
+                f'SELECT key, value FROM cache_entries WHERE key IN ({", ".join("?" * len(chunk))}) '
+                f'AND (expires IS NULL OR expires > ?)',
+                [*chunk, now],
+            )
+            found.update(rows)
+        if found:
+            self._touch(found, now)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        found = self._fetch([key])
+        return _decode(found[key]) if key in found else default
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        return {keys[key]: _decode(value) for key, value in self._fetch(list(keys)).items()}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    # Writes ------------------------------------------------------------
+
+    def _store(self, items, timeout):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [(key, *self._row(value, expires, now)) for key, value in items]
+        db = self._write()
+        try:
+            db.executemany(UPSERT, rows)
+            self._cull(db, now)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    @staticmethod
+    def _row(value, expires, now):
+        encoded, size = _encode(value)
+        return encoded, expires, now, size
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store([(self.make_and_validate_key(key, version=version), value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store([(self.make_and_validate_key(key, version=version), value) for key, value in data.items()], timeout)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        row = (key, *self._row(value, expires, now), now)
+        db = self._write()
+        try:
+            cursor = db.execute(f'{UPSERT} WHERE cache_entries.expires IS NOT NULL AND cache_entries.expires <= ?', row)
+            added = cursor.rowcount == 1
+            if added:
+                self._cull(db, now)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._db.execute(
+            'UPDATE cache_entries SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, key, now),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        row = self._db.execute(
+            "UPDATE cache_entries SET value = value + ?, accessed = ? "
+            "WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?) RETURNING value",
+            (delta, now, key, now),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found or not an integer")
+        return row[0]
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute('DELETE FROM cache_entries WHERE key = ?', (key,)).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        db = self._write()
+        for chunk in _chunks(keys):
+            db.execute(f'DELETE FROM cache_entries WHERE key IN ({", ".join("?" * len(chunk))})', chunk)
+        db.execute('COMMIT')
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache_entries')
+
+    def close(self, **kwargs):
+        # Connections are kept open per thread for the life of the process.
+        pass
+
+    # Eviction ----------------------------------------------------------
+
+    def _cull(self, db, now):
+        entries, size = db.execute('SELECT entries, bytes FROM cache_totals WHERE id = 1').fetchone()
+        if entries <= self._max_entries and (self.max_size is None or size <= self.max_size):
+            return
+        db.execute('DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        entries, size = db.execute('SELECT entries, bytes FROM cache_totals WHERE id = 1').fetchone()
+        # Evict down to (1 - 1/CULL_FREQUENCY) of each limit, oldest reads first.
+        keep = 1 - 1 / self._cull_frequency if self._cull_frequency else 0
+        if entries > self._max_entries:
+            db.execute(
+                'DELETE FROM cache_entries WHERE key IN '
+                '(SELECT key FROM cache_entries ORDER BY accessed LIMIT ?)',
+                (entries - int(self._max_entries * keep),),
+            )
+        if self.max_size is not None and size > self.max_size:
+            db.execute(
+                'DELETE FROM cache_entries WHERE key IN (SELECT key FROM ('
+                'SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS newer FROM cache_entries'
+                ') WHERE newer > ?)',
+                (int(self.max_size * keep),),
+            )
+
+    # Stampede protection -----------------------------------------------
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """Return the cached value, letting a single caller across all workers build a missing one."""
+        if not callable(default):
+            return super().get_or_set(key, default, timeout, version)
+        value = self.get(key, self._missing_key, version=version)
+        if value is not self._missing_key:
+            return value
+        lock_key = f'{key}:rebuild-lock'
+        # Threads of this process queue on a local lock, other processes on the lock entry.
+        with self._key_locks[hash(lock_key) % len(self._key_locks)]:
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                value = self.get(key, self._missing_key, version=version)
+                if value is not self._missing_key:
+                    return value
+                if self.add(lock_key, 1, self.lock_timeout, version) or time.monotonic() >= deadline:
+                    break
+                time.sleep(0.01)
+            try:
+                value = default()
+                self.set(key, value, timeout, version)
+            finally:
+                self.delete(lock_key, version)
+            return value
@@ -0,0 +1,84 @@
+"""Precomputed product cards for the list APIs.
+
+``Product.card`` holds what a product list shows: name, slug, category and
+subcategory names, the main image and the ordered gallery. The card
+endpoints read ``(id, card)`` straight from the product table, without
+joins or prefetches. Image URLs are stored relative to ``MEDIA_URL``. The
+endpoints make them absolute per request, as the serializers' image
+fields do.
+
+The signal handlers in ``shop.signals`` rebuild the affected cards when a
+product, gallery image, category or subcategory is saved or deleted. Bulk
+writes that send no signals call ``rebuild_cards`` themselves.
+``manage.py backfill product-cards --restart`` rebuilds every card.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Subquery
+
+from .models import Category, Product
+
+
+def make_card(name, slug, category, subcategory, image, images):
+    """Card from names and storage paths of the main and gallery images."""
+    return {
+        'name': name,
+        'slug': slug,
+        'category': category,
+        'subcategory': subcategory,
+        'image': default_storage.url(image) if image else None,
+        'images': [default_storage.url(path) for path in images],
+    }
+
+
+def build_card(product):
+    """Card for ``product``; its category, subcategory and images should be preloaded."""
+    return make_card(
+        product.name,
+        product.slug,
+        product.category.name,
+        product.subcategory.name if product.subcategory_id else None,
+        product.image.name,
+        [image.image.name for image in product.images.all()],
+    )
+
+
+def rebuild_cards(products, batch_size=None):
+    """Recompute and store the cards of the ``products`` queryset; return how many changed."""
+    batch_size = batch_size or getattr(settings, 'PRODUCT_CARD_BATCH_SIZE', 500)
+    products = products.select_related('category', 'subcategory').prefetch_related('images').order_by('pk')
+    changed, last_pk = 0, 0
+    while True:
+        batch = list(products.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return changed
+        stale = []
+        for product in batch:
+            card = build_card(product)
+            if card != product.card:
+                product.card = card
+                stale.append(product)
+        if stale:
+            Product.objects.bulk_update(stale, ['card'])
+            changed += len(stale)
+        if len(batch) < batch_size:
+            return changed
+        last_pk = batch[-1].pk
+
+
+def card_rows(category_slug=None):
+    """``{'id', 'card'}`` rows of the visible products, newest first."""
+    rows = Product.objects.exclude(category_id__in=Subquery(Category.objects.filter(is_hidden=True).values('pk')))
+    if category_slug:
+        rows = rows.filter(category_id__in=Subquery(Category.objects.filter(slug=category_slug).values('pk')))
+    return rows.order_by('-created_at').values('id', 'card')
+
+
+def absolute_card(request, row):
+    absolute, card = request.build_absolute_uri, row['card']
+    return {
+        'id': row['id'],
+        **card,
+        'image': absolute(card['image']) if card.get('image') else None,
+        'images': [absolute(url) for url in card.get('images', ())],
+    }
@@ -1,62 +1,91 @@
-from django.urls import reverse
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.core.signals import setting_changed
+from django.urls import get_script_prefix, reverse
+
+
+class MenuItem(NamedTuple):
+    id: str
+    label: str
+    url: str
+    icon_path: str
+    is_active: bool
+
+
+# (id, label, url name, icon path, url names that mark the item active)
+SIDEBAR_MENU = (
+    (
+        'dashboard',
+        'Dashboard',
+        'dashboard',
+        "M3 12l2-2m0 0l7-7 7 7M5 10v10a1 1 0 001 1h3m10-11l2 2m-2-2v10a1 1 0 01-1 1h-3m-6 0a1 1 0 001-1v-4a1 1 0 011-1h2a1 1 0 011 1v4a1 1 0 001 1m-6 0h6",
+        ('dashboard',),
+    ),
+    (
+        'categories',
+        'Ангилал',
+        'category_list',
+        "M4 6a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2H6a2 2 0 01-2-2V6zM14 6a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2h-2a2 2 0 01-2-2V6zM4 16a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2H6a2 2 0 01-2-2v-2zM14 16a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2h-2a2 2 0 01-2-2v-2z",
+        ('category_list', 'category_create', 'category_edit', 'category_delete'),
+    ),
+    (
+        'products',
+        'Бүтээгдэхүүнүүд',
+        'product_list',
+        "M20 7l-8-4-8 4m16 0l-8 4m8-4v10l-8 4m0-10L4 7m8 4v10M4 7v10l8 4",
+        ('product_list', 'product_create', 'product_edit', 'product_delete'),
+    ),
+    (
+        'landing',
+        'Landing агуулга',
+        'landing_content_list',
+        "M7 21h10a2 2 0 002-2V9.414a1 1 0 00-.293-.707l-5.414-5.414A1 1 0 0012.586 3H7a2 2 0 00-2 2v14a2 2 0 002 2z",
+        ('landing_content_list', 'landing_content_create', 'landing_content_edit', 'landing_content_delete'),
+    ),
+    (
+        'banners',
+        'Баннер',
+        'banner_list',
+        "M4 4h16v12H4zM4 16l8 4 8-4",
+        ('banner_list', 'banner_create', 'banner_edit', 'banner_delete'),
+    ),
+)
+
+
+@lru_cache(maxsize=None)
+def build_navigation(script_prefix):
+    """Build every variant of the sidebar once per process and script prefix.
+
+    Returns a mapping of url name to the menu with that page's item active,
+    and the menu with nothing active for every other page.
+    """
+    urls = {item_id: reverse(url_name) for item_id, _, url_name, _, _ in SIDEBAR_MENU}
+
+    def menu(active_id):
+        return tuple(
+            MenuItem(item_id, label, urls[item_id], icon_path, item_id == active_id)
+            for item_id, label, _, icon_path, _ in SIDEBAR_MENU
+        )
+
+    by_url_name = {}
+    for item_id, _, _, _, match_names in SIDEBAR_MENU:
+        active_menu = menu(item_id)
+        for name in match_names:
+            by_url_name[name] = active_menu
+    return by_url_name, menu(None)
+
+
+def _clear_navigation(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        build_navigation.cache_clear()
+
+
+setting_changed.connect(_clear_navigation, dispatch_uid='shop-sidebar-navigation')
 
 
 def sidebar_navigation(request):
     """Provide sidebar navigation items with active state based on current view."""
-    current_name = ''
-    if getattr(request, 'resolver_match', None):
-        current_name = request.resolver_match.url_name or ''
-
-    menu_items = [
-        {
-            'id': 'dashboard',
-            'label': 'Dashboard',
-            'url': reverse('dashboard'),
-            'icon_path': "M3 12l2-2m0 0l7-7 7 7M5 10v10a1 1 0 001 1h3m10-11l2 2m-2-2v10a1 1 0 01-1 1h-3m-6 0a1 1 0 001-1v-4a1 1 0 011-1h2a1 1 0 011 1v4a1 1 0 001 1m-6 0h6",
-            'match_names': {'dashboard'},
-        },
-        {
-            'id': 'categories',
-            'label': 'Ангилал',
-            'url': reverse('category_list'),
-            'icon_path': "M4 6a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2H6a2 2 0 01-2-2V6zM14 6a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2h-2a2 2 0 01-2-2V6zM4 16a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2H6a2 2 0 01-2-2v-2zM14 16a2 2 0 012-2h2a2 2 0 012 2v2a2 2 0 01-2 2h-2a2 2 0 01-2-2v-2z",
-            'match_names': {'category_list', 'category_create', 'category_edit', 'category_delete'},
-        },
-        {
-            'id': 'products',
-            'label': 'Бүтээгдэхүүнүүд',
-            'url': reverse('product_list'),
-            'icon_path': "M20 7l-8-4-8 4m16 0l-8 4m8-4v10l-8 4m0-10L4 7m8 4v10M4 7v10l8 4",
-            'match_names': {'product_list', 'product_create', 'product_edit', 'product_delete'},
-        },
-        {
-            'id': 'landing',
-            'label': 'Landing агуулга',
-            'url': reverse('landing_content_list'),
-            'icon_path': "M7 21h10a2 2 0 002-2V9.414a1 1 0 00-.293-.707l-5.414-5.414A1 1 0 0012.586 3H7a2 2 0 00-2 2v14a2 2 0 002 2z",
-            'match_names': {
-                'landing_content_list',
-                'landing_content_create',
-                'landing_content_edit',
-                'landing_content_delete',
-            },
-        },
-        {
-            'id': 'banners',
-            'label': 'Баннер',
-            'url': reverse('banner_list'),
-            'icon_path': "M4 4h16v12H4zM4 16l8 4 8-4",
-            'match_names': {
-                'banner_list',
-                'banner_create',
-                'banner_edit',
-                'banner_delete',
-            },
-        },
-    ]
-
-    for item in menu_items:
-        item['is_active'] = current_name in item['match_names']
-
-    return {'sidebar_menu': menu_items}
-
+    by_url_name, inactive = build_navigation(get_script_prefix())
+    match = getattr(request, 'resolver_match', None)
+    return {'sidebar_menu': by_url_name.get(match.url_name, inactive) if match else inactive}
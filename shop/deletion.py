@@ -0,0 +1,193 @@
+"""Background, batched deletion of a category and its dependents.
+
+``schedule_category_deletion`` hides the category at once and queues a
+``CategoryDeletionJob``. The job then removes gallery images, products
+and subcategories in batches of ``CATEGORY_DELETION_BATCH_SIZE`` with raw
+set-based ``DELETE`` statements, so Django's collector never loads the
+whole tree into memory. Each batch commits on its own, deletes the
+batch's media files once nothing else references them, and updates the
+job's counters for the progress display. Slug redirects of the deleted
+products and category go in the same transaction as their rows. The
+category is hidden from the start, so the catalog caches are refreshed
+once, when the job ends, rather than after every batch.
+
+The job runs in a background thread of the worker that scheduled it. A
+thread dies with its worker, so each worker's warm-up resumes jobs that
+have made no progress for ``CATEGORY_DELETION_STALE_AFTER`` seconds, and
+``manage.py resume_category_deletions`` does the same by hand (failed
+jobs included). Batches are idempotent, so rerunning a job is safe.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .models import (
+    Category, SubCategory, Product, ProductImage, Banner, LandingPageContent, CategoryDeletionJob, SlugRedirect,
+)
+
+logger = logging.getLogger(__name__)
+
+# Models with image columns whose files may be shared, e.g. generated placeholders.
+FILE_MODELS = (Category, Product, ProductImage, Banner, LandingPageContent)
+# SlugRedirect kinds of the models whose former slugs keep resolving.
+REDIRECT_KINDS = {Product: 'product', Category: 'category'}
+
+
+def _batch_size():
+    return getattr(settings, 'CATEGORY_DELETION_BATCH_SIZE', 500)
+
+
+def schedule_category_deletion(category):
+    """Hide ``category`` immediately and delete it in the background once committed."""
+    with transaction.atomic():
+        category.is_hidden = True
+        category.save(update_fields=['is_hidden', 'updated_at'])
+        job = CategoryDeletionJob.objects.create(
+            category_id=category.pk,
+            category_name=category.name,
+            products_total=Product.objects.filter(category_id=category.pk).count(),
+        )
+        transaction.on_commit(lambda: start_job(job.pk))
+    return job
+
+
+def start_job(job_pk):
+    if not getattr(settings, 'CATEGORY_DELETION_IN_BACKGROUND', True):
+        run_job(job_pk)
+        return
+    threading.Thread(target=_run_in_thread, args=(job_pk,), name=f'category-deletion-{job_pk}', daemon=True).start()
+
+
+def _run_in_thread(job_pk):
+    try:
+        run_job(job_pk)
+    finally:
+        connections.close_all()
+
+
+def _delete_rows(model, pks):
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE id IN ({", ".join(["%s"] * len(pks))})', pks)
+        return cursor.rowcount
+
+
+def _delete_files(paths):
+    """Delete media files that no remaining row points at; return how many were removed."""
+    paths = {path for path in paths if path}
+    for model in FILE_MODELS:
+        if paths:
+            paths -= set(model.objects.filter(image__in=paths).values_list('image', flat=True))
+    deleted = 0
+    for path in paths:
+        try:
+            default_storage.delete(path)
+            deleted += 1
+        except OSError:
+            logger.warning('Could not delete media file %s', path, exc_info=True)
+    return deleted
+
+
+def _refresh_caches():
+    # Raw deletes skip the model signals, so do what their handlers would.
+    from .details import bump_detail_version
+    from .fragments import bump_row_version
+    from .landing import invalidate_landing_payload
+    from .listing import bump_product_list_version
+    from .live import broadcaster
+    from .stats import invalidate_dashboard_stats
+
+    invalidate_dashboard_stats()
+    bump_product_list_version()
+    bump_row_version('product')
+    bump_row_version('category')
+    bump_detail_version('product')
+    bump_detail_version('category')
+    invalidate_landing_payload()
+    broadcaster.notify()
+
+
+def _next_batch(job):
+    """Delete one batch of the deepest remaining rows; return False once nothing is left."""
+    size = _batch_size()
+    category_id = job.category_id
+    steps = (
+        (ProductImage, ProductImage.objects.filter(product__category_id=category_id), 'images_deleted', True),
+        (Product, Product.objects.filter(category_id=category_id), 'products_deleted', True),
+        (SubCategory, SubCategory.objects.filter(category_id=category_id), 'subcategories_deleted', False),
+        (Category, Category.objects.filter(pk=category_id), None, True),
+    )
+    for model, queryset, counter, has_files in steps:
+        rows = list(queryset.order_by('pk').values_list('pk', 'image' if has_files else 'pk')[:size])
+        if not rows:
+            continue
+        pks = [pk for pk, _ in rows]
+        with transaction.atomic():
+            if model is SubCategory:
+                # Products elsewhere that still point at these subcategories (on_delete=SET_NULL).
+                Product.objects.filter(subcategory_id__in=pks).update(subcategory=None)
+            if model in REDIRECT_KINDS:
+                SlugRedirect.objects.filter(kind=REDIRECT_KINDS[model], object_id__in=pks).delete()
+            deleted = _delete_rows(model, pks)
+            if counter:
+                setattr(job, counter, getattr(job, counter) + deleted)
+            job.save()
+        if has_files:
+            job.files_deleted += _delete_files(path for _, path in rows)
+            job.save(update_fields=['files_deleted', 'updated_at'])
+        return True
+    return False
+
+
+def run_job(job_pk):
+    job = CategoryDeletionJob.objects.get(pk=job_pk)
+    if job.status == 'done':
+        return job
+    job.status, job.error = 'running', ''
+    job.save(update_fields=['status', 'error', 'updated_at'])
+    pause = getattr(settings, 'CATEGORY_DELETION_PAUSE', 0.05)
+    try:
+        while _next_batch(job):
+            if pause:
+                time.sleep(pause)
+    except Exception as exc:
+        logger.exception('Deleting category %s failed', job.category_id)
+        job.status, job.error = 'failed', str(exc)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+    else:
+        job.status, job.finished_at = 'done', timezone.now()
+        job.save(update_fields=['status', 'finished_at', 'updated_at'])
+    _refresh_caches()
+    return job
+
+
+def unfinished_jobs(stale_after=None):
+    """Jobs that are not done and have made no progress for ``stale_after`` seconds."""
+    if stale_after is None:
+        stale_after = getattr(settings, 'CATEGORY_DELETION_STALE_AFTER', 60)
+    return CategoryDeletionJob.objects.exclude(status='done').filter(
+        updated_at__lte=timezone.now() - timedelta(seconds=stale_after),
+    ).order_by('created_at')
+
+
+def resume_stale_jobs():
+    """Restart pending or running jobs whose worker has gone; return how many were started.
+
+    A job is claimed by moving its ``updated_at`` forward only if no one
+    else has, so when several workers start together just one resumes it.
+    """
+    started = 0
+    for job in unfinished_jobs().filter(status__in=['pending', 'running']):
+        claimed = CategoryDeletionJob.objects.filter(pk=job.pk, updated_at=job.updated_at).update(
+            updated_at=timezone.now(),
+        )
+        if claimed:
+            start_job(job.pk)
+            started += 1
+    return started
@@ -0,0 +1,145 @@
+"""Product and category detail by slug, cached per object.
+
+``/api/products/by-slug/<slug>/`` and ``/api/categories/by-slug/<slug>/``
+are answered from two cache entries: the slug's object id and the object's
+serialized detail. The detail is stored with media URLs relative to the
+site, and ``absolute_detail`` makes them absolute per request, as
+``shop.cards`` does for product cards. A slug the object had before a
+rename resolves through ``SlugRedirect`` to the same detail. The response then names the canonical
+URL in ``Content-Location``, so the client can update its link without a
+second request.
+
+The signal handlers in ``shop.signals`` drop an object's detail, and the
+mapping of its current slug, when it is saved or deleted. A rename also
+records the old slug as a redirect. Changes that affect the details of
+many objects, such as a category rename showing in every product, bump
+the kind's version instead.
+"""
+import time
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category, Product, SlugRedirect
+from .serializers import CategorySerializer, ProductSerializer
+
+
+class DetailKind(NamedTuple):
+    model: type
+    queryset: Callable
+    serializer: type
+
+
+DETAIL_KINDS = {
+    'product': DetailKind(
+        Product,
+        lambda: Product.objects.filter(category__is_hidden=False)
+        .select_related('category', 'subcategory').prefetch_related('images'),
+        ProductSerializer,
+    ),
+    'category': DetailKind(
+        Category,
+        lambda: Category.objects.filter(is_hidden=False).prefetch_related('subcategories'),
+        CategorySerializer,
+    ),
+}
+
+
+def _timeout():
+    return getattr(settings, 'DETAIL_CACHE_TIMEOUT', 3600)
+
+
+def _version_key(kind):
+    return f'shop:detail:{kind}:version'
+
+
+def _slug_key(kind, slug):
+    return f'shop:detail:{kind}:slug:{slug}'
+
+
+def _detail_key(kind, version, pk):
+    return f'shop:detail:{kind}:{version}:{pk}'
+
+
+def _version(kind, cached=None):
+    version = cached if cached is not None else cache.get(_version_key(kind))
+    if version is None:
+        # Seeded from the clock so an evicted version never revives old details.
+        version = time.time_ns()
+        cache.add(_version_key(kind), version, None)
+    return version
+
+
+def bump_detail_version(kind):
+    try:
+        cache.incr(_version_key(kind))
+    except ValueError:
+        cache.set(_version_key(kind), time.time_ns(), None)
+
+
+def _resolve(kind, slug):
+    """Object id for a current or former slug of ``kind``, or None."""
+    pk = DETAIL_KINDS[kind].model.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    if pk is None:
+        pk = SlugRedirect.objects.filter(kind=kind, old_slug=slug).values_list('object_id', flat=True).first()
+    return pk
+
+
+def get_detail(kind, slug):
+    """Serialized detail, with relative media URLs, of the ``kind`` object with ``slug`` (or a former slug), or None."""
+    slug_key, version_key = _slug_key(kind, slug), _version_key(kind)
+    cached = cache.get_many([slug_key, version_key])
+    pk = cached.get(slug_key)
+    if pk is None:
+        pk = _resolve(kind, slug)
+        if pk is None:
+            return None
+        cache.set(slug_key, pk, _timeout())
+
+    detail_key = _detail_key(kind, _version(kind, cached.get(version_key)), pk)
+    detail = cache.get(detail_key)
+    if detail is None:
+        definition = DETAIL_KINDS[kind]
+        obj = definition.queryset().filter(pk=pk).first()
+        if obj is None:
+            return None
+        # Without a request in the context, DRF leaves image URLs relative.
+        detail = dict(definition.serializer(obj, context={'request': None}).data)
+        cache.set(detail_key, detail, _timeout())
+    return detail
+
+
+def absolute_detail(request, detail):
+    """``detail`` with its own and its gallery's image URLs made absolute for this request."""
+    def absolute(url):
+        return request.build_absolute_uri(url) if url else None
+
+    detail = {**detail, 'image': absolute(detail.get('image'))}
+    if 'images' in detail:
+        detail['images'] = [{**image, 'image': absolute(image['image'])} for image in detail['images']]
+    return detail
+
+
+def invalidate_detail(kind, pk, slugs=()):
+    """Drop the cached detail of one object and the id mapping of ``slugs``."""
+    cache.delete_many([_detail_key(kind, _version(kind), pk), *(_slug_key(kind, slug) for slug in slugs)])
+
+
+def record_slug_changes(kind, changes):
+    """Keep old slugs working after renames.
+
+    ``changes`` holds ``(pk, old_slug, new_slug)``; ``old_slug`` is None for
+    a new object.
+    """
+    changes = [(pk, old, new) for pk, old, new in changes if old != new]
+    if not changes:
+        return
+    # A slug in use again belongs to its new owner, not to a redirect.
+    SlugRedirect.objects.filter(kind=kind, old_slug__in=[new for _, _, new in changes]).delete()
+    renamed = [SlugRedirect(kind=kind, old_slug=old, object_id=pk) for pk, old, _ in changes if old]
+    if renamed:
+        SlugRedirect.objects.bulk_create(
+            renamed, update_conflicts=True, unique_fields=['kind', 'old_slug'], update_fields=['object_id'],
+        )
+    cache.delete_many([_slug_key(kind, new) for _, _, new in changes])
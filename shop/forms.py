@@ -1,5 +1,7 @@
 from django import forms
+from django.forms import BaseInlineFormSet
 
+from .bulk import set_positions
 from .models import Category, Product, LandingPageContent, SubCategory, Banner
 
 BASE_INPUT_CLASS = 'mt-1 block w-full rounded-md border border-gray-300 bg-white px-3 py-2.5 text-base shadow-sm focus:border-indigo-500 focus:ring-indigo-500'
@@ -77,6 +79,22 @@ class SubCategoryForm(forms.ModelForm):
         }
 
 
+class SubCategoryInlineFormSet(BaseInlineFormSet):
+    """Saves rows whose only change is their sort order with one bulk UPDATE."""
+
+    def save_existing_objects(self, commit=True):
+        self._reordered = {}
+        saved = super().save_existing_objects(commit)
+        set_positions('subcategory', self._reordered)
+        return saved
+
+    def save_existing(self, form, obj, commit=True):
+        if commit and form.changed_data == ['sort_order']:
+            self._reordered[obj.pk] = obj.sort_order
+            return obj
+        return super().save_existing(form, obj, commit)
+
+
 class ProductForm(forms.ModelForm):
     additional_images = MultipleFileField(
         required=False,
@@ -118,7 +136,7 @@ class ProductForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['category'].queryset = Category.objects.order_by('sort_order', 'name')
+        self.fields['category'].queryset = Category.objects.filter(is_hidden=False).order_by('sort_order', 'name')
         self.fields['subcategory'].required = False
         self.fields['slug'].required = False
 
@@ -151,7 +169,7 @@ class ProductForm(forms.ModelForm):
                 category_id = self.instance.category_id
 
         if category_id:
-            self.fields['subcategory'].queryset = SubCategory.objects.filter(category_id=category_id).order_by('sort_order', 'name')
+            self.fields['subcategory'].queryset = queryset.filter(category_id=category_id).order_by('sort_order', 'name')
         else:
             self.fields['subcategory'].queryset = queryset.order_by('category__name', 'sort_order', 'name')
 
@@ -0,0 +1,76 @@
+"""Single cached payload for the storefront home page.
+
+Active landing sections, banners and the featured categories are serialized
+together into one JSON body with an ETag. The payload is cached once under
+a single key, with media URLs relative to the site, and the model signals
+delete it whenever any of the included models change. Each response makes
+the image URLs absolute for its own site root, as ``shop.cards`` does for
+product cards, so a request's ``Host`` header never adds to the cache.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .metrics import timed
+from .models import Category, Banner, LandingPageContent
+from .serializers import CategorySerializer, BannerSerializer, LandingPageContentSerializer
+
+LANDING_PAYLOAD_CACHE_KEY = 'shop:landing-payload'
+
+
+def _dumps(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+
+
+def compute_landing_payload():
+    """Serialize the home page data with relative media URLs; returns ``(digest, payload)``."""
+    # Without a request in the context, DRF leaves image URLs relative.
+    context = {'request': None}
+    featured = Category.objects.filter(is_hidden=False).order_by('sort_order', 'name').prefetch_related('subcategories')
+    with timed('serialize'):
+        payload = {
+            'sections': LandingPageContentSerializer(
+                LandingPageContent.objects.filter(is_active=True).order_by('sort_order', 'id'), many=True, context=context,
+            ).data,
+            'banners': BannerSerializer(Banner.objects.order_by('order', 'id'), many=True, context=context).data,
+            'featured_categories': CategorySerializer(
+                featured[:getattr(settings, 'LANDING_FEATURED_CATEGORIES', 8)], many=True, context=context,
+            ).data,
+        }
+        body = _dumps(payload)
+    return hashlib.sha1(body).hexdigest(), json.loads(body)
+
+
+def _absolute(request, payload):
+    # Every list in the payload carries its media URL in ``image``.
+    absolute = request.build_absolute_uri
+    return {
+        name: [{**item, 'image': absolute(item['image']) if item.get('image') else None} for item in items]
+        for name, items in payload.items()
+    }
+
+
+def get_cached_payload():
+    """Return the shared ``(digest, payload)``, building it on a miss."""
+    cached = cache.get(LANDING_PAYLOAD_CACHE_KEY)
+    if cached is None:
+        cached = compute_landing_payload()
+        cache.set(LANDING_PAYLOAD_CACHE_KEY, cached, getattr(settings, 'LANDING_PAYLOAD_TIMEOUT', 3600))
+    return cached
+
+
+def get_landing_payload(request):
+    """Return ``(etag, body)`` for this request's site root."""
+    digest, payload = get_cached_payload()
+    site = request.build_absolute_uri('/')
+    etag = f'"{hashlib.sha1(f"{digest}|{site}".encode()).hexdigest()}"'
+    with timed('serialize'):
+        body = _dumps(_absolute(request, payload))
+    return etag, body
+
+
+def invalidate_landing_payload():
+    cache.delete(LANDING_PAYLOAD_CACHE_KEY)
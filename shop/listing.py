@@ -0,0 +1,239 @@
+"""Keyset pagination and cached counts for the admin product list and API.
+
+Pages are ordered newest first on ``(created_at, id)`` and addressed by an
+opaque cursor holding the last row's key, so every page is an index range
+scan of ``PRODUCT_LIST_PAGE_SIZE`` rows however deep the user scrolls.
+Filtered totals, and the facet counts of ``/api/products/?facets=1``, are
+cached per filter combination under a version number that the model
+signals bump whenever the catalog changes. Past
+``PRODUCT_FACET_EXACT_LIMIT`` products the facet counts are estimated from
+evenly spaced pk windows instead of counting every matching row.
+"""
+import base64
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Func, Max, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import Product, ProductImage
+
+PRODUCT_LIST_VERSION_KEY = 'shop:product-list-version'
+# Number of pk windows a facet sample is spread over.
+FACET_SAMPLE_WINDOWS = 10
+
+
+def page_size():
+    return getattr(settings, 'PRODUCT_LIST_PAGE_SIZE', 50)
+
+
+def encode_cursor(product):
+    raw = f'{product.created_at.isoformat()}|{product.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, pk)`` from a cursor, or None when it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def filter_products(
+    queryset, search='', category='', subcategory='', categories=(), subcategories=(),
+    created_after=None, created_before=None, has_image=None,
+):
+    if search:
+        queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
+    if category:
+        queryset = queryset.filter(category__slug=category)
+    if subcategory:
+        queryset = queryset.filter(subcategory__slug=subcategory)
+    if categories:
+        queryset = queryset.filter(category__slug__in=categories)
+    if subcategories:
+        queryset = queryset.filter(subcategory__slug__in=subcategories)
+    # Day bounds as aware datetimes keep the range on the created_at index;
+    # a __date lookup would convert every row's timestamp first.
+    if created_after:
+        queryset = queryset.filter(created_at__gte=_day_start(created_after))
+    if created_before:
+        queryset = queryset.filter(created_at__lt=_day_start(created_before + timedelta(days=1)))
+    if has_image is not None:
+        # NULL and '' both mean no main image.
+        with_image = Q(image__gt='')
+        queryset = queryset.filter(with_image) if has_image else queryset.exclude(with_image)
+    return queryset
+
+
+def api_product_filters(params):
+    """Product API filters from query ``params``.
+
+    ``category`` and ``subcategory`` take several slugs, repeated or comma
+    separated. Raises ValidationError for a malformed date or flag.
+    """
+    def slugs(name):
+        return tuple(sorted({slug for value in params.getlist(name) for slug in value.split(',') if slug}))
+
+    def date(name):
+        value = params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'Expected a date as YYYY-MM-DD.'})
+        return parsed
+
+    has_image = params.get('has_image')
+    if has_image not in (None, '', 'true', 'false', '1', '0'):
+        raise ValidationError({'has_image': 'Expected true or false.'})
+    return {
+        'search': params.get('search', ''),
+        'categories': slugs('category'),
+        'subcategories': slugs('subcategory'),
+        'created_after': date('created_after'),
+        'created_before': date('created_before'),
+        'has_image': has_image in ('true', '1') if has_image else None,
+    }
+
+
+def product_page(filters, cursor=''):
+    """Return one page of products after ``cursor`` and the cursor of the next page."""
+    # A correlated count keeps the page query free of GROUP BY, so SQLite can
+    # walk product_created_keyset_idx and stop after one page.
+    image_count = (
+        ProductImage.objects.filter(product=OuterRef('pk')).order_by()
+        .annotate(count=Func(F('pk'), function='COUNT')).values('count')
+    )
+    products = filter_products(
+        Product.objects.filter(category__is_hidden=False)
+        .select_related('category', 'subcategory').annotate(image_count=Subquery(image_count)),
+        **filters,
+    )
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, pk = position
+        products = products.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    size = page_size()
+    page = list(products.order_by('-created_at', '-pk')[:size + 1])
+    next_cursor = encode_cursor(page[size - 1]) if len(page) > size else None
+    return page[:size], next_cursor
+
+
+def _list_version():
+    # Seeded from the clock so an evicted version never reuses old count keys.
+    return cache.get_or_set(PRODUCT_LIST_VERSION_KEY, time.time_ns, None)
+
+
+def bump_product_list_version():
+    try:
+        cache.incr(PRODUCT_LIST_VERSION_KEY)
+    except ValueError:
+        cache.set(PRODUCT_LIST_VERSION_KEY, time.time_ns(), None)
+
+
+def _signature(filters):
+    # Unset filters are left out, so the admin list and the API share the unfiltered keys.
+    items = sorted((name, value) for name, value in filters.items() if value is not None and value != '' and value != ())
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+def product_count(filters):
+    """Count the visible products matching ``filters``, cached until the catalog changes."""
+    key = f'shop:product-count:{_list_version()}:{_signature(filters)}'
+    total = cache.get(key)
+    if total is None:
+        total = filter_products(Product.objects.filter(category__is_hidden=False), **filters).count()
+        cache.set(key, total, getattr(settings, 'PRODUCT_LIST_COUNT_TIMEOUT', 300))
+    return total
+
+
+def _scaled(count, scale):
+    # A value seen in the sample stays visible, however rare.
+    return max(1, round(count * scale)) if count else 0
+
+
+def _grouped(queryset, slug, name, scale=1):
+    rows = queryset.values(slug, name).annotate(count=Count('pk')).order_by('-count', name)
+    return [{'slug': row[slug], 'name': row[name], 'count': _scaled(row['count'], scale)} for row in rows]
+
+
+def _facet_sample():
+    """``(Q, scale)`` for the sampled pk windows, or None when the catalog is small enough to count.
+
+    The catalog size is the cached count of visible products, and each
+    window is a range scan of the primary key, so an estimate never reads
+    more than about ``PRODUCT_FACET_SAMPLE_SIZE`` rows.
+    """
+    total = product_count({})
+    if total <= getattr(settings, 'PRODUCT_FACET_EXACT_LIMIT', 50000):
+        return None
+    bounds = Product.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    width = max(1, getattr(settings, 'PRODUCT_FACET_SAMPLE_SIZE', 10000) // FACET_SAMPLE_WINDOWS)
+    step = (bounds['high'] - bounds['low'] + 1) / FACET_SAMPLE_WINDOWS
+    sample = Q()
+    for index in range(FACET_SAMPLE_WINDOWS):
+        start = bounds['low'] + int(index * step)
+        sample |= Q(pk__gte=start, pk__lt=start + width)
+    sampled = Product.objects.filter(sample, category__is_hidden=False).count()
+    return (sample, total / sampled) if sampled else None
+
+
+def product_facets(filters):
+    """Facet counts for the products matching ``filters``, cached until the catalog changes.
+
+    Each dimension is counted with one grouped query that applies every
+    filter but its own, so a storefront can show what each other choice
+    would return. The total is summed from the category counts rather than
+    counted again. On a large catalog the queries read only a pk sample and
+    the counts are scaled up, with ``estimated`` set.
+    """
+    key = f'shop:product-facets:{_list_version()}:{_signature(filters)}'
+    facets = cache.get(key)
+    if facets is None:
+        visible = Product.objects.filter(category__is_hidden=False)
+        sample = _facet_sample()
+        scale = 1
+        if sample is not None:
+            condition, scale = sample
+            visible = visible.filter(condition)
+
+        def without(name, empty=()):
+            return filter_products(visible, **{**filters, name: empty})
+
+        categories = _grouped(without('categories'), 'category__slug', 'category__name', scale)
+        subcategories = _grouped(
+            without('subcategories').filter(subcategory__isnull=False), 'subcategory__slug', 'subcategory__name',
+            scale,
+        )
+        images = without('has_image', None).aggregate(
+            total=Count('pk'), with_image=Count('pk', filter=Q(image__gt='')),
+        )
+        selected = set(filters.get('categories') or ())
+        facets = {
+            'total': sum(row['count'] for row in categories if not selected or row['slug'] in selected),
+            'estimated': sample is not None,
+            'categories': categories,
+            'subcategories': subcategories,
+            'has_image': {
+                'true': _scaled(images['with_image'], scale),
+                'false': _scaled(images['total'] - images['with_image'], scale),
+            },
+        }
+        cache.set(key, facets, getattr(settings, 'PRODUCT_LIST_COUNT_TIMEOUT', 300))
+    return facets
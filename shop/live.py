@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .stats import TOTAL_MODELS, get_dashboard_stats
+
+
+def _encode_event(event, payload):
+    data = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+def _counters(stats):
+    return {key: stats[key] for key in TOTAL_MODELS}
+
+
+def _diff(previous, current):
+    """Return the counter and recent-product changes between two snapshots."""
+    counters = {
+        key: value
+        for key, value in _counters(current).items()
+        if previous[key] != value
+    }
+    previous_ids = [product['id'] for product in previous['recent_products']]
+    current_ids = [product['id'] for product in current['recent_products']]
+    added = [product for product in current['recent_products'] if product['id'] not in previous_ids]
+    removed = [pk for pk in previous_ids if pk not in current_ids]
+    if not (counters or added or removed):
+        return None
+    return {'counters': counters, 'recent_products': {'added': added, 'removed': removed}}
+
+
+class DashboardBroadcaster:
+    """Fan one computed dashboard update out to every connected event stream.
+
+    Listeners share a single pending future per generation instead of
+    holding their own queue, so an idle connection costs little more than
+    its generator frame. Model signals call ``notify()`` from any thread;
+    bursts are coalesced and the snapshot is recomputed once per burst.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._listeners = 0
+        self._generation = 0
+        self._snapshot = None
+        self._snapshot_event = None
+        self._next = None
+        self._refresh_task = None
+        self._poll_task = None
+
+    def notify(self):
+        """Schedule a refresh; safe to call from synchronous code in any thread."""
+        loop = self._loop
+        if loop is None or not self._listeners or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._schedule_refresh)
+
+    async def stream(self):
+        """Yield SSE frames: the full snapshot first, then deltas as they happen."""
+        await self._attach()
+        self._listeners += 1
+        try:
+            waiter = self._next
+            yield self._snapshot_event
+            keepalive = getattr(settings, 'DASHBOARD_STREAM_KEEPALIVE', 15)
+            while True:
+                try:
+                    generation, event, following = await asyncio.wait_for(asyncio.shield(waiter), keepalive)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+                    continue
+                if generation == self._generation:
+                    frame, waiter = event, following
+                else:
+                    # The client fell behind; resync it from the latest snapshot.
+                    frame, waiter = self._snapshot_event, self._next
+                yield frame
+        finally:
+            self._listeners -= 1
+
+    async def _attach(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._refresh_task = None
+            self._poll_task = None
+            self._next = loop.create_future()
+            self._publish_snapshot(await sync_to_async(get_dashboard_stats)())
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = loop.create_task(self._poll())
+
+    def _publish_snapshot(self, stats):
+        self._snapshot = stats
+        self._snapshot_event = _encode_event('snapshot', {
+            'counters': _counters(stats),
+            'recent_products': stats['recent_products'],
+        })
+
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self._loop.create_task(self._refresh())
+
+    async def _refresh(self):
+        await asyncio.sleep(getattr(settings, 'DASHBOARD_STREAM_COALESCE', 0.25))
+        stats = await sync_to_async(get_dashboard_stats)()
+        delta = _diff(self._snapshot, stats)
+        if delta is None:
+            return
+        self._generation += 1
+        self._publish_snapshot(stats)
+        waiter, self._next = self._next, self._loop.create_future()
+        waiter.set_result((self._generation, _encode_event('delta', delta), self._next))
+
+    async def _poll(self):
+        # Picks up changes made by other worker processes once the shared
+        # stats snapshot expires or is invalidated.
+        interval = getattr(settings, 'DASHBOARD_STREAM_POLL_INTERVAL', 30)
+        while True:
+            await asyncio.sleep(interval)
+            if not self._listeners:
+                return
+            self._schedule_refresh()
+
+
+broadcaster = DashboardBroadcaster()
@@ -0,0 +1,132 @@
+"""Small keep-alive HTTP load generator used by the benchmark scripts.
+
+It only depends on the standard library so it can run on the same box as
+the server under test without pulling in a client framework.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Turn raw per-request latencies (seconds) into a result dict in milliseconds."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / count * 1000, 2) if count else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b';')[0], 16)
+            if chunk_size == 0:
+                await reader.readline()
+                break
+            await reader.readexactly(chunk_size + 2)
+            size += chunk_size
+    else:
+        size = int(headers.get('content-length', 0))
+        await reader.readexactly(size)
+    return status, headers, size
+
+
+async def _client(url, headers, deadline, latencies, counters):
+    parts = urlsplit(url)
+    host = parts.hostname
+    port = parts.port or 80
+    target = parts.path or '/'
+    if parts.query:
+        target = f'{target}?{parts.query}'
+    request = [f'GET {target} HTTP/1.1', f'Host: {parts.netloc}', 'Connection: keep-alive']
+    request.extend(f'{name}: {value}' for name, value in headers.items())
+    payload = ('\r\n'.join(request) + '\r\n\r\n').encode('latin-1')
+
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(payload)
+            await writer.drain()
+            status, response_headers, _ = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                counters['errors'] += 1
+            if response_headers.get('connection', '').lower() == 'close':
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            counters['errors'] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def run_load_async(url, concurrency=50, duration=10.0, headers=None):
+    latencies = []
+    counters = {'errors': 0}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _client(url, headers or {}, deadline, latencies, counters)
+        for _ in range(concurrency)
+    ))
+    return summarize(latencies, counters['errors'], time.perf_counter() - started)
+
+
+def run_load(url, concurrency=50, duration=10.0, headers=None):
+    """Drive ``url`` with ``concurrency`` keep-alive clients for ``duration`` seconds."""
+    return asyncio.run(run_load_async(url, concurrency, duration, headers))
+
+
+def wait_for_server(url, timeout=30.0):
+    """Block until something accepts connections on the host/port of ``url``."""
+    parts = urlsplit(url)
+
+    async def probe():
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f'{url} did not come up within {timeout}s')
+                await asyncio.sleep(0.2)
+            else:
+                writer.close()
+                return
+
+    asyncio.run(probe())
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.backfill import BACKFILLS, run_backfill
+from shop.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = 'Run registered batched backfills, resuming from their last checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Backfills to run')
+        parser.add_argument('--pending', action='store_true', help='Run every backfill a migration left pending')
+        parser.add_argument('--list', action='store_true', help='List registered backfills and their progress')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--pause', type=float, help='Seconds to sleep between batches')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def handle(self, *args, **options):
+        checkpoints = {checkpoint.name: checkpoint for checkpoint in BackfillCheckpoint.objects.all()}
+        if options['list']:
+            for name in sorted(BACKFILLS):
+                checkpoint = checkpoints.get(name)
+                state = f'{checkpoint.status} {checkpoint.processed}/{checkpoint.total or 0}' if checkpoint else 'never run'
+                self.stdout.write(f'{name:<40} {state}')
+            return
+
+        names = list(options['names'])
+        if options['pending']:
+            names += [name for name, checkpoint in checkpoints.items() if checkpoint.status != 'done']
+        if not names:
+            raise CommandError('Name a backfill, or pass --pending or --list.')
+        unknown = sorted(set(names) - set(BACKFILLS))
+        if unknown:
+            raise CommandError(f'Unknown backfill(s): {", ".join(unknown)}')
+
+        for name in dict.fromkeys(names):
+            checkpoint = run_backfill(
+                name, batch_size=options['batch_size'], pause=options['pause'], restart=options['restart'],
+                progress=self.report,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {checkpoint.processed} rows checked, {checkpoint.updated} updated'
+            ))
+
+    def report(self, checkpoint):
+        self.stdout.write(f'{checkpoint.name}: {checkpoint.processed}/{checkpoint.total} (last pk {checkpoint.last_pk})', ending='\r')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from shop.sitemap import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Write the sitemap index and the gzipped shards whose products or categories changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rewrite every shard')
+
+    def handle(self, *args, **options):
+        written = build_sitemaps(force=options['force'])
+        if written:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {len(written)} shard(s): {", ".join(written)}'))
+        else:
+            self.stdout.write('Sitemaps are up to date.')
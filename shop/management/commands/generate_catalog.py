@@ -0,0 +1,176 @@
+import base64
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.text import slugify
+
+from shop.cards import make_card
+from shop.models import Category, SubCategory, Product, ProductImage, Banner, LandingPageContent
+from shop.signals import invalidate_after_bulk_write
+
+# 1x1 transparent PNG shared by every generated row.
+PLACEHOLDER_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII='
+)
+PLACEHOLDERS = {
+    'category': 'categories/placeholder.png',
+    'product': 'products/placeholder.png',
+    'gallery': 'products/gallery/placeholder.png',
+    'banner': 'banners/placeholder.png',
+    'landing': 'landing/placeholder.png',
+}
+
+ADJECTIVES = ['Classic', 'Soft', 'Nomad', 'Steppe', 'Golden', 'Wool', 'Felt', 'Leather', 'Cashmere', 'Silver']
+NOUNS = ['Bag', 'Scarf', 'Boot', 'Hat', 'Blanket', 'Coat', 'Glove', 'Belt', 'Vest', 'Rug']
+
+
+class Command(BaseCommand):
+    help = 'Fill the catalog with synthetic data using batched bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help='Products to create (1k to 1M)')
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--subcategories', type=int, default=5, help='Subcategories per category')
+        parser.add_argument('--images', type=int, default=3, help='Gallery images per product')
+        parser.add_argument('--banners', type=int, default=10)
+        parser.add_argument('--landing-contents', type=int, default=12)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help='Delete the existing catalog first')
+
+    def handle(self, *args, **options):
+        if options['products'] < 0 or options['categories'] < 1:
+            raise CommandError('Need at least one category and a non-negative product count.')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.write_placeholders()
+
+        if options['clear']:
+            self.clear()
+
+        categories = self.create_categories(options['categories'])
+        subcategories = self.create_subcategories(categories, options['subcategories'])
+        self.create_products(categories, subcategories, options['products'], options['images'])
+        self.create_banners(options['banners'])
+        self.create_landing_contents(options['landing_contents'])
+        # Bulk inserts and raw deletes send no signals.
+        invalidate_after_bulk_write(Category, SubCategory, Product, ProductImage, Banner, LandingPageContent)
+        self.stdout.write(self.style.SUCCESS('Catalog generated'))
+
+    def write_placeholders(self):
+        for relative_path in PLACEHOLDERS.values():
+            path = settings.MEDIA_ROOT / relative_path
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(PLACEHOLDER_PNG)
+
+    def clear(self):
+        # Set-based deletes; the ORM collector would load every row to cascade.
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (ProductImage, Product, SubCategory, Category, Banner, LandingPageContent):
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+        self.stdout.write('Cleared existing catalog')
+
+    def next_suffix(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def name(self):
+        return f'{self.random.choice(ADJECTIVES)} {self.random.choice(NOUNS)}'
+
+    def bulk_create(self, model, objects):
+        created = []
+        for start in range(0, len(objects), self.batch_size):
+            with transaction.atomic():
+                created.extend(model.objects.bulk_create(objects[start:start + self.batch_size]))
+        return created
+
+    def create_categories(self, count):
+        suffix = self.next_suffix(Category)
+        categories = self.bulk_create(Category, [
+            Category(
+                name=f'Category {suffix + index}',
+                slug=f'category-{suffix + index}',
+                sort_order=index,
+                image=PLACEHOLDERS['category'],
+            )
+            for index in range(count)
+        ])
+        self.stdout.write(f'Created {len(categories)} categories')
+        return categories
+
+    def create_subcategories(self, categories, per_category):
+        suffix = self.next_suffix(SubCategory)
+        subcategories = self.bulk_create(SubCategory, [
+            SubCategory(
+                category=category,
+                name=f'{category.name} / {index}',
+                slug=f'subcategory-{suffix + offset * per_category + index}',
+                sort_order=index,
+            )
+            for offset, category in enumerate(categories)
+            for index in range(per_category)
+        ])
+        self.stdout.write(f'Created {len(subcategories)} subcategories')
+        return subcategories
+
+    def create_products(self, categories, subcategories, count, images_per_product):
+        suffix = self.next_suffix(Product)
+        category_names = {category.pk: category.name for category in categories}
+        gallery = [PLACEHOLDERS['gallery']] * images_per_product
+        created = 0
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for index in range(start, min(start + self.batch_size, count)):
+                number = suffix + index
+                name = f'{self.name()} {number}'
+                subcategory = self.random.choice(subcategories) if subcategories and index % 4 else None
+                category_id = subcategory.category_id if subcategory else self.random.choice(categories).pk
+                slug = slugify(name)
+                batch.append(Product(
+                    category_id=category_id,
+                    subcategory=subcategory,
+                    name=name,
+                    slug=slug,
+                    image=PLACEHOLDERS['product'],
+                    description=f'{name} - synthetic product for load testing.',
+                    card=make_card(
+                        name, slug, category_names[category_id], subcategory.name if subcategory else None,
+                        PLACEHOLDERS['product'], gallery,
+                    ),
+                ))
+            with transaction.atomic():
+                products = Product.objects.bulk_create(batch)
+                ProductImage.objects.bulk_create(
+                    [
+                        ProductImage(product=product, image=PLACEHOLDERS['gallery'], sort_order=order)
+                        for product in products
+                        for order in range(images_per_product)
+                    ],
+                    batch_size=self.batch_size,
+                )
+            created += len(products)
+            self.stdout.write(f'Created {created}/{count} products', ending='\r')
+        self.stdout.write(f'Created {created} products with {images_per_product} images each')
+
+    def create_banners(self, count):
+        self.bulk_create(Banner, [Banner(image=PLACEHOLDERS['banner'], order=index) for index in range(count)])
+        self.stdout.write(f'Created {count} banners')
+
+    def create_landing_contents(self, count):
+        section_types = [value for value, _ in LandingPageContent.SECTION_TYPES]
+        self.bulk_create(LandingPageContent, [
+            LandingPageContent(
+                title=f'{self.name()} section',
+                section_type=section_types[index % len(section_types)],
+                subtitle='Synthetic landing section',
+                content='Lorem ipsum dolor sit amet. ' * 5,
+                image=PLACEHOLDERS['landing'],
+                sort_order=index,
+                is_active=index % 5 != 4,
+            )
+            for index in range(count)
+        ])
+        self.stdout.write(f'Created {count} landing contents')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from shop.deletion import run_job, unfinished_jobs
+
+
+class Command(BaseCommand):
+    help = 'Finish category deletions that stopped part way, e.g. after a restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int,
+            help='Only resume jobs idle for this many seconds (default CATEGORY_DELETION_STALE_AFTER)',
+        )
+
+    def handle(self, *args, **options):
+        jobs = list(unfinished_jobs(options['stale_after']))
+        if not jobs:
+            self.stdout.write('No unfinished category deletions.')
+            return
+        for job in jobs:
+            job = run_job(job.pk)
+            message = (
+                f'{job.category_name}: {job.status}, {job.products_deleted}/{job.products_total} products, '
+                f'{job.files_deleted} files'
+            )
+            if job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(message))
+            else:
+                self.stderr.write(f'{message} ({job.error})')
@@ -0,0 +1,126 @@
+import json
+import re
+import subprocess
+from datetime import datetime, timezone
+from http.cookiejar import CookieJar
+from pathlib import Path
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.loadtest import run_load
+from shop.models import Category, SubCategory, Product, ProductImage, Banner, LandingPageContent
+
+API_PATHS = [
+    '/api/landing/',
+    '/api/products/',
+    '/api/categories/',
+    '/api/banners/',
+    '/api/async/products/',
+]
+ADMIN_PATHS = [
+    '/',
+    '/products/',
+    '/categories/',
+    '/banners/',
+    '/landing-contents/',
+]
+
+
+def login_cookie(base_url, username, password):
+    """Log in through the admin login form and return the Cookie header value."""
+    jar = CookieJar()
+    opener = build_opener(HTTPCookieProcessor(jar))
+    page = opener.open(f'{base_url}/login/').read().decode()
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page)
+    if token is None:
+        raise CommandError('Could not find the CSRF token on the login page.')
+    data = urlencode({'username': username, 'password': password, 'csrfmiddlewaretoken': token.group(1)})
+    opener.open(Request(f'{base_url}/login/', data=data.encode(), headers={'Referer': f'{base_url}/login/'}))
+    cookies = {cookie.name: cookie.value for cookie in jar}
+    if 'sessionid' not in cookies:
+        raise CommandError('Login failed; check --username/--password.')
+    return '; '.join(f'{name}={value}' for name, value in cookies.items())
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Drive the API and admin views with concurrent clients and record a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario')
+        parser.add_argument('--username', help='Admin user for the HTML views (skipped when omitted)')
+        parser.add_argument('--password')
+        parser.add_argument('--output', default='benchmarks/baseline.json', help='Where to write the results')
+        parser.add_argument('--compare', help='Previous results to compare against')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.10,
+            help='Allowed relative throughput drop / p99 increase before a scenario counts as a regression',
+        )
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        scenarios = [(path, {}) for path in API_PATHS]
+        if options['username']:
+            cookie = login_cookie(base_url, options['username'], options['password'] or '')
+            scenarios += [(path, {'Cookie': cookie}) for path in ADMIN_PATHS]
+
+        results = {}
+        for path, headers in scenarios:
+            url = f'{base_url}{path}'
+            run_load(url, concurrency=min(options['concurrency'], 10), duration=1, headers=headers)
+            result = run_load(url, concurrency=options['concurrency'], duration=options['duration'], headers=headers)
+            results[path] = result
+            self.stdout.write(
+                f"{path:<22} {result['throughput_rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.2f}  "
+                f"p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}"
+            )
+
+        report = {
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'base_url': base_url,
+            'concurrency': options['concurrency'],
+            'duration_s': options['duration'],
+            'catalog': {
+                model.__name__: model.objects.count()
+                for model in (Category, SubCategory, Product, ProductImage, Banner, LandingPageContent)
+            },
+            'results': results,
+        }
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(f'Wrote {output}')
+
+        if options['compare']:
+            regressions = self.compare(json.loads(Path(options['compare']).read_text()), report, options['tolerance'])
+            if regressions:
+                raise CommandError(f'{regressions} scenario(s) regressed by more than {options["tolerance"]:.0%}.')
+
+    def compare(self, baseline, report, tolerance):
+        regressions = 0
+        for path, result in report['results'].items():
+            previous = baseline['results'].get(path)
+            if previous is None:
+                continue
+            throughput = result['throughput_rps'] / previous['throughput_rps'] - 1 if previous['throughput_rps'] else 0
+            p99 = result['p99_ms'] / previous['p99_ms'] - 1 if previous['p99_ms'] else 0
+            regressed = throughput < -tolerance or p99 > tolerance
+            regressions += regressed
+            style = self.style.ERROR if regressed else self.style.SUCCESS
+            self.stdout.write(style(f'{path:<22} throughput {throughput:+.1%}  p99 {p99:+.1%}'))
+        return regressions
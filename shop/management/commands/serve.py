@@ -0,0 +1,113 @@
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from gunicorn.app.base import BaseApplication
+
+from shop import metrics
+from shop.warmup import warm_up_process, warm_up_worker
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def close_connections_before_fork(server, worker):
+    # Connections opened while preloading must not be shared with children.
+    connections.close_all()
+
+
+def flush_metrics_on_exit(server, worker):
+    # Runs in the worker, so its last requests reach the snapshot the master archives.
+    metrics.flush(force=True)
+
+
+def archive_worker_metrics(server, worker):
+    metrics.archive_workers([worker.pid])
+
+
+def warm_up_worker_after_init(worker):
+    timings = warm_up_worker()
+    worker.log.info('Worker %s ready: %s', worker.pid, timings)
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn application that serves an already-loaded Django handler."""
+
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+class Command(BaseCommand):
+    help = 'Serve the project with pre-forked gunicorn workers sized to the CPU count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='127.0.0.1:8000', help='Address to listen on (default: 127.0.0.1:8000)')
+        parser.add_argument(
+            '--interface', choices=['wsgi', 'asgi'], default='asgi',
+            help='Serve the WSGI handler with threaded workers or the ASGI handler with uvicorn workers',
+        )
+        parser.add_argument('--workers', type=int, default=cpu_count(), help='Worker processes (default: CPU count)')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per WSGI worker')
+        parser.add_argument('--max-requests', type=int, default=2000, help='Recycle a worker after this many requests')
+        parser.add_argument('--max-requests-jitter', type=int, default=200, help='Random spread added to --max-requests')
+        parser.add_argument('--timeout', type=int, default=30)
+        parser.add_argument('--graceful-timeout', type=int, default=30)
+        parser.add_argument('--pid', help='Write the master pid here (for HUP/USR2 reloads)')
+        parser.add_argument('--no-collectstatic', action='store_true', help='Skip collectstatic before starting')
+
+    def handle(self, *args, **options):
+        if not options['no_collectstatic']:
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+        # Load the handler (and with it settings, apps and URLconf) in the
+        # master so every forked worker shares those pages copy-on-write.
+        if options['interface'] == 'asgi':
+            from django.core.asgi import get_asgi_application
+            application = get_asgi_application()
+            worker_class = 'uvicorn_worker.UvicornWorker'
+        else:
+            from django.core.wsgi import get_wsgi_application
+            application = get_wsgi_application()
+            worker_class = 'gthread'
+        self.stdout.write(f'Warm-up: {warm_up_process()}')
+        metrics.archive_workers()
+
+        config = {
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'worker_class': worker_class,
+            'threads': options['threads'],
+            'preload_app': True,
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'pre_fork': close_connections_before_fork,
+            'post_worker_init': warm_up_worker_after_init,
+            'worker_exit': flush_metrics_on_exit,
+            'child_exit': archive_worker_metrics,
+            'accesslog': None,
+            'errorlog': '-',
+        }
+        if options['pid']:
+            config['pidfile'] = options['pid']
+
+        self.stdout.write(
+            f"Serving {options['interface'].upper()} on {options['bind']} "
+            f"with {options['workers']} {worker_class} workers"
+        )
+        ProductionServer(application, config).run()
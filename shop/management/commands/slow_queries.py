@@ -0,0 +1,78 @@
+import json
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.slowlog import read_records
+
+WINDOW_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_window(value):
+    match = re.fullmatch(r'(\d+)([smhd])', value)
+    if match is None:
+        raise CommandError(f'Invalid window {value!r}; use e.g. 30m, 6h or 7d.')
+    return int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+
+class Command(BaseCommand):
+    help = 'Summarize the worst slow-query fingerprints over a time window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default='24h', help='Time window, e.g. 30m, 6h, 7d (default: 24h)')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--order-by', choices=['total', 'max', 'count'], default='total')
+        parser.add_argument('--file', default=getattr(settings, 'SLOW_QUERY_LOG_FILE', None))
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            raise CommandError('No slow-query log configured; set SLOW_QUERY_LOG_FILE or pass --file.')
+
+        since = time.time() - parse_window(options['since'])
+        summary = {}
+        for record in read_records(options['file'], since=since):
+            # Scale sampled records back up and add occurrences the rate limit dropped.
+            occurrences = (1 + record.get('suppressed', 0)) / (record.get('sample_rate') or 1.0)
+            entry = summary.setdefault(record['fingerprint'], {
+                'fingerprint': record['fingerprint'],
+                'sql': record['sql'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'views': set(),
+                'plan': None,
+            })
+            entry['count'] += occurrences
+            entry['total_ms'] += record['duration_ms'] * occurrences
+            if record['duration_ms'] >= entry['max_ms']:
+                entry['max_ms'] = record['duration_ms']
+                entry['plan'] = record.get('plan')
+            if record.get('view'):
+                entry['views'].add(record['view'])
+
+        order_key = {'total': 'total_ms', 'max': 'max_ms', 'count': 'count'}[options['order_by']]
+        worst = sorted(summary.values(), key=lambda entry: entry[order_key], reverse=True)[:options['limit']]
+        for entry in worst:
+            entry['views'] = sorted(entry['views'])
+            entry['count'] = round(entry['count'])
+            entry['total_ms'] = round(entry['total_ms'], 1)
+            entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 1) if entry['count'] else 0.0
+
+        if options['json']:
+            self.stdout.write(json.dumps(worst, indent=2))
+            return
+        if not worst:
+            self.stdout.write(f"No slow queries in the last {options['since']}.")
+            return
+        for rank, entry in enumerate(worst, start=1):
+            self.stdout.write(self.style.WARNING(
+                f"{rank}. {entry['fingerprint']}  count {entry['count']}  total {entry['total_ms']} ms  "
+                f"avg {entry['avg_ms']} ms  max {entry['max_ms']} ms"
+            ))
+            self.stdout.write(f"   views: {', '.join(entry['views']) or '-'}")
+            self.stdout.write(f"   sql:   {entry['sql']}")
+            for line in entry['plan'] or []:
+                self.stdout.write(f'   plan:  {line}')
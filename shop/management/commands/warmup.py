@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from shop.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Import views, compile templates, resolve URLs, connect to the database and prime caches'
+
+    def handle(self, *args, **options):
+        for step, result in warm_up().items():
+            self.stdout.write(f"{step:<10} {result['count']:>4}  {result['ms']:>8.2f} ms")
+        self.stdout.write(self.style.SUCCESS('Warm-up complete'))
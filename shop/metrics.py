@@ -0,0 +1,312 @@
+"""Per-request timing and process-wide latency histograms.
+
+A ``RequestMetrics`` object lives in a context variable for the duration of
+a request, so the database wrapper, template backend and viewset mixin can
+add to it from whichever thread the work runs on. At the end of the
+request the totals are observed into fixed-bucket histograms, which are
+rendered in the Prometheus text format by the ``/metrics`` view.
+"""
+import contextvars
+import os
+import pickle
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+_current = contextvars.ContextVar('shop_request_metrics', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'view', 'queries', 'db_time', 'spans', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.spans = {}
+        # Set to a list by QueryBudgetMiddleware to keep the executed SQL.
+        self.statements = None
+
+    def add_span(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def server_timing(self, total):
+        entries = [f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"']
+        entries.extend(f'{name};dur={duration * 1000:.2f}' for name, duration in self.spans.items())
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def suspended():
+    """Run a block without attributing its queries to the current request."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting queries and time for the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+        if metrics.statements is not None:
+            metrics.statements.append(sql)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(name):
+    """Time a block as span ``name``, excluding database time spent inside it."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    db_before = metrics.db_time
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.add_span(name, elapsed - (metrics.db_time - db_before))
+
+
+class SerializationTimingMixin:
+    """Record the time DRF viewsets spend turning objects into primitives."""
+
+    def list(self, request, *args, **kwargs):
+        with timed('serialize'):
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with timed('serialize'):
+            return super().retrieve(request, *args, **kwargs)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def state(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Registry:
+    """Histograms keyed by metric name and view name."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, help_text, buckets):
+        self.metrics[name] = (help_text, buckets)
+
+    def observe(self, name, view, value):
+        key = (name, view)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.metrics[name][1]))
+        histogram.observe(value)
+
+    def snapshot(self):
+        return {key: histogram.state() for key, histogram in list(self._histograms.items())}
+
+
+registry = Registry()
+registry.register('shop_request_duration_seconds', 'Time spent handling the request', LATENCY_BUCKETS)
+registry.register('shop_db_duration_seconds', 'Time spent executing database queries', LATENCY_BUCKETS)
+registry.register('shop_db_queries', 'Database queries executed per request', QUERY_COUNT_BUCKETS)
+registry.register('shop_serialize_duration_seconds', 'Time DRF spent serializing, excluding queries', LATENCY_BUCKETS)
+registry.register('shop_render_duration_seconds', 'Time spent rendering templates, excluding queries', LATENCY_BUCKETS)
+registry.register('shop_response_size_bytes', 'Response body size', SIZE_BUCKETS)
+
+
+def observe_request(view, metrics, total, size):
+    registry.observe('shop_request_duration_seconds', view, total)
+    registry.observe('shop_db_duration_seconds', view, metrics.db_time)
+    registry.observe('shop_db_queries', view, metrics.queries)
+    if 'serialize' in metrics.spans:
+        registry.observe('shop_serialize_duration_seconds', view, metrics.spans['serialize'])
+    if 'render' in metrics.spans:
+        registry.observe('shop_render_duration_seconds', view, metrics.spans['render'])
+    if size is not None:
+        registry.observe('shop_response_size_bytes', view, size)
+
+
+# Pre-forked workers each keep their own registry. When METRICS_DIR is set,
+# every worker periodically dumps its snapshot to <pid>.metrics there and
+# /metrics merges them. When a worker exits, the master folds its file into
+# ARCHIVE_NAME, so recycled workers neither pile up files nor take their
+# counts with them, and a reused pid starts from an empty file.
+ARCHIVE_NAME = 'archived.metrics'
+_last_flush = 0.0
+
+
+def _metrics_dir():
+    directory = getattr(settings, 'METRICS_DIR', None)
+    return Path(directory) if directory else None
+
+
+def _write_snapshot(path, snapshot):
+    handle, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(handle, 'wb') as temp_file:
+        pickle.dump(snapshot, temp_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def _read_snapshot(path):
+    try:
+        with path.open('rb') as snapshot_file:
+            return pickle.load(snapshot_file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _merge(merged, snapshot):
+    for key, (counts, total, count) in snapshot.items():
+        if key in merged:
+            merged_counts, merged_total, merged_count = merged[key]
+            counts = [a + b for a, b in zip(merged_counts, counts)]
+            total += merged_total
+            count += merged_count
+        merged[key] = (counts, total, count)
+    return merged
+
+
+def flush(force=False):
+    global _last_flush
+    directory = _metrics_dir()
+    now = time.monotonic()
+    if directory is None or (not force and now - _last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)):
+        return
+    _last_flush = now
+    directory.mkdir(parents=True, exist_ok=True)
+    _write_snapshot(directory / f'{os.getpid()}.metrics', registry.snapshot())
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def archive_workers(pids=None):
+    """Fold the snapshots of exited workers into the archive and delete their files.
+
+    With ``pids`` None, every file whose process is gone is folded, which
+    picks up what a previous master left behind. Only a gunicorn master
+    calls this, one exit at a time.
+    """
+    directory = _metrics_dir()
+    if directory is None or not directory.exists():
+        return
+    if pids is None:
+        paths = [
+            path for path in directory.glob('*.metrics')
+            if path.stem.isdigit() and not _is_running(int(path.stem))
+        ]
+    else:
+        paths = [directory / f'{pid}.metrics' for pid in pids]
+    paths = [path for path in paths if path.exists()]
+    if not paths:
+        return
+    archive = directory / ARCHIVE_NAME
+    merged = _read_snapshot(archive) or {}
+    for path in paths:
+        _merge(merged, _read_snapshot(path) or {})
+    _write_snapshot(archive, merged)
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _merged_snapshot():
+    directory = _metrics_dir()
+    if directory is None:
+        return registry.snapshot()
+    flush(force=True)
+    merged = {}
+    # Includes ARCHIVE_NAME, the totals of workers that have exited.
+    for path in directory.glob('*.metrics'):
+        snapshot = _read_snapshot(path)
+        if snapshot is not None:
+            _merge(merged, snapshot)
+    return merged
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    snapshot = _merged_snapshot()
+    lines = []
+    for name, (help_text, buckets) in registry.metrics.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, view), (counts, total, count) in sorted(snapshot.items()):
+            if metric != name:
+                continue
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{view="{label}",le="{_format_value(bound)}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{view="{label}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{view="{label}"}} {_format_value(total)}')
+            lines.append(f'{name}_count{{view="{label}"}} {count}')
+    return '\n'.join(lines) + '\n'
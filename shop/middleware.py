@@ -0,0 +1,127 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+from .queries import describe_repeated
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMetricsMiddleware:
+    """Add a Server-Timing header and feed the per-view latency histograms."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request_metrics, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self._finish(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self._finish(request, response, request_metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request_metrics = metrics.current()
+        if request_metrics is not None and request.resolver_match:
+            request_metrics.view = request.resolver_match.view_name
+
+    def _finish(self, request, response, request_metrics):
+        total = time.perf_counter() - request_metrics.started
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = request_metrics.server_timing(total)
+        metrics.observe_request(view, request_metrics, total, size)
+        metrics.flush()
+        return response
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryBudgetMiddleware:
+    """Log or raise when a request runs more queries than ``QUERY_BUDGET``.
+
+    ``QUERY_BUDGET_OVERRIDES`` maps view names to their own budgets and
+    ``QUERY_BUDGET_ACTION`` is ``'log'`` or ``'raise'``. The middleware
+    removes itself when no budget is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.budget = getattr(settings, 'QUERY_BUDGET', None)
+        if self.budget is None:
+            raise MiddlewareNotUsed
+        self.overrides = getattr(settings, 'QUERY_BUDGET_OVERRIDES', {})
+        self.action = getattr(settings, 'QUERY_BUDGET_ACTION', 'log')
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request_metrics, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                metrics.finish_request(token)
+        self._check(request, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                metrics.finish_request(token)
+        self._check(request, request_metrics)
+        return response
+
+    def _start(self):
+        request_metrics, token = metrics.current(), None
+        if request_metrics is None:
+            request_metrics, token = metrics.start_request()
+        request_metrics.statements = []
+        return request_metrics, token
+
+    def _check(self, request, request_metrics):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        budget = self.overrides.get(view, self.budget)
+        if request_metrics.queries <= budget:
+            return
+        message = (
+            f'{view} ran {request_metrics.queries} queries (budget {budget}):\n'
+            f'{describe_repeated(request_metrics.statements)}'
+        )
+        if self.action == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
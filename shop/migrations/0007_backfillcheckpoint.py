@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_category_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Нэр')),
+                ('status', models.CharField(choices=[('pending', 'Хүлээгдэж буй'), ('running', 'Ажиллаж буй'), ('done', 'Дууссан')], default='pending', max_length=20, verbose_name='Төлөв')),
+                ('last_pk', models.BigIntegerField(default=0, verbose_name='Сүүлийн PK')),
+                ('processed', models.PositiveBigIntegerField(default=0, verbose_name='Шалгасан мөр')),
+                ('updated', models.PositiveBigIntegerField(default=0, verbose_name='Шинэчилсэн мөр')),
+                ('total', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Нийт мөр')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Эхэлсэн')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дууссан')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Засварласан огноо')),
+            ],
+            options={
+                'verbose_name': 'Backfill явц',
+                'verbose_name_plural': 'Backfill явцууд',
+                'ordering': ['name'],
+            },
+        ),
+    ]
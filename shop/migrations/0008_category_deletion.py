@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0007_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.BigIntegerField(db_index=True, verbose_name='Ангиллын ID')),
+                ('category_name', models.CharField(max_length=200, verbose_name='Ангиллын нэр')),
+                ('status', models.CharField(choices=[('pending', 'Хүлээгдэж буй'), ('running', 'Устгаж буй'), ('done', 'Дууссан'), ('failed', 'Алдаа гарсан')], default='pending', max_length=20, verbose_name='Төлөв')),
+                ('products_total', models.PositiveIntegerField(default=0, verbose_name='Нийт бүтээгдэхүүн')),
+                ('products_deleted', models.PositiveIntegerField(default=0, verbose_name='Устгасан бүтээгдэхүүн')),
+                ('images_deleted', models.PositiveIntegerField(default=0, verbose_name='Устгасан зураг')),
+                ('subcategories_deleted', models.PositiveIntegerField(default=0, verbose_name='Устгасан дэд ангилал')),
+                ('files_deleted', models.PositiveIntegerField(default=0, verbose_name='Устгасан файл')),
+                ('error', models.TextField(blank=True, verbose_name='Алдаа')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Үүсгэсэн огноо')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Засварласан огноо')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дууссан')),
+            ],
+            options={
+                'verbose_name': 'Ангилал устгах ажил',
+                'verbose_name_plural': 'Ангилал устгах ажлууд',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='is_hidden',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Нуугдсан'),
+        ),
+    ]
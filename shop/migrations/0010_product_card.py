@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0009_product_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='card',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Карт'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from shop.backfill import RunBackfill
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('shop', '0010_product_card'),
+    ]
+
+    operations = [
+        RunBackfill('product-cards'),
+    ]
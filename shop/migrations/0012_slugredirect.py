@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0011_backfill_product_cards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugRedirect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Бүтээгдэхүүн'), ('category', 'Ангилал')], max_length=20, verbose_name='Төрөл')),
+                ('old_slug', models.SlugField(max_length=300, verbose_name='Хуучин slug')),
+                ('object_id', models.BigIntegerField(db_index=True, verbose_name='Объектын ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Үүсгэсэн огноо')),
+            ],
+            options={
+                'verbose_name': 'Slug шилжүүлэг',
+                'verbose_name_plural': 'Slug шилжүүлгүүд',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'old_slug'), name='slug_redirect_kind_old_slug_uniq')],
+            },
+        ),
+    ]
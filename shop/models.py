@@ -9,6 +9,9 @@ class Category(models.Model):
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     sort_order = models.IntegerField(default=0, verbose_name="Эрэмбэ")
     image = models.ImageField(upload_to='categories/', blank=True, null=True, verbose_name="Зураг")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Засварласан огноо")
+    # Set while a CategoryDeletionJob removes the category in the background.
+    is_hidden = models.BooleanField(default=False, db_index=True, verbose_name="Нуугдсан")
 
     class Meta:
         verbose_name = "Ангилал"
@@ -42,6 +45,7 @@ class SubCategory(models.Model):
     name = models.CharField(max_length=200, verbose_name="Нэр")
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     sort_order = models.IntegerField(default=0, verbose_name="Эрэмбэ")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Засварласан огноо")
 
     class Meta:
         verbose_name = "Дэд ангилал"
@@ -81,16 +85,23 @@ class Product(models.Model):
         blank=True,
     )
     slug = models.SlugField(max_length=300, unique=True, blank=True)
+    # Key of the product in the ERP/PIM, used by the bulk upsert API.
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, verbose_name="Гадаад ID")
     name = models.CharField(max_length=300, verbose_name="Нэр")
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="Үндсэн зураг")
     description = models.TextField(blank=True, verbose_name="Тайлбар")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Үүсгэсэн огноо")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Засварласан огноо")
+    # List card built by shop.cards from the product, its category and gallery.
+    card = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Карт")
 
     class Meta:
         verbose_name = "Бүтээгдэхүүн"
         verbose_name_plural = "Бүтээгдэхүүнүүд"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='product_created_keyset_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if self.subcategory and self.category_id != self.subcategory.category_id:
@@ -178,3 +189,92 @@ class LandingPageContent(models.Model):
 
     def __str__(self):
         return f"{self.get_section_type_display()} - {self.title}"
+
+
+class BackfillCheckpoint(models.Model):
+    """Progress of a batched data backfill, so an interrupted run can resume."""
+    STATUS_CHOICES = [
+        ('pending', 'Хүлээгдэж буй'),
+        ('running', 'Ажиллаж буй'),
+        ('done', 'Дууссан'),
+    ]
+
+    name = models.CharField(max_length=200, unique=True, verbose_name="Нэр")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Төлөв")
+    last_pk = models.BigIntegerField(default=0, verbose_name="Сүүлийн PK")
+    processed = models.PositiveBigIntegerField(default=0, verbose_name="Шалгасан мөр")
+    updated = models.PositiveBigIntegerField(default=0, verbose_name="Шинэчилсэн мөр")
+    total = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Нийт мөр")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Эхэлсэн")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Дууссан")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Засварласан огноо")
+
+    class Meta:
+        verbose_name = "Backfill явц"
+        verbose_name_plural = "Backfill явцууд"
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class CategoryDeletionJob(models.Model):
+    """Background removal of a hidden category and everything under it."""
+    STATUS_CHOICES = [
+        ('pending', 'Хүлээгдэж буй'),
+        ('running', 'Устгаж буй'),
+        ('done', 'Дууссан'),
+        ('failed', 'Алдаа гарсан'),
+    ]
+
+    category_id = models.BigIntegerField(db_index=True, verbose_name="Ангиллын ID")
+    category_name = models.CharField(max_length=200, verbose_name="Ангиллын нэр")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Төлөв")
+    products_total = models.PositiveIntegerField(default=0, verbose_name="Нийт бүтээгдэхүүн")
+    products_deleted = models.PositiveIntegerField(default=0, verbose_name="Устгасан бүтээгдэхүүн")
+    images_deleted = models.PositiveIntegerField(default=0, verbose_name="Устгасан зураг")
+    subcategories_deleted = models.PositiveIntegerField(default=0, verbose_name="Устгасан дэд ангилал")
+    files_deleted = models.PositiveIntegerField(default=0, verbose_name="Устгасан файл")
+    error = models.TextField(blank=True, verbose_name="Алдаа")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Үүсгэсэн огноо")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Засварласан огноо")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Дууссан")
+
+    class Meta:
+        verbose_name = "Ангилал устгах ажил"
+        verbose_name_plural = "Ангилал устгах ажлууд"
+        ordering = ['-created_at']
+
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.products_total:
+            return 0
+        return min(99, self.products_deleted * 100 // self.products_total)
+
+    def __str__(self):
+        return f"{self.category_name} ({self.get_status_display()})"
+
+
+class SlugRedirect(models.Model):
+    """Former slug of a product or category, kept so old storefront links still resolve."""
+    KIND_CHOICES = [
+        ('product', 'Бүтээгдэхүүн'),
+        ('category', 'Ангилал'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Төрөл")
+    old_slug = models.SlugField(max_length=300, verbose_name="Хуучин slug")
+    object_id = models.BigIntegerField(db_index=True, verbose_name="Объектын ID")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Үүсгэсэн огноо")
+
+    class Meta:
+        verbose_name = "Slug шилжүүлэг"
+        verbose_name_plural = "Slug шилжүүлгүүд"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'old_slug'], name='slug_redirect_kind_old_slug_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.old_slug} -> #{self.object_id}"
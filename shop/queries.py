@@ -0,0 +1,27 @@
+import re
+from collections import Counter
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN-lists so repeated query shapes compare equal."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def repeated_statements(statements, minimum=2):
+    """Return ``(normalized_sql, count)`` pairs seen at least ``minimum`` times."""
+    counts = Counter(normalize_sql(sql) for sql in statements)
+    return [(sql, count) for sql, count in counts.most_common() if count >= minimum]
+
+
+def describe_repeated(statements, limit=5):
+    lines = [f'{count}x {sql}' for sql, count in repeated_statements(statements)[:limit]]
+    return '\n'.join(lines) or 'no repeated statements'
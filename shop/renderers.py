@@ -0,0 +1,49 @@
+"""Binary renderers for the read API, chosen with the ``Accept`` header.
+
+``Accept: application/msgpack`` or ``Accept: application/cbor`` (or
+``?format=msgpack`` / ``?format=cbor``) returns the same structure the
+JSON renderer would, encoded as MessagePack or CBOR. Serializers already
+turn dates and decimals into strings. Any other value neither format can
+encode natively, such as a lazy translation, is converted by DRF's JSON
+encoder. A client decoding either format therefore gets the same data as
+from JSON.
+"""
+import cbor2
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+_json_default = JSONEncoder().default
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_json_default, use_bin_type=True, datetime=False)
+
+
+class CBORRenderer(BaseRenderer):
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return cbor2.dumps(data, default=_cbor_default)
+
+
+def _cbor_default(encoder, value):
+    encoder.encode(_json_default(value))
+
+
+# JSON (and the browsable API) stay first so clients without an Accept header get JSON.
+API_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer, CBORRenderer]
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Category, Product, Banner, SubCategory, ProductImage
+from .models import Category, Product, Banner, SubCategory, ProductImage, LandingPageContent
 
 
 class SubCategorySerializer(serializers.ModelSerializer):
@@ -44,7 +44,39 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
 
+class ProductUpsertSerializer(serializers.Serializer):
+    """One ERP record for the bulk product upsert (``shop.upsert``)."""
+
+    external_id = serializers.CharField(max_length=100, required=False)
+    slug = serializers.SlugField(max_length=300, required=False)
+    name = serializers.CharField(max_length=300, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    category = serializers.SlugField(max_length=200, required=False, help_text='Category slug')
+    subcategory = serializers.SlugField(max_length=200, required=False, help_text='Subcategory slug')
+
+    def validate(self, attrs):
+        if not attrs.get('external_id') and not attrs.get('slug'):
+            raise serializers.ValidationError('Give an external_id or a slug.')
+        return attrs
+
+
 class BannerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Banner
         fields = ['id', 'image', 'order']
+
+
+class LandingPageContentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LandingPageContent
+        fields = [
+            'id',
+            'title',
+            'section_type',
+            'subtitle',
+            'content',
+            'image',
+            'button_text',
+            'button_link',
+            'sort_order',
+        ]
@@ -0,0 +1,223 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+
+from .auth import invalidate_all_permissions, invalidate_users
+from .cards import rebuild_cards
+from .details import bump_detail_version, invalidate_detail, record_slug_changes
+from .fragments import bump_row_version
+from .landing import invalidate_landing_payload
+from .listing import bump_product_list_version
+from .live import broadcaster
+from .models import Category, SubCategory, Product, ProductImage, Banner, LandingPageContent, SlugRedirect
+from .stats import invalidate_dashboard_stats
+
+DASHBOARD_MODELS = (Category, SubCategory, Product, Banner, LandingPageContent)
+PRODUCT_LIST_MODELS = (Category, SubCategory, Product)
+LANDING_MODELS = (Category, SubCategory, Banner, LandingPageContent)
+# Row kinds whose cached HTML shows data from another model. A row's own
+# changes are picked up through its updated_at.
+ROW_DEPENDENCIES = {
+    Category: ('product',),
+    SubCategory: ('product', 'category'),
+    ProductImage: ('product',),
+}
+DETAIL_MODELS = {Product: 'product', Category: 'category'}
+# Detail kinds showing another model's data: a product shows its category
+# and subcategory names, a category lists its subcategories.
+DETAIL_DEPENDENCIES = {
+    Category: ('product',),
+    SubCategory: ('product', 'category'),
+}
+# Detail kinds a bulk write of many rows of a model can touch.
+BULK_DETAIL_KINDS = {
+    Product: ('product',),
+    ProductImage: ('product',),
+    Category: ('category', 'product'),
+    SubCategory: ('category', 'product'),
+}
+
+
+def _refresh_dashboard():
+    invalidate_dashboard_stats()
+    broadcaster.notify()
+
+
+def invalidate_dashboard_on_change(sender, **kwargs):
+    """Drop the cached dashboard snapshot whenever a counted model changes.
+
+    The snapshot is dropped immediately and again once the surrounding
+    transaction commits, so a concurrent reader cannot re-cache stale totals.
+    """
+    invalidate_dashboard_stats()
+    transaction.on_commit(_refresh_dashboard)
+
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(invalidate_dashboard_on_change, sender=model, dispatch_uid=f'dashboard-save-{model.__name__}')
+    post_delete.connect(invalidate_dashboard_on_change, sender=model, dispatch_uid=f'dashboard-delete-{model.__name__}')
+
+
+def invalidate_product_counts(sender, **kwargs):
+    """Retire the cached product list counts when a filtered model changes."""
+    bump_product_list_version()
+    transaction.on_commit(bump_product_list_version)
+
+
+for model in PRODUCT_LIST_MODELS:
+    post_save.connect(invalidate_product_counts, sender=model, dispatch_uid=f'product-list-save-{model.__name__}')
+    post_delete.connect(invalidate_product_counts, sender=model, dispatch_uid=f'product-list-delete-{model.__name__}')
+
+
+def invalidate_dependent_rows(sender, **kwargs):
+    """Re-render cached list rows that display data from the changed model."""
+    for kind in ROW_DEPENDENCIES[sender]:
+        bump_row_version(kind)
+
+
+for model in ROW_DEPENDENCIES:
+    post_save.connect(invalidate_dependent_rows, sender=model, dispatch_uid=f'rows-save-{model.__name__}')
+    post_delete.connect(invalidate_dependent_rows, sender=model, dispatch_uid=f'rows-delete-{model.__name__}')
+
+
+def invalidate_landing_on_change(sender, **kwargs):
+    """Drop the home page payload now and again once the transaction commits."""
+    invalidate_landing_payload()
+    transaction.on_commit(invalidate_landing_payload)
+
+
+for model in LANDING_MODELS:
+    post_save.connect(invalidate_landing_on_change, sender=model, dispatch_uid=f'landing-save-{model.__name__}')
+    post_delete.connect(invalidate_landing_on_change, sender=model, dispatch_uid=f'landing-delete-{model.__name__}')
+
+
+def rebuild_product_card(sender, instance, **kwargs):
+    rebuild_cards(Product.objects.filter(pk=instance.pk))
+
+
+def rebuild_gallery_card(sender, instance, **kwargs):
+    rebuild_cards(Product.objects.filter(pk=instance.product_id))
+
+
+def rebuild_category_cards(sender, instance, **kwargs):
+    """Rebuild the cards still showing an old category name."""
+    rebuild_cards(Product.objects.filter(category=instance).exclude(card__category=instance.name))
+
+
+def rebuild_subcategory_cards(sender, instance, created, **kwargs):
+    """Rebuild the cards still showing an old subcategory name."""
+    if not created:
+        rebuild_cards(Product.objects.filter(subcategory=instance).exclude(card__subcategory=instance.name))
+
+
+def rebuild_orphaned_cards(sender, instance, **kwargs):
+    """Rebuild the cards of products whose subcategory was just deleted."""
+    rebuild_cards(Product.objects.filter(subcategory__isnull=True, card__subcategory=instance.name))
+
+
+post_save.connect(rebuild_product_card, sender=Product, dispatch_uid='cards-product-save')
+post_save.connect(rebuild_gallery_card, sender=ProductImage, dispatch_uid='cards-image-save')
+post_delete.connect(rebuild_gallery_card, sender=ProductImage, dispatch_uid='cards-image-delete')
+post_save.connect(rebuild_category_cards, sender=Category, dispatch_uid='cards-category-save')
+post_save.connect(rebuild_subcategory_cards, sender=SubCategory, dispatch_uid='cards-subcategory-save')
+post_delete.connect(rebuild_orphaned_cards, sender=SubCategory, dispatch_uid='cards-subcategory-delete')
+
+
+def remember_previous_slug(sender, instance, **kwargs):
+    instance._previous_slug = (
+        sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first() if instance.pk else None
+    )
+
+
+def invalidate_saved_detail(sender, instance, **kwargs):
+    """Drop a saved object's cached detail and keep its old slug working after a rename."""
+    kind = DETAIL_MODELS[sender]
+    previous = getattr(instance, '_previous_slug', None)
+    record_slug_changes(kind, [(instance.pk, previous, instance.slug)])
+    invalidate_detail(kind, instance.pk, [instance.slug])
+
+
+def invalidate_deleted_detail(sender, instance, **kwargs):
+    kind = DETAIL_MODELS[sender]
+    SlugRedirect.objects.filter(kind=kind, object_id=instance.pk).delete()
+    invalidate_detail(kind, instance.pk, [instance.slug])
+
+
+def invalidate_dependent_details(sender, **kwargs):
+    """Retire every cached detail that displays data from the changed model."""
+    for kind in DETAIL_DEPENDENCIES[sender]:
+        bump_detail_version(kind)
+
+
+def invalidate_gallery_detail(sender, instance, **kwargs):
+    invalidate_detail('product', instance.product_id)
+
+
+for model in DETAIL_MODELS:
+    pre_save.connect(remember_previous_slug, sender=model, dispatch_uid=f'detail-presave-{model.__name__}')
+    post_save.connect(invalidate_saved_detail, sender=model, dispatch_uid=f'detail-save-{model.__name__}')
+    post_delete.connect(invalidate_deleted_detail, sender=model, dispatch_uid=f'detail-delete-{model.__name__}')
+for model in DETAIL_DEPENDENCIES:
+    post_save.connect(invalidate_dependent_details, sender=model, dispatch_uid=f'details-save-{model.__name__}')
+    post_delete.connect(invalidate_dependent_details, sender=model, dispatch_uid=f'details-delete-{model.__name__}')
+post_save.connect(invalidate_gallery_detail, sender=ProductImage, dispatch_uid='detail-image-save')
+post_delete.connect(invalidate_gallery_detail, sender=ProductImage, dispatch_uid='detail-image-delete')
+
+
+def invalidate_after_bulk_write(*models):
+    """Invalidate what saving one row of each model would, for bulk writes that send no signals."""
+    for model in models:
+        if model in DASHBOARD_MODELS:
+            invalidate_dashboard_on_change(model)
+        if model in PRODUCT_LIST_MODELS:
+            invalidate_product_counts(model)
+        if model in ROW_DEPENDENCIES:
+            invalidate_dependent_rows(model)
+        if model in LANDING_MODELS:
+            invalidate_landing_on_change(model)
+        for kind in BULK_DETAIL_KINDS.get(model, ()):
+            bump_detail_version(kind)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop a user's cached row and permissions after a save (password, flags) or delete."""
+    invalidate_users([instance.pk])
+
+
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_users([user.pk])
+
+
+def invalidate_membership_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached permissions when a user's groups or direct permissions change."""
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, User):
+        invalidate_users([instance.pk])
+    elif reverse and pk_set:
+        # group.user_set.add(...) / permission.user_set.add(...)
+        invalidate_users(pk_set)
+    else:
+        # A group's or permission's whole user list was cleared.
+        invalidate_all_permissions()
+
+
+def invalidate_all_cached_permissions(sender, **kwargs):
+    invalidate_all_permissions()
+
+
+User = get_user_model()
+post_save.connect(invalidate_cached_user, sender=User, dispatch_uid='auth-user-save')
+post_delete.connect(invalidate_cached_user, sender=User, dispatch_uid='auth-user-delete')
+user_logged_out.connect(invalidate_logged_out_user, dispatch_uid='auth-user-logout')
+m2m_changed.connect(invalidate_membership_permissions, sender=User.groups.through, dispatch_uid='auth-user-groups')
+m2m_changed.connect(
+    invalidate_membership_permissions, sender=User.user_permissions.through, dispatch_uid='auth-user-permissions',
+)
+m2m_changed.connect(invalidate_all_cached_permissions, sender=Group.permissions.through, dispatch_uid='auth-group-perms')
+for model in (Group, Permission):
+    post_save.connect(invalidate_all_cached_permissions, sender=model, dispatch_uid=f'auth-save-{model.__name__}')
+    post_delete.connect(invalidate_all_cached_permissions, sender=model, dispatch_uid=f'auth-delete-{model.__name__}')
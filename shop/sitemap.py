@@ -0,0 +1,190 @@
+"""Gzipped sitemap shards for the storefront, regenerated incrementally.
+
+``manage.py build_sitemaps`` writes ``<kind>-<n>.xml.gz`` shards of at most
+``SITEMAP_SHARD_SIZE`` URLs for products, categories and subcategories, a
+``sitemap.xml`` index and a ``manifest.json`` into ``SITEMAP_ROOT``. The
+storefront serves that directory as static files at ``SITEMAP_URL``.
+
+Rows are read as ``(pk, slug, updated_at)`` values in keyset-ordered chunks
+of ``SITEMAP_CHUNK_SIZE``, so no model instances are built and memory stays
+flat. A shard covers a fixed pk range, recorded in the manifest together
+with the row count and newest ``updated_at`` in that range. The next run
+checks each range with one aggregate query and rewrites only the shards
+whose fingerprint changed. New rows have higher pks, so they only extend
+the last shard or start new ones.
+"""
+import gzip
+import json
+import os
+import string
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, NamedTuple
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Category, Product, SubCategory
+
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+
+
+class SitemapKind(NamedTuple):
+    queryset: Callable
+    # Columns whose newest value marks a change to a row's URL or lastmod.
+    stamps: tuple
+
+
+SITEMAP_KINDS = {
+    'category': SitemapKind(lambda: Category.objects.filter(is_hidden=False), ('updated_at',)),
+    # A subcategory's URL holds its category's slug.
+    'subcategory': SitemapKind(
+        lambda: SubCategory.objects.filter(category__is_hidden=False), ('updated_at', 'category__updated_at'),
+    ),
+    'product': SitemapKind(lambda: Product.objects.filter(category__is_hidden=False), ('updated_at',)),
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _url_fields(kind):
+    template = _setting('SITEMAP_URLS', {})[kind]
+    return template, [field for _, field, _, _ in string.Formatter().parse(template) if field]
+
+
+def _in_range(queryset, after, until):
+    queryset = queryset.filter(pk__gt=after)
+    return queryset if until is None else queryset.filter(pk__lte=until)
+
+
+def _isoformat(value, timespec='microseconds'):
+    return value.astimezone(timezone.utc).isoformat(timespec=timespec) if value else None
+
+
+def _fingerprint(kind, after, until):
+    """``[count, newest stamp, ...]`` of the ``kind`` rows in the pk range ``(after, until]``."""
+    stamps = SITEMAP_KINDS[kind].stamps
+    totals = _in_range(SITEMAP_KINDS[kind].queryset(), after, until).aggregate(
+        count=Count('pk'), **{f'stamp_{index}': Max(stamp) for index, stamp in enumerate(stamps)},
+    )
+    return [totals['count'], *(_isoformat(totals[f'stamp_{index}']) for index in range(len(stamps)))]
+
+
+def _rows(kind, after, until, limit):
+    """Yield up to ``limit`` rows (all when None) of the range in keyset-ordered chunks."""
+    definition = SITEMAP_KINDS[kind]
+    _, fields = _url_fields(kind)
+    rows = definition.queryset().order_by('pk').values('pk', *fields, *definition.stamps)
+    chunk_size = _setting('SITEMAP_CHUNK_SIZE', 2000)
+    while limit is None or limit > 0:
+        size = chunk_size if limit is None else min(chunk_size, limit)
+        chunk = list(_in_range(rows, after, until)[:size])
+        yield from chunk
+        if len(chunk) < size:
+            return
+        after = chunk[-1]['pk']
+        if limit is not None:
+            limit -= len(chunk)
+
+
+def _write_atomic(path, data):
+    temporary = path.with_name(f'.{path.name}.tmp')
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def _write_shard(root, kind, index, after, until, limit):
+    """Write one shard for the range and return its manifest entry."""
+    template, fields = _url_fields(kind)
+    stamps = SITEMAP_KINDS[kind].stamps
+    base = _setting('SITEMAP_BASE_URL', '').rstrip('/')
+    name = f'{kind}-{index}.xml.gz'
+    path = Path(root) / name
+    temporary = path.with_name(f'.{name}.tmp')
+    count, last_pk, newest = 0, after, [None] * len(stamps)
+    # mtime=0 keeps an unchanged shard byte-identical between runs.
+    with gzip.GzipFile(temporary, 'wb', mtime=0) as shard:
+        shard.write(URLSET_OPEN.encode())
+        for row in _rows(kind, after, until, limit):
+            values = [row[stamp] for stamp in stamps]
+            newest = [max(filter(None, pair), default=None) for pair in zip(newest, values)]
+            location = escape(base + template.format_map({field: row[field] for field in fields}))
+            lastmod = _isoformat(max(filter(None, values), default=None), 'seconds')
+            shard.write(f'<url><loc>{location}</loc><lastmod>{lastmod}</lastmod></url>\n'.encode())
+            count, last_pk = count + 1, row['pk']
+        shard.write(b'</urlset>\n')
+    os.replace(temporary, path)
+    return {
+        'file': name,
+        'after': after,
+        'last_pk': last_pk if until is None else until,
+        'fingerprint': [count, *map(_isoformat, newest)],
+    }
+
+
+def _update_kind(root, kind, shards, force):
+    """Bring the shards of ``kind`` up to date; return ``(shards, files written)``."""
+    size = _setting('SITEMAP_SHARD_SIZE', 10000)
+    updated, written, after = [], [], 0
+    for position, shard in enumerate(shards):
+        # The last shard stays open for new rows until it is full.
+        open_ended = position == len(shards) - 1 and shard['fingerprint'][0] < size
+        until = None if open_ended else shard['last_pk']
+        stale = force or not (root / shard['file']).exists()
+        if stale or _fingerprint(kind, after, until) != shard['fingerprint']:
+            shard = _write_shard(root, kind, len(updated), after, until, size if open_ended else None)
+            written.append(shard['file'])
+        updated.append(shard)
+        after = shard['last_pk']
+    while not updated or updated[-1]['fingerprint'][0] >= size:
+        if not _in_range(SITEMAP_KINDS[kind].queryset(), after, None).exists():
+            break
+        shard = _write_shard(root, kind, len(updated), after, None, size)
+        written.append(shard['file'])
+        updated.append(shard)
+        after = shard['last_pk']
+    return updated, written
+
+
+def _write_index(root, manifest):
+    base = _setting('SITEMAP_URL', '').rstrip('/')
+    entries = []
+    for shards in manifest['kinds'].values():
+        for shard in shards:
+            count, *stamps = shard['fingerprint']
+            if count:
+                lastmod = _isoformat(datetime.fromisoformat(max(filter(None, stamps))), 'seconds')
+                entries.append(
+                    f'<sitemap><loc>{escape(base)}/{shard["file"]}</loc><lastmod>{lastmod}</lastmod></sitemap>\n'
+                )
+    _write_atomic(Path(root) / INDEX_NAME, (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f'{"".join(entries)}</sitemapindex>\n'
+    ).encode())
+
+
+def build_sitemaps(force=False):
+    """Rewrite the shards whose rows changed since the last run; return the files written."""
+    root = Path(_setting('SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps'))
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {'kinds': {}}
+    layout = {'base_url': _setting('SITEMAP_BASE_URL', ''), 'urls': _setting('SITEMAP_URLS', {})}
+    if manifest.get('layout') != layout:
+        # Every URL changes with the site address or a URL pattern.
+        force = True
+    written = []
+    for kind in SITEMAP_KINDS:
+        manifest['kinds'][kind], files = _update_kind(root, kind, manifest['kinds'].get(kind, []), force)
+        written.extend(files)
+    if written or not (root / INDEX_NAME).exists():
+        manifest['layout'] = layout
+        _write_index(root, manifest)
+        _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+    return written
@@ -0,0 +1,137 @@
+"""Slow-query log with EXPLAIN capture.
+
+``log_slow_query`` is installed as an execute wrapper on every database
+connection. Queries slower than ``SLOW_QUERY_THRESHOLD_MS`` are sampled
+(``SLOW_QUERY_SAMPLE_RATE``) and rate limited per fingerprint
+(``SLOW_QUERY_MIN_INTERVAL`` seconds); the ones that get through are logged
+to ``shop.slow_queries`` with the view name, normalized SQL, a parameters
+fingerprint and the query plan. Occurrences dropped by the rate limit are
+carried in the next record's ``suppressed`` count so totals stay accurate.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from . import metrics
+from .queries import normalize_sql
+
+logger = logging.getLogger('shop.slow_queries')
+
+_explaining = contextvars.ContextVar('shop_slowlog_explaining', default=False)
+_lock = threading.Lock()
+_last_logged = {}
+_suppressed = {}
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def params_fingerprint(params):
+    """Hash the parameter values so identical calls group without logging the values."""
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+
+
+def _explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    token = _explaining.set(True)
+    try:
+        with metrics.suspended(), connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as exc:
+        return [f'EXPLAIN failed: {exc}']
+    finally:
+        _explaining.reset(token)
+
+
+def _admit(key, now):
+    """Apply the per-fingerprint rate limit; return the suppressed count or None."""
+    interval = getattr(settings, 'SLOW_QUERY_MIN_INTERVAL', 60)
+    with _lock:
+        if now - _last_logged.get(key, float('-inf')) < interval:
+            _suppressed[key] = _suppressed.get(key, 0) + 1
+            return None
+        _last_logged[key] = now
+        return _suppressed.pop(key, 0)
+
+
+def log_slow_query(execute, sql, params, many, context):
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+    if threshold is None or _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= threshold:
+            _record(sql, params, many, context, duration_ms)
+
+
+def _record(sql, params, many, context, duration_ms):
+    sample_rate = getattr(settings, 'SLOW_QUERY_SAMPLE_RATE', 1.0)
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    normalized = normalize_sql(sql)
+    key = fingerprint(normalized)
+    suppressed = _admit(key, time.monotonic())
+    if suppressed is None:
+        return
+    request_metrics = metrics.current()
+    plan = None if many else _explain(context['connection'], sql, params)
+    record = {
+        'time': time.time(),
+        'fingerprint': key,
+        'duration_ms': round(duration_ms, 3),
+        'view': request_metrics.view if request_metrics else None,
+        'sql': normalized,
+        'params_fingerprint': params_fingerprint(params),
+        'many': many,
+        'sample_rate': sample_rate,
+        'suppressed': suppressed,
+        'plan': plan,
+    }
+    logger.warning('Slow query %.1f ms in %s: %s', duration_ms, record['view'], normalized, extra={'slow_query': record})
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+class JsonLinesHandler(logging.FileHandler):
+    """Append slow-query records as one JSON object per line."""
+
+    def __init__(self, filename, **kwargs):
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(filename, **kwargs)
+
+    def format(self, record):
+        return json.dumps(getattr(record, 'slow_query', {'message': record.getMessage()}), default=str)
+
+
+def read_records(path, since=None):
+    """Yield slow-query records from a JSON-lines log, optionally newer than ``since``."""
+    path = Path(path)
+    if not path.exists():
+        return
+    with path.open() as log_file:
+        for line in log_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if 'fingerprint' not in record:
+                continue
+            if since is not None and record['time'] < since:
+                continue
+            yield record
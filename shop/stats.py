@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+
+from .models import Category, SubCategory, Product, Banner, LandingPageContent
+
+DASHBOARD_STATS_CACHE_KEY = 'shop:dashboard-stats'
+
+TOTAL_MODELS = {
+    'total_categories': Category,
+    'total_subcategories': SubCategory,
+    'total_products': Product,
+    'total_banners': Banner,
+    'total_landing_contents': LandingPageContent,
+}
+
+
+def _count_totals():
+    """Count every dashboard model in a single statement of scalar subqueries."""
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(
+        f'(SELECT COUNT(*) FROM {quote_name(model._meta.db_table)})'
+        for model in TOTAL_MODELS.values()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {columns}')
+        row = cursor.fetchone()
+    return dict(zip(TOTAL_MODELS, row))
+
+
+def _recent_products(limit=5):
+    return list(
+        Product.objects.order_by('-created_at').values(
+            'id', 'name', 'slug', 'created_at', 'category__name', 'subcategory__name',
+        )[:limit]
+    )
+
+
+def _top_categories(limit=5):
+    return list(
+        Category.objects.filter(is_hidden=False).annotate(
+            product_total=Count('products', distinct=True),
+            subcategory_count=Count('subcategories', distinct=True),
+        ).order_by('-product_total', 'name').values(
+            'id', 'name', 'slug', 'product_total', 'subcategory_count',
+        )[:limit]
+    )
+
+
+def compute_dashboard_stats():
+    """Build a fresh dashboard snapshot straight from the database."""
+    stats = _count_totals()
+    stats['recent_products'] = _recent_products()
+    stats['top_categories'] = _top_categories()
+    return stats
+
+
+def get_dashboard_stats():
+    """Return the cached dashboard snapshot, rebuilding it once on a miss."""
+    return cache.get_or_set(
+        DASHBOARD_STATS_CACHE_KEY, compute_dashboard_stats, getattr(settings, 'DASHBOARD_STATS_TIMEOUT', 60),
+    )
+
+
+def invalidate_dashboard_stats():
+    cache.delete(DASHBOARD_STATS_CACHE_KEY)
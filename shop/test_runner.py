@@ -0,0 +1,29 @@
+"""Test runner that keeps the test suite off the shared cache file.
+
+Tests clear and fill the cache freely, so they get their own SQLite cache
+in a temporary directory instead of ``cache/shop-cache.sqlite3``, which
+running workers on the same host also use.
+"""
+import copy
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedCacheRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_directory = tempfile.TemporaryDirectory(prefix='shop-test-cache-')
+        caches = copy.deepcopy(settings.CACHES)
+        for alias, options in caches.items():
+            options['LOCATION'] = Path(self._cache_directory.name) / f'{alias}.sqlite3'
+        self._cache_settings = override_settings(CACHES=caches)
+        self._cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_settings.disable()
+        self._cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
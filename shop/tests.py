@@ -1,3 +1,1199 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import warnings
+import zipfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import cbor2
+import msgpack
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import backfill, deletion, details, fragments, landing, listing, metrics, sitemap, slowlog, warmup
+from .cache import SQLiteCache
+from .live import broadcaster
+from .models import (
+    Category, SubCategory, Product, ProductImage, Banner, LandingPageContent, BackfillCheckpoint, CategoryDeletionJob,
+    SlugRedirect,
+)
+from .queries import describe_repeated
+from .stats import get_dashboard_stats
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('admin', password='secret')
+        self.client.force_login(self.user)
+        category = Category.objects.create(name='Bags')
+        subcategory = SubCategory.objects.create(category=category, name='Leather')
+        SubCategory.objects.create(category=category, name='Canvas')
+        for index in range(3):
+            Product.objects.create(category=category, subcategory=subcategory, name=f'Bag {index}')
+
+    def test_dashboard_query_count_is_constant(self):
+        # user, then totals, recent products and top categories; the session is cached
+        with self.assertNumQueries(4):
+            self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_products'], 3)
+        self.assertEqual(response.context['total_subcategories'], 2)
+
+    def test_top_categories_do_not_multiply_joined_counts(self):
+        top = get_dashboard_stats()['top_categories'][0]
+        self.assertEqual(top['product_total'], 3)
+        self.assertEqual(top['subcategory_count'], 2)
+
+    def test_snapshot_is_invalidated_by_model_signals(self):
+        self.assertEqual(get_dashboard_stats()['total_products'], 3)
+        Product.objects.create(category=Category.objects.get(), name='Wallet')
+        self.assertEqual(get_dashboard_stats()['total_products'], 4)
+        Product.objects.filter(name='Wallet').get().delete()
+        self.assertEqual(get_dashboard_stats()['total_products'], 3)
+
+
+@override_settings(DASHBOARD_STREAM_COALESCE=0)
+class DashboardStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Bags')
+
+    async def test_one_delta_is_shared_by_every_listener(self):
+        first, second = broadcaster.stream(), broadcaster.stream()
+        try:
+            snapshot = await anext(first)
+            self.assertIs(snapshot, await anext(second))
+            self.assertTrue(snapshot.startswith(b'event: snapshot'))
+
+            await sync_to_async(Product.objects.create)(category=self.category, name='Wallet')
+            broadcaster.notify()
+
+            delta = await anext(first)
+            self.assertIs(delta, await anext(second))
+            self.assertTrue(delta.startswith(b'event: delta'))
+            self.assertIn(b'"total_products": 1', delta)
+            self.assertIn('Wallet'.encode(), delta)
+        finally:
+            await first.aclose()
+            await second.aclose()
+
+    def test_wsgi_dashboard_does_not_open_the_stream(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        response = self.client.get(reverse('dashboard_stream'))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+        self.assertNotContains(self.client.get(reverse('dashboard')), 'EventSource')
+
+    async def test_asgi_dashboard_opens_the_stream(self):
+        user = await sync_to_async(get_user_model().objects.create_user)('admin', password='secret')
+        await self.async_client.aforce_login(user)
+        self.assertContains(await self.async_client.get(reverse('dashboard')), 'EventSource')
+
+
+class AsyncApiParityTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Bags')
+        subcategory = SubCategory.objects.create(category=category, name='Leather')
+        product = Product.objects.create(category=category, subcategory=subcategory, name='Tote', image='products/tote.png')
+        product.images.create(image='products/gallery/tote-1.png', sort_order=1)
+        Banner.objects.create(image='banners/home.png', order=1)
+
+    def test_async_endpoints_match_viewset_payloads(self):
+        product = Product.objects.get()
+        pairs = [
+            ('/api/products/', '/api/async/products/'),
+            ('/api/products/?category=bags', '/api/async/products/?category=bags'),
+            (
+                '/api/products/?category=bags,shoes&has_image=1&facets=1',
+                '/api/async/products/?category=bags,shoes&has_image=1&facets=1',
+            ),
+            (f'/api/products/{product.pk}/', f'/api/async/products/{product.pk}/'),
+            ('/api/categories/', '/api/async/categories/'),
+            ('/api/banners/', '/api/async/banners/'),
+        ]
+        for sync_url, async_url in pairs:
+            with self.subTest(url=async_url):
+                self.assertEqual(self.client.get(async_url).json(), self.client.get(sync_url).json())
+
+    def test_missing_object_returns_viewset_style_404(self):
+        sync_response = self.client.get('/api/products/999/')
+        async_response = self.client.get('/api/async/products/999/')
+        self.assertEqual(async_response.status_code, 404)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+
+class BinaryRendererTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Ноолуур')
+        subcategory = SubCategory.objects.create(category=category, name='Ороолт')
+        product = Product.objects.create(category=category, subcategory=subcategory, name='Ороолт', image='products/a.png')
+        ProductImage.objects.create(product=product, image='products/gallery/a.png')
+        Banner.objects.create(image='banners/a.png')
+
+    def test_binary_formats_decode_to_the_json_payload(self):
+        decoders = {'application/msgpack': msgpack.unpackb, 'application/cbor': cbor2.loads}
+        for path in ('/api/products/', '/api/categories/', '/api/banners/', '/api/products/?category=x'):
+            expected = self.client.get(path, HTTP_ACCEPT='application/json').json()
+            for media_type, decode in decoders.items():
+                with self.subTest(path=path, media_type=media_type):
+                    response = self.client.get(path, HTTP_ACCEPT=media_type)
+                    self.assertEqual(response['Content-Type'], media_type)
+                    self.assertEqual(decode(response.content), expected)
+        self.assertEqual(self.client.get('/api/products/').headers['Content-Type'], 'application/json')
+
+
+class ProductCardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Bags')
+        self.subcategory = SubCategory.objects.create(category=self.category, name='Totes')
+        self.product = Product.objects.create(
+            category=self.category, subcategory=self.subcategory, name='Tote', image='products/tote.png',
+        )
+        for order in (1, 0):
+            ProductImage.objects.create(product=self.product, image=f'products/gallery/{order}.png', sort_order=order)
+
+    def card(self):
+        return Product.objects.values_list('card', flat=True).get(pk=self.product.pk)
+
+    def test_card_follows_related_changes(self):
+        self.assertEqual(self.card(), {
+            'name': 'Tote', 'slug': self.product.slug, 'category': 'Bags', 'subcategory': 'Totes',
+            'image': '/media/products/tote.png',
+            'images': ['/media/products/gallery/0.png', '/media/products/gallery/1.png'],
+        })
+        self.category.name = 'Handbags'
+        self.category.save()
+        self.subcategory.name = 'Shoppers'
+        self.subcategory.save()
+        self.product.images.first().delete()
+        self.assertEqual(
+            (self.card()['category'], self.card()['subcategory'], self.card()['images']),
+            ('Handbags', 'Shoppers', ['/media/products/gallery/1.png']),
+        )
+        self.subcategory.delete()
+        self.assertIsNone(self.card()['subcategory'])
+
+    def test_card_endpoints_read_only_the_product_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            cards = self.client.get('/api/products/cards/').json()
+        self.assertEqual([query['sql'].count('JOIN') for query in queries.captured_queries], [0])
+        self.assertEqual(cards[0]['id'], self.product.pk)
+        self.assertEqual(cards[0]['image'], 'http://testserver/media/products/tote.png')
+        self.assertEqual(self.client.get(reverse('async_product_cards')).json(), cards)
+        self.assertEqual(self.client.get('/api/products/cards/?category=missing').json(), [])
+
+    def test_backfill_rebuilds_stale_cards(self):
+        Product.objects.update(card={})
+        call_command('backfill', 'product-cards', '--restart', '--pause', '0', stdout=io.StringIO())
+        self.assertEqual(self.card()['subcategory'], 'Totes')
+
+
+class SlugDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Bags')
+        self.product = Product.objects.create(category=self.category, name='Tote', image='products/tote.png')
+
+    def detail(self, kind, slug):
+        return self.client.get(reverse(f'{kind}-by-slug', kwargs={'slug': slug}))
+
+    def test_detail_is_cached_until_the_object_changes(self):
+        self.assertEqual(self.detail('product', 'tote').json()['name'], 'Tote')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.detail('product', 'tote')
+        self.assertEqual(len(queries.captured_queries), 0)
+        self.assertNotIn('Content-Location', response)
+
+        self.category.name = 'Handbags'
+        self.category.save()
+        self.assertEqual(self.detail('product', 'tote').json()['category_name'], 'Handbags')
+        SubCategory.objects.create(category=self.category, name='Totes')
+        self.assertEqual([sub['name'] for sub in self.detail('category', 'bags').json()['subcategories']], ['Totes'])
+
+    def test_hosts_share_one_cached_detail(self):
+        url = reverse('product-by-slug', kwargs={'slug': 'tote'})
+        first = self.client.get(url, HTTP_HOST='one.example').json()
+        with self.assertNumQueries(0):
+            second = self.client.get(url, HTTP_HOST='two.example').json()
+        self.assertEqual(first['image'], 'http://one.example/media/products/tote.png')
+        self.assertEqual(second['image'], 'http://two.example/media/products/tote.png')
+        self.assertEqual(details.get_detail('product', 'tote')['image'], '/media/products/tote.png')
+
+    def test_renamed_slug_keeps_serving_the_object(self):
+        self.detail('product', 'tote')
+        self.product.slug = 'canvas-tote'
+        self.product.save()
+        response = self.detail('product', 'tote')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['slug'], 'canvas-tote')
+        self.assertEqual(response['Content-Location'], reverse('product-by-slug', kwargs={'slug': 'canvas-tote'}))
+
+        # The old slug goes to a new product once it is taken again.
+        other = Product.objects.create(category=self.category, name='Tote', image='products/tote.png')
+        self.assertEqual(other.slug, 'tote')
+        self.assertEqual(self.detail('product', 'tote').json()['id'], other.pk)
+        self.assertFalse(SlugRedirect.objects.filter(old_slug='tote').exists())
+
+    def test_deleted_and_hidden_objects_are_not_found(self):
+        self.detail('product', 'tote')
+        self.product.delete()
+        self.assertEqual(self.detail('product', 'tote').status_code, 404)
+        self.detail('category', 'bags')
+        self.category.is_hidden = True
+        self.category.save()
+        self.assertEqual(self.detail('category', 'bags').status_code, 404)
+        self.assertEqual(self.detail('category', 'missing').status_code, 404)
+
+
+class ReadinessTests(TestCase):
+    def test_readiness_flips_only_after_warm_up(self):
+        with mock.patch.object(warmup, '_ready', threading.Event()), \
+                mock.patch('shop.views.ensure_warm_up_started') as start_warm_up:
+            response = self.client.get(reverse('readiness'))
+            self.assertEqual(response.status_code, 503)
+            start_warm_up.assert_called_once()
+
+            timings = warmup.warm_up()
+            self.assertGreater(timings['templates']['count'], 0)
+            self.assertGreater(timings['urls']['count'], 0)
+            self.assertEqual(self.client.get(reverse('readiness')).status_code, 200)
+
+    def test_warm_up_primes_the_catalog_caches(self):
+        cache.clear()
+        category = Category.objects.create(name='Bags')
+        Product.objects.create(category=category, name='Tote')
+        self.assertEqual(warmup.prime_caches(), 6)
+        with self.assertNumQueries(0):
+            for url in (reverse('landing'), '/api/products/by-slug/tote/', '/api/categories/by-slug/bags/'):
+                self.assertEqual(self.client.get(url, HTTP_HOST='shop.example', secure=True).status_code, 200)
+            listing.product_facets(listing.api_product_filters(QueryDict()))
+            listing.product_count({'search': '', 'category': '', 'subcategory': ''})
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('admin', password='secret')
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard'))
+
+    def test_cached_session_and_user_skip_both_auth_queries(self):
+        with self.assertNumQueries(0):
+            self.client.get(reverse('dashboard'))
+        with self.settings(
+            SESSION_ENGINE='django.contrib.sessions.backends.db',
+            AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'],
+        ):
+            client = self.client_class()
+            client.force_login(self.user)
+            client.get(reverse('dashboard'))
+            with self.assertNumQueries(2):
+                client.get(reverse('dashboard'))
+
+    def test_password_change_ends_existing_sessions(self):
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertRedirects(self.client.get(reverse('dashboard')), f"{reverse('login')}?next=/", 302, 200)
+
+    def test_logout_drops_the_cached_session(self):
+        self.client.post(reverse('logout'))
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 302)
+
+    def test_permission_changes_reach_cached_permission_sets(self):
+        permission = Permission.objects.get(codename='add_product')
+        group = Group.objects.create(name='editors')
+        self.user.groups.add(group)
+        fresh = lambda: get_user_model().objects.get(pk=self.user.pk)  # noqa: E731
+        self.assertFalse(fresh().has_perm('shop.add_product'))
+        group.permissions.add(permission)
+        self.assertTrue(fresh().has_perm('shop.add_product'))
+        self.user.groups.remove(group)
+        self.assertFalse(fresh().has_perm('shop.add_product'))
+
+
+class LandingPayloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Bags', sort_order=1)
+        SubCategory.objects.create(category=category, name='Leather')
+        Banner.objects.create(image='banners/a.png', order=2)
+        LandingPageContent.objects.create(title='Second', sort_order=2)
+        LandingPageContent.objects.create(title='First', sort_order=1)
+        LandingPageContent.objects.create(title='Hidden', sort_order=0, is_active=False)
+
+    def test_warm_payload_needs_no_queries_and_honours_the_etag(self):
+        url = reverse('landing')
+        payload = self.client.get(url).json()
+        self.assertEqual([section['title'] for section in payload['sections']], ['First', 'Second'])
+        self.assertEqual(payload['featured_categories'][0]['subcategories'][0]['name'], 'Leather')
+        self.assertTrue(payload['banners'][0]['image'].startswith('http://testserver/'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_hosts_share_one_cached_payload(self):
+        url = reverse('landing')
+        first = self.client.get(url, HTTP_HOST='one.example')
+        with self.assertNumQueries(0):
+            second = self.client.get(url, HTTP_HOST='two.example')
+        self.assertTrue(first.json()['banners'][0]['image'].startswith('http://one.example/media/'))
+        self.assertTrue(second.json()['banners'][0]['image'].startswith('http://two.example/media/'))
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        digest, payload = cache.get(landing.LANDING_PAYLOAD_CACHE_KEY)
+        self.assertEqual(payload['banners'][0]['image'], '/media/banners/a.png')
+
+    def test_signals_invalidate_the_payload(self):
+        url = reverse('landing')
+        etag = self.client.get(url)['ETag']
+        content = LandingPageContent.objects.get(title='Hidden')
+        content.is_active = True
+        content.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['sections']), 3)
+
+
+class SidebarNavigationTests(TestCase):
+    def test_active_item_follows_the_resolved_view(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        menu = self.client.get(reverse('product_create')).context['sidebar_menu']
+        self.assertEqual([item.id for item in menu if item.is_active], ['products'])
+        self.assertEqual(menu[2].url, reverse('product_list'))
+        self.assertIs(self.client.get(reverse('product_list')).context['sidebar_menu'], menu)
+
+    def test_unlisted_pages_get_a_menu_with_nothing_active(self):
+        menu = self.client.get(reverse('login')).context['sidebar_menu']
+        self.assertFalse(any(item.is_active for item in menu))
+
+
+class PerformanceMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Bags')
+        Product.objects.create(category=category, name='Tote')
+
+    def test_server_timing_reports_db_serialization_and_render(self):
+        api_timing = self.client.get('/api/products/')['Server-Timing']
+        self.assertRegex(api_timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('serialize;dur=', api_timing)
+        self.assertIn('total;dur=', api_timing)
+
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        self.assertIn('render;dur=', self.client.get(reverse('dashboard'))['Server-Timing'])
+
+    def test_metrics_endpoint_exposes_per_view_histograms(self):
+        self.client.get('/api/products/')
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE shop_request_duration_seconds histogram', body)
+        self.assertIn('shop_request_duration_seconds_bucket{view="product-list",le="+Inf"}', body)
+        self.assertIn('shop_response_size_bytes_count{view="product-list"}', body)
+
+    def test_exited_workers_are_folded_into_the_archive(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        # Above the default pid_max, so never a running process.
+        exited, recycled = 2 ** 22 + 1, 2 ** 22 + 2
+        counts = [0] * (len(metrics.QUERY_COUNT_BUCKETS) + 1)
+        counts[1] = 3
+        snapshot = {('shop_db_queries', 'product-list'): (counts, 3.0, 3)}
+        total = 'shop_db_queries_count{view="product-list"} 6'
+        with override_settings(METRICS_DIR=directory.name), mock.patch.object(metrics.registry, '_histograms', {}):
+            metrics._write_snapshot(root / f'{exited}.metrics', snapshot)
+            metrics._write_snapshot(root / f'{recycled}.metrics', snapshot)
+            metrics.archive_workers([exited])
+            self.assertFalse((root / f'{exited}.metrics').exists())
+            self.assertIn(total, metrics.render_prometheus())
+            # A new worker reusing the pid starts from nothing, not from the old counts.
+            metrics._write_snapshot(root / f'{exited}.metrics', {})
+            self.assertIn(total, metrics.render_prometheus())
+            metrics.archive_workers()
+            self.assertEqual(
+                {path.name for path in root.glob('*.metrics')}, {metrics.ARCHIVE_NAME, f'{os.getpid()}.metrics'},
+            )
+            self.assertIn(total, metrics.render_prometheus())
+
+
+@override_settings(PRODUCT_LIST_PAGE_SIZE=2)
+class ProductListPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        self.category = Category.objects.create(name='Bags')
+        self.products = [Product.objects.create(category=self.category, name=f'Bag {index}') for index in range(5)]
+
+    def test_rows_endpoint_pages_through_every_product_once(self):
+        response = self.client.get(reverse('product_list'))
+        seen = [product.pk for product in response.context['products']]
+        cursor = response.context['next_cursor']
+        while cursor:
+            page = self.client.get(reverse('product_list_rows'), {'after': cursor}).json()
+            seen += [int(pk) for pk in re.findall(r'/products/(\d+)/edit/', page['html'])]
+            cursor = page['next']
+        self.assertEqual(seen, [product.pk for product in reversed(self.products)])
+
+    def test_page_walks_the_keyset_index_without_grouping(self):
+        ProductImage.objects.create(product=self.products[-1], image='products/gallery/1.png')
+        with CaptureQueriesContext(connection) as queries:
+            page, _ = listing.product_page({'search': '', 'category': '', 'subcategory': ''})
+        self.assertEqual([product.image_count for product in page[:2]], [1, 0])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {queries.captured_queries[-1]["sql"]}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING INDEX product_created_keyset_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_filtered_count_is_cached_until_the_catalog_changes(self):
+        url = reverse('product_list')
+        self.assertEqual(self.client.get(url, {'search': 'Bag'}).context['total_count'], 5)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'search': 'Bag'})
+        self.assertFalse(any('COUNT(*)' in query['sql'] for query in queries.captured_queries))
+        Product.objects.create(category=self.category, name='Bag 5')
+        self.assertEqual(self.client.get(url, {'search': 'Bag'}).context['total_count'], 6)
+
+    def test_unfiltered_total_leaves_out_a_category_being_deleted(self):
+        doomed = Category.objects.create(name='Doomed')
+        Product.objects.create(category=doomed, name='Gone')
+        url = reverse('product_list')
+        self.assertEqual(self.client.get(url).context['total_count'], 6)
+        with self.captureOnCommitCallbacks():
+            deletion.schedule_category_deletion(doomed)
+        self.assertEqual(self.client.get(url).context['total_count'], 5)
+
+
+class RowFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        self.category = Category.objects.create(name='Bags')
+        self.product = Product.objects.create(category=self.category, name='Tote')
+        Product.objects.create(category=self.category, name='Clutch')
+
+    def rendered_rows(self, url):
+        with mock.patch('shop.fragments.render_to_string', wraps=fragments.render_to_string) as render:
+            response = self.client.get(url)
+        return response, render.call_count
+
+    def test_only_changed_rows_are_rendered_again(self):
+        url = reverse('product_list')
+        self.assertEqual(self.rendered_rows(url)[1], 2)
+        self.assertEqual(self.rendered_rows(url)[1], 0)
+        self.product.name = 'Tote XL'
+        self.product.save()
+        response, rendered = self.rendered_rows(url)
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, 'Tote XL')
+
+    def test_related_changes_refresh_dependent_rows(self):
+        self.rendered_rows(reverse('product_list'))
+        self.rendered_rows(reverse('category_list'))
+        SubCategory.objects.create(category=self.category, name='Leather')
+        self.assertEqual(self.rendered_rows(reverse('product_list'))[1], 2)
+        self.assertEqual(self.rendered_rows(reverse('category_list'))[1], 1)
+
+
+class SQLiteCacheTests(TestCase):
+    def make_cache(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return SQLiteCache(f'{directory.name}/cache.sqlite3', {'OPTIONS': options})
+
+    def test_suite_does_not_share_the_workers_cache_file(self):
+        self.assertIsInstance(caches['default'], SQLiteCache)
+        self.assertNotEqual(Path(cache.path).parent, settings.BASE_DIR / 'cache')
+
+    def test_incr_is_atomic_across_threads(self):
+        shared = self.make_cache()
+        shared.set('version', 0)
+
+        def bump():
+            for _ in range(50):
+                shared.incr('version')
+
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(shared.get('version'), 200)
+        with self.assertRaises(ValueError):
+            shared.incr('missing')
+
+    def test_least_recently_read_entries_are_evicted(self):
+        shared = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2, TOUCH_BATCH=1)
+        shared.set_many({f'key-{index}': index for index in range(10)})
+        time.sleep(0.01)
+        self.assertEqual(shared.get_many(['key-0', 'key-1']), {'key-0': 0, 'key-1': 1})
+        shared.set('key-10', 10)
+        remaining = shared.get_many([f'key-{index}' for index in range(11)])
+        self.assertEqual(len(remaining), 5)
+        self.assertTrue({'key-0', 'key-1', 'key-10'} <= set(remaining))
+
+    def test_get_or_set_builds_a_missing_value_once(self):
+        shared = self.make_cache()
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.05)
+            return {'total': 3}
+
+        threads = [threading.Thread(target=shared.get_or_set, args=('stats', build)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(shared.get('stats'), {'total': 3})
+
+
+class BackfillTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Bags')
+        Product.objects.bulk_create(Product(category=category, name=f'Bag {index}', slug=f'bag-{index}') for index in range(5))
+        self.fail_after = None
+        self.seen = []
+
+        @backfill.register('test-descriptions', 'shop.Product', ['description'])
+        def fill_description(product):
+            if self.fail_after is not None and len(self.seen) == self.fail_after:
+                raise RuntimeError('interrupted')
+            self.seen.append(product.pk)
+            product.description = product.name.upper()
+            return True
+
+        self.addCleanup(backfill.BACKFILLS.pop, 'test-descriptions')
+
+    def test_interrupted_backfill_resumes_after_the_last_committed_batch(self):
+        self.fail_after = 3
+        with self.assertRaises(RuntimeError):
+            backfill.run_backfill('test-descriptions', batch_size=2, pause=0, progress=None)
+        checkpoint = BackfillCheckpoint.objects.get(name='test-descriptions')
+        self.assertEqual((checkpoint.status, checkpoint.processed), ('running', 2))
+
+        self.fail_after = None
+        checkpoint = backfill.run_backfill('test-descriptions', batch_size=2, pause=0, progress=None)
+        self.assertEqual((checkpoint.status, checkpoint.processed, checkpoint.total), ('done', 5, 5))
+        self.assertEqual(len(self.seen), 3 + 3)
+        self.assertFalse(Product.objects.exclude(description__startswith='BAG').exists())
+
+    @override_settings(BACKFILL_DEFER=True)
+    def test_deferred_migration_backfill_runs_from_the_command(self):
+        from django.apps import apps
+        from django.db import connection
+
+        operation = backfill.RunBackfill('test-descriptions')
+        operation.run(apps, mock.Mock(connection=connection))
+        self.assertEqual(BackfillCheckpoint.objects.get(name='test-descriptions').status, 'pending')
+        call_command('backfill', '--pending', '--pause', '0', stdout=io.StringIO())
+        self.assertEqual(BackfillCheckpoint.objects.get(name='test-descriptions').status, 'done')
+        self.assertEqual(Product.objects.filter(description__startswith='BAG').count(), 5)
+
+
+@override_settings(CATEGORY_DELETION_IN_BACKGROUND=False, CATEGORY_DELETION_BATCH_SIZE=2, CATEGORY_DELETION_PAUSE=0)
+class CategoryDeletionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        self.category = Category.objects.create(name='Bags', image='categories/bags.png')
+        subcategory = SubCategory.objects.create(category=self.category, name='Totes')
+        for index in range(5):
+            product = Product.objects.create(
+                category=self.category, subcategory=subcategory, name=f'Bag {index}', image='products/placeholder.png',
+            )
+            ProductImage.objects.create(product=product, image=f'products/gallery/bag-{index}.png')
+        self.other = Product.objects.create(
+            category=Category.objects.create(name='Shoes'), name='Boot',
+            image='products/placeholder.png',
+        )
+
+    def test_category_is_hidden_at_once_and_deleted_in_batches(self):
+        kept = SlugRedirect.objects.create(kind='product', old_slug='old-boot', object_id=self.other.pk)
+        SlugRedirect.objects.create(kind='category', old_slug='old-bags', object_id=self.category.pk)
+        for product in Product.objects.filter(category=self.category):
+            SlugRedirect.objects.create(kind='product', old_slug=f'old-{product.slug}', object_id=product.pk)
+        with mock.patch.object(deletion.default_storage, 'delete') as delete_file:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.client.post(reverse('category_delete', args=[self.category.pk]))
+            names = [category['name'] for category in self.client.get('/api/categories/').json()]
+            self.assertEqual(names, ['Shoes'])
+            self.assertEqual(self.client.get(reverse('category_deletions')).json()['jobs'][0]['percent'], 0)
+            page = self.client.get(reverse('category_list')).content.decode()
+            self.assertIn('<title>Ангилал - E-Commerce Admin</title>', page)
+            self.assertEqual(page.count('setInterval'), 1)
+            for callback in callbacks:
+                callback()
+
+        job = CategoryDeletionJob.objects.get()
+        self.assertEqual(
+            (job.status, job.products_total, job.products_deleted, job.images_deleted, job.subcategories_deleted),
+            ('done', 5, 5, 5, 1),
+        )
+        self.assertFalse(Category.objects.filter(pk=self.category.pk).exists())
+        self.assertEqual(list(Product.objects.all()), [self.other])
+        self.assertEqual(list(SlugRedirect.objects.all()), [kept])
+        deleted = {call.args[0] for call in delete_file.call_args_list}
+        self.assertNotIn('products/placeholder.png', deleted)
+        self.assertEqual(deleted, {'categories/bags.png', *(f'products/gallery/bag-{index}.png' for index in range(5))})
+        self.assertEqual(self.client.get(reverse('category_deletions')).json()['jobs'], [])
+
+    def test_caches_are_refreshed_once_per_job(self):
+        with self.captureOnCommitCallbacks():
+            job = deletion.schedule_category_deletion(self.category)
+        with mock.patch.object(deletion, '_refresh_caches') as refresh:
+            with mock.patch.object(deletion.default_storage, 'delete'):
+                deletion.run_job(job.pk)
+        self.assertEqual(CategoryDeletionJob.objects.get().status, 'done')
+        refresh.assert_called_once_with()
+
+    def test_worker_warm_up_resumes_abandoned_jobs_once(self):
+        with self.captureOnCommitCallbacks():
+            job = deletion.schedule_category_deletion(self.category)
+        CategoryDeletionJob.objects.filter(pk=job.pk).update(
+            status='running', updated_at=timezone.now() - timedelta(minutes=5),
+        )
+        with mock.patch.object(deletion, 'start_job') as start_job:
+            self.assertEqual(warmup.resume_deletions(), 1)
+            # The first worker's claim makes the job fresh again for the next one.
+            self.assertEqual(warmup.resume_deletions(), 0)
+        start_job.assert_called_once_with(job.pk)
+        with mock.patch.object(deletion.default_storage, 'delete'):
+            deletion.run_job(job.pk)
+        self.assertEqual(CategoryDeletionJob.objects.get().status, 'done')
+
+    def test_interrupted_job_is_resumed_by_the_command(self):
+        with self.captureOnCommitCallbacks():
+            job = deletion.schedule_category_deletion(self.category)
+        CategoryDeletionJob.objects.filter(pk=job.pk).update(status='running')
+        with mock.patch.object(deletion.default_storage, 'delete'):
+            call_command('resume_category_deletions', '--stale-after', '0', stdout=io.StringIO())
+        self.assertEqual(CategoryDeletionJob.objects.get().status, 'done')
+        self.assertEqual(Product.objects.count(), 1)
+
+
+class BulkEditTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        self.categories = [Category.objects.create(name=f'Category {index}') for index in range(3)]
+        self.subcategory = SubCategory.objects.create(category=self.categories[0], name='Totes')
+        self.products = [
+            Product.objects.create(category=self.categories[0], subcategory=self.subcategory, name=f'Bag {index}')
+            for index in range(4)
+        ]
+
+    def post(self, name, payload, **kwargs):
+        return self.client.post(reverse(name, kwargs=kwargs), payload, content_type='application/json')
+
+    def test_reorder_is_a_single_update(self):
+        ids = [category.pk for category in reversed(self.categories)]
+        self.client.get('/api/landing/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('bulk_reorder', {'ids': ids}, kind='category')
+        self.assertEqual(response.json(), {'updated': 3})
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "shop_category"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('CASE', updates[0])
+        self.assertEqual(list(Category.objects.order_by('sort_order').values_list('pk', flat=True)), ids)
+        landing = self.client.get('/api/landing/').content.decode()
+        self.assertLess(landing.index('Category 2'), landing.index('Category 0'))
+
+    def test_recategorize_drops_subcategories_of_the_old_category(self):
+        ids = [product.pk for product in self.products[:2]]
+        response = self.post('bulk_recategorize_products', {'ids': ids, 'category': self.categories[1].pk})
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertEqual(
+            set(Product.objects.filter(pk__in=ids).values_list('category', 'subcategory')), {(self.categories[1].pk, None)},
+        )
+        self.assertEqual(Product.objects.filter(category=self.categories[0]).count(), 2)
+
+    def test_moved_subcategories_take_their_products_along(self):
+        self.post('bulk_move_subcategories', {'ids': [self.subcategory.pk], 'category': self.categories[2].pk})
+        self.assertEqual(Product.objects.filter(category=self.categories[2]).count(), 4)
+        self.assertEqual(SubCategory.objects.get().category, self.categories[2])
+
+    def test_category_form_saves_sort_order_changes_in_one_update(self):
+        category = self.categories[0]
+        extra = SubCategory.objects.create(category=category, name='Clutches', sort_order=1)
+        data = {
+            'name': category.name, 'slug': category.slug, 'sort_order': 0,
+            'subcategories-TOTAL_FORMS': 2, 'subcategories-INITIAL_FORMS': 2,
+            'subcategories-MIN_NUM_FORMS': 0, 'subcategories-MAX_NUM_FORMS': 1000,
+        }
+        for index, (subcategory, position) in enumerate([(self.subcategory, 5), (extra, 3)]):
+            data.update({
+                f'subcategories-{index}-id': subcategory.pk, f'subcategories-{index}-category': category.pk,
+                f'subcategories-{index}-name': subcategory.name, f'subcategories-{index}-sort_order': position,
+            })
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('category_edit', args=[category.pk]), data)
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "shop_subcategory"')]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(response, reverse('category_list'))
+        self.assertEqual(list(category.subcategories.values_list('name', flat=True)), ['Clutches', 'Totes'])
+
+    def test_invalid_requests_change_nothing(self):
+        self.assertEqual(self.post('bulk_reorder', {'ids': 'all'}, kind='category').status_code, 400)
+        self.assertEqual(self.post('bulk_reorder', {'ids': [1]}, kind='user').status_code, 404)
+        missing = self.post('bulk_reorder', {'ids': [self.categories[0].pk, 0]}, kind='category')
+        self.assertEqual(missing.status_code, 400)
+        self.assertEqual(set(Category.objects.values_list('sort_order', flat=True)), {0})
+        self.assertEqual(self.post('bulk_move_subcategories', {'ids': [self.subcategory.pk]}).status_code, 400)
+
+    def test_rows_cannot_move_into_a_category_being_deleted(self):
+        with self.captureOnCommitCallbacks():
+            deletion.schedule_category_deletion(self.categories[1])
+        target = {'category': self.categories[1].pk}
+        moved = self.post('bulk_move_subcategories', {'ids': [self.subcategory.pk], **target})
+        self.assertEqual(moved.status_code, 400)
+        recategorized = self.post('bulk_recategorize_products', {'ids': [self.products[0].pk], **target})
+        self.assertEqual(recategorized.status_code, 400)
+        self.assertEqual(recategorized.json(), {'error': f'Олдсонгүй: No category with id {self.categories[1].pk}'})
+        self.assertEqual(Product.objects.filter(category=self.categories[0]).count(), 4)
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bags, shoes = Category.objects.create(name='Bags'), Category.objects.create(name='Shoes')
+        totes = SubCategory.objects.create(category=bags, name='Totes')
+        Product.objects.create(category=bags, subcategory=totes, name='Tote', image='products/tote.png')
+        Product.objects.create(category=bags, name='Clutch')
+        Product.objects.create(category=shoes, name='Boot', image='products/boot.png')
+        Product.objects.create(category=Category.objects.create(name='Hidden', is_hidden=True), name='Ghost')
+
+    def get(self, **params):
+        response = self.client.get('/api/products/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_multi_valued_filters(self):
+        self.assertEqual(len(self.get(category='bags,shoes')), 3)
+        self.assertEqual([product['name'] for product in self.get(category='bags', has_image='true')], ['Tote'])
+        self.assertEqual([product['name'] for product in self.get(subcategory=['totes'])], ['Tote'])
+        self.assertEqual(len(self.get(created_after='2000-01-01', created_before='2999-12-31')), 3)
+        self.assertEqual(self.get(created_before='2000-01-01'), [])
+        self.assertEqual(self.client.get('/api/products/', {'created_after': 'soon'}).status_code, 400)
+
+    @override_settings(TIME_ZONE='Asia/Ulaanbaatar')
+    def test_date_filters_use_local_day_bounds_on_the_index(self):
+        # 2024-03-10 23:30 in Ulaanbaatar (UTC+8).
+        Product.objects.filter(name='Tote').update(created_at=datetime(2024, 3, 10, 15, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual([product['name'] for product in self.get(created_before='2024-03-10')], ['Tote'])
+        self.assertNotIn('Tote', [product['name'] for product in self.get(created_after='2024-03-11')])
+        with CaptureQueriesContext(connection) as queries:
+            self.get(created_after='2024-03-10', created_before='2024-03-10')
+        product_query = next(query['sql'] for query in queries.captured_queries if 'FROM "shop_product"' in query['sql'])
+        self.assertNotIn('django_datetime_cast_date', product_query)
+
+    def test_facets_exclude_their_own_dimension_and_are_cached(self):
+        body = self.get(category='bags', facets='1')
+        self.assertEqual(len(body['results']), 2)
+        facets = body['facets']
+        self.assertEqual(facets['total'], 2)
+        self.assertFalse(facets['estimated'])
+        self.assertEqual([(row['slug'], row['count']) for row in facets['categories']], [('bags', 2), ('shoes', 1)])
+        self.assertEqual(facets['subcategories'], [{'slug': 'totes', 'name': 'Totes', 'count': 1}])
+        self.assertEqual(facets['has_image'], {'true': 1, 'false': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get(category='bags', facets='1')
+        self.assertFalse(any('GROUP BY' in query['sql'] for query in queries.captured_queries))
+        Product.objects.create(category=Category.objects.get(slug='bags'), name='Backpack')
+        self.assertEqual(self.get(category='bags', facets='1')['facets']['total'], 3)
+
+    @override_settings(PRODUCT_FACET_EXACT_LIMIT=10, PRODUCT_FACET_SAMPLE_SIZE=20)
+    def test_large_catalog_facets_are_estimated_from_a_sample(self):
+        bags = Category.objects.get(slug='bags')
+        Product.objects.bulk_create([
+            Product(category=bags, name=f'Bag {index}', slug=f'bag-{index}') for index in range(96)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            facets = self.get(facets='1')['facets']
+        self.assertTrue(facets['estimated'])
+        counts = {row['slug']: row['count'] for row in facets['categories']}
+        self.assertAlmostEqual(counts['bags'], 98, delta=10)
+        self.assertAlmostEqual(facets['total'], 99, delta=10)
+        grouped = [
+            query['sql'] for query in queries.captured_queries
+            if 'GROUP BY' in query['sql'] and 'FROM "shop_product"' in query['sql']
+        ]
+        self.assertTrue(grouped and all('"shop_product"."id" >=' in sql for sql in grouped))
+
+
+class SitemapTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        settings = override_settings(SITEMAP_ROOT=self.root, SITEMAP_SHARD_SIZE=2, SITEMAP_CHUNK_SIZE=1)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.category = Category.objects.create(name='Bags')
+        SubCategory.objects.create(category=self.category, name='Totes')
+        self.products = [Product.objects.create(category=self.category, name=f'Tote {index}') for index in range(3)]
+
+    def shard(self, name):
+        with gzip.open(f'{self.root}/{name}') as shard:
+            return shard.read().decode()
+
+    def test_only_changed_shards_are_rewritten(self):
+        self.assertEqual(sitemap.build_sitemaps(), [
+            'category-0.xml.gz', 'subcategory-0.xml.gz', 'product-0.xml.gz', 'product-1.xml.gz',
+        ])
+        self.assertIn('<loc>https://darigangagoyol.mn/products/tote-2/</loc>', self.shard('product-1.xml.gz'))
+        self.assertIn('/categories/bags/totes/', self.shard('subcategory-0.xml.gz'))
+        with open(f'{self.root}/sitemap.xml') as index:
+            self.assertEqual(index.read().count('<sitemap>'), 4)
+        self.assertEqual(sitemap.build_sitemaps(), [])
+
+        self.products[0].name = 'Renamed'
+        self.products[0].slug = 'renamed'
+        self.products[0].save()
+        self.assertEqual(sitemap.build_sitemaps(), ['product-0.xml.gz'])
+        self.assertIn('/products/renamed/', self.shard('product-0.xml.gz'))
+
+        # New rows fill the open last shard, then start another.
+        Product.objects.create(category=self.category, name='Boot')
+        self.assertEqual(sitemap.build_sitemaps(), ['product-1.xml.gz'])
+        Product.objects.create(category=self.category, name='Clog')
+        self.assertEqual(sitemap.build_sitemaps(), ['product-2.xml.gz'])
+
+        self.category.name = 'Handbags'
+        self.category.slug = 'handbags'
+        self.category.save()
+        self.assertEqual(sitemap.build_sitemaps()[:2], ['category-0.xml.gz', 'subcategory-0.xml.gz'])
+        self.assertIn('/categories/handbags/totes/', self.shard('subcategory-0.xml.gz'))
+
+
+class ListExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        self.category = Category.objects.create(name='Bags')
+        for index in range(5):
+            product = Product.objects.create(
+                category=self.category, name=f'Tote {index}', description='=SUM(A1)', image='products/tote.png',
+            )
+            ProductImage.objects.create(product=product, image=f'products/gallery/{index}.png')
+        Product.objects.create(category=Category.objects.create(name='Shoes'), name='Boot')
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_csv_follows_list_filters_and_prefetches_per_chunk(self):
+        with CaptureQueriesContext(connection) as queries:
+            body = self.export('product_export', category='bags')
+        rows = list(csv.reader(io.StringIO(body.decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:2], ['ID', 'Нэр'])
+        self.assertEqual(sorted(row[1] for row in rows[1:]), [f'Tote {index}' for index in range(5)])
+        self.assertEqual(rows[1][6], "'=SUM(A1)")
+        self.assertEqual(rows[1][8], 'http://testserver/media/products/gallery/4.png')
+        # Session and user, then one product query and one gallery query per chunk of two.
+        self.assertEqual(sum('shop_productimage' in query['sql'] for query in queries.captured_queries), 3)
+
+    def test_xlsx_is_a_readable_workbook(self):
+        body = self.export('product_export', format='xlsx', search='Boot')
+        with zipfile.ZipFile(io.BytesIO(body)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+            self.assertIn('[Content_Types].xml', workbook.namelist())
+        self.assertEqual(sheet.count('<row>'), 2)
+        self.assertIn('>Boot<', sheet)
+
+    async def test_asgi_export_streams_chunk_by_chunk(self):
+        await self.async_client.aforce_login(await get_user_model().objects.aget(username='admin'))
+        with warnings.catch_warnings():
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume synchronous iterators')
+            with override_settings(EXPORT_CHUNK_SIZE=2):
+                response = await self.async_client.get(reverse('product_export'))
+                self.assertTrue(response.is_async)
+                chunks = [chunk async for chunk in response.streaming_content]
+        # Header and the first two rows, two more rows, then the last row.
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b''.join(chunks).decode('utf-8-sig').count('\r\n'), 7)
+
+    def test_category_and_landing_exports(self):
+        LandingPageContent.objects.create(title='Hero', section_type='hero')
+        LandingPageContent.objects.create(title='About', section_type='about')
+        self.assertIn('Bags', self.export('category_export', category_search='bag').decode('utf-8-sig'))
+        landing = self.export('landing_content_export', section='hero').decode('utf-8-sig')
+        self.assertIn('Hero', landing)
+        self.assertNotIn('About', landing)
+        self.assertEqual(self.client.get(reverse('product_export'), {'format': 'pdf'}).status_code, 400)
+
+
+class ProductUpsertTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user('erp', password='secret')
+        user.user_permissions.add(*Permission.objects.filter(codename__in=['add_product', 'change_product']))
+        self.client.force_login(user)
+        self.bags = Category.objects.create(name='Bags', slug='bags')
+        self.shoes = Category.objects.create(name='Shoes', slug='shoes')
+        self.totes = SubCategory.objects.create(category=self.bags, name='Totes', slug='totes')
+        self.existing = Product.objects.create(
+            category=self.bags, subcategory=self.totes, name='Old tote', slug='tote', external_id='ERP-1',
+        )
+
+    def upsert(self, records):
+        return self.client.post(reverse('product-bulk-upsert'), records, content_type='application/json')
+
+    def test_creates_and_updates_in_a_fixed_number_of_queries(self):
+        records = [{'external_id': 'ERP-1', 'name': 'Tote', 'category': 'shoes'}] + [
+            {'external_id': f'ERP-{index}', 'name': 'Boot', 'subcategory': 'totes'} for index in range(2, 102)
+        ]
+        # session user and permissions, category maps, existing rows, generated slugs,
+        # the upsert (two INSERT batches), the cards of the written rows, then
+        # dropping redirects from the new slugs
+        with self.assertNumQueries(16):
+            response = self.upsert(records)
+        summary = response.json()['summary']
+        self.assertEqual((summary['created'], summary['updated'], summary['error']), (100, 1, 0))
+
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.category, self.existing.subcategory), ('Tote', self.shoes, None))
+        self.assertEqual(self.existing.slug, 'tote')
+        created = Product.objects.filter(external_id__in=['ERP-2', 'ERP-3']).order_by('external_id')
+        self.assertEqual([(product.slug, product.category) for product in created], [('boot', self.bags), ('boot-1', self.bags)])
+        self.assertEqual(response.json()['results'][1]['id'], created[0].pk)
+
+    def test_rows_fail_individually(self):
+        Product.objects.create(category=self.bags, name='Taken', slug='taken')
+        response = self.upsert([
+            {'slug': 'tote', 'description': 'Canvas'},
+            {'name': 'No key', 'category': 'bags'},
+            {'external_id': 'ERP-9', 'name': 'Clash', 'slug': 'taken', 'category': 'bags'},
+            {'external_id': 'ERP-10', 'name': 'Lost', 'category': 'hats'},
+            {'slug': 'tote', 'name': 'Again'},
+        ])
+        self.assertEqual([result['status'] for result in response.json()['results']], ['updated'] + ['error'] * 4)
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.description, self.existing.external_id), ('Canvas', 'ERP-1'))
+
+    def test_a_constraint_failure_only_fails_its_own_record(self):
+        Product.objects.create(category=self.bags, name='Taken', slug='taken')
+        records = [
+            {'external_id': 'ERP-20', 'name': 'Fine', 'category': 'bags'},
+            {'external_id': 'ERP-21', 'name': 'Racer', 'category': 'bags'},
+        ]
+        # As if another writer took the generated slug after it was picked.
+        with mock.patch('shop.upsert._free_slugs', return_value=['fine', 'taken']):
+            results = self.upsert(records).json()['results']
+        self.assertEqual([result['status'] for result in results], ['created', 'error'])
+        self.assertIn('UNIQUE', results[1]['errors']['non_field_errors'][0])
+        self.assertEqual(Product.objects.get(external_id='ERP-20').slug, 'fine')
+        self.assertFalse(Product.objects.filter(external_id='ERP-21').exists())
+
+    def test_requires_product_permissions(self):
+        self.client.force_login(get_user_model().objects.create_user('viewer', password='secret'))
+        self.assertEqual(self.upsert([{'slug': 'tote', 'name': 'Hacked'}]).status_code, 403)
+        adder = get_user_model().objects.create_user('adder', password='secret')
+        adder.user_permissions.add(Permission.objects.get(codename='add_product'))
+        self.client.force_login(adder)
+        self.assertEqual(self.upsert([{'slug': 'tote', 'name': 'Hacked'}]).status_code, 403)
+        self.client.logout()
+        self.assertIn(self.upsert([{'slug': 'tote', 'name': 'Hacked'}]).status_code, (401, 403))
+        self.assertEqual(Product.objects.get(pk=self.existing.pk).name, 'Old tote')
+
+
+def seed_catalog(size):
+    """Grow the catalog to ``size`` categories of ``size`` subcategories each."""
+    for category_index in range(Category.objects.count(), size):
+        category = Category.objects.create(name=f'Category {category_index}', sort_order=category_index)
+        Banner.objects.create(image=f'banners/{category_index}.png', order=category_index)
+        LandingPageContent.objects.create(title=f'Section {category_index}', sort_order=category_index)
+    for category in Category.objects.all():
+        for sub_index in range(category.subcategories.count(), size):
+            subcategory = SubCategory.objects.create(category=category, name=f'{category.name} sub {sub_index}')
+            product = Product.objects.create(
+                category=category,
+                subcategory=subcategory,
+                name=f'{subcategory.name} product',
+                image='products/main.png',
+            )
+            ProductImage.objects.bulk_create(
+                ProductImage(product=product, image=f'products/gallery/{index}.png', sort_order=index)
+                for index in range(2)
+            )
+
+
+URL_OBJECT_MODELS = {
+    'category': Category,
+    'product': Product,
+    'landing_content': LandingPageContent,
+    'banner': Banner,
+}
+SKIPPED_URL_NAMES = {
+    'dashboard_stream', 'readiness',
+    # POST-only bulk edits
+    'bulk_reorder', 'bulk_move_subcategories', 'bulk_recategorize_products', 'product-bulk-upsert',
+}
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+
+    def test_generate_catalog_fills_every_model(self):
+        cache.clear()
+        self.assertEqual(self.client.get(reverse('landing')).json()['banners'], [])
+        self.assertEqual(listing.product_count({'search': 'synthetic'}), 0)
+        with override_settings(MEDIA_ROOT=self.root):
+            call_command(
+                'generate_catalog', '--products', '12', '--categories', '2', '--subcategories', '2', '--images', '2',
+                '--banners', '1', '--landing-contents', '3', '--batch-size', '5', stdout=io.StringIO(),
+            )
+        models = (Category, SubCategory, Product, ProductImage, Banner, LandingPageContent)
+        self.assertEqual([model.objects.count() for model in models], [2, 4, 12, 24, 1, 3])
+        self.assertTrue((self.root / 'products' / 'placeholder.png').exists())
+        self.assertTrue(all(product.card['name'] for product in Product.objects.all()))
+        self.assertEqual(len(self.client.get(reverse('landing')).json()['banners']), 1)
+        self.assertEqual(listing.product_count({'search': 'synthetic'}), 12)
+
+    def test_regression_against_the_baseline_fails_the_command(self):
+        result = {'throughput_rps': 100.0, 'p50_ms': 5.0, 'p95_ms': 9.0, 'p99_ms': 10.0, 'errors': 0}
+        baseline = self.root / 'baseline.json'
+        baseline.write_text(json.dumps({'results': {'/api/products/': {**result, 'throughput_rps': 200.0}}}))
+        options = ['--duration', '0', '--output', str(self.root / 'current.json'), '--compare', str(baseline)]
+        with mock.patch('shop.management.commands.run_benchmark.run_load', return_value=result):
+            with self.assertRaisesMessage(CommandError, '1 scenario(s) regressed'):
+                call_command('run_benchmark', *options, stdout=io.StringIO())
+            call_command('run_benchmark', *options, '--tolerance', '0.6', stdout=io.StringIO())
+        self.assertEqual(json.loads((self.root / 'current.json').read_text())['results']['/api/products/'], result)
+
+
+class QueryScalingTests(TestCase):
+    """Every route must run the same number of queries whatever the catalog size."""
+
+    CATALOG_SIZES = (2, 5)
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+
+    def url_for(self, pattern):
+        kwargs = {}
+        for field in ('pk', 'slug'):
+            if field in getattr(pattern.pattern, 'converters', {}) or field in pattern.pattern.regex.groupindex:
+                name = pattern.name.replace('-', '_').removeprefix('async_')
+                model = next(model for prefix, model in URL_OBJECT_MODELS.items() if name.startswith(prefix))
+                kwargs[field] = model.objects.order_by('pk').values_list(field, flat=True).first()
+        return reverse(pattern.name, kwargs=kwargs)
+
+    def capture_all_routes(self):
+        import shop.urls
+
+        captured = {}
+        for pattern in warmup.named_patterns(shop.urls.urlpatterns):
+            if pattern.name in SKIPPED_URL_NAMES or pattern.name in captured:
+                continue
+            url = self.url_for(pattern)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertLess(response.status_code, 400, url)
+            captured[pattern.name] = (url, [query['sql'] for query in queries.captured_queries])
+        return captured
+
+    def test_query_counts_do_not_grow_with_catalog_size(self):
+        runs = []
+        for size in self.CATALOG_SIZES:
+            seed_catalog(size)
+            runs.append(self.capture_all_routes())
+
+        baseline = runs[0]
+        for run, size in zip(runs[1:], self.CATALOG_SIZES[1:]):
+            for name, (url, statements) in run.items():
+                with self.subTest(url=url, size=size):
+                    expected = len(baseline[name][1])
+                    self.assertLessEqual(
+                        len(statements), expected,
+                        f'{url} grew from {expected} to {len(statements)} queries:\n{describe_repeated(statements)}',
+                    )
+
+
+@override_settings(QUERY_BUDGET=1, QUERY_BUDGET_ACTION='raise')
+class QueryBudgetMiddlewareTests(TestCase):
+    def test_requests_over_budget_raise_with_repeated_sql(self):
+        from .middleware import QueryBudgetExceeded
+
+        cache.clear()
+
+        self.client.force_login(get_user_model().objects.create_user('admin', password='secret'))
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'dashboard ran'):
+            self.client.get(reverse('dashboard'))
+
+    @override_settings(QUERY_BUDGET_OVERRIDES={'banner-list': 5})
+    def test_overrides_raise_the_budget_per_view(self):
+        self.assertEqual(self.client.get('/api/banners/').status_code, 200)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_MIN_INTERVAL=60)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # With a zero threshold every query is logged, including the test case's own
+        # transaction handling, so the whole class writes to a temporary file.
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.log_path = Path(directory.name) / 'slow_queries.jsonl'
+        handler = slowlog.JsonLinesHandler(cls.log_path, delay=True)
+        cls.addClassCleanup(handler.close)
+        patcher = mock.patch.object(slowlog.logger, 'handlers', [handler])
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        super().setUpClass()
+
+    def setUp(self):
+        slowlog._last_logged.clear()
+        slowlog._suppressed.clear()
+        Product.objects.create(category=Category.objects.create(name='Bags'), name='Tote')
+
+    def test_records_are_written_as_json_lines(self):
+        list(Product.objects.filter(name='Tote'))
+        records = list(slowlog.read_records(self.log_path))
+        self.assertTrue(any('FROM "shop_product"' in record['sql'] for record in records))
+        self.assertTrue(all(record['plan'] for record in records if record['sql'].startswith('SELECT')))
+
+    def test_slow_queries_are_logged_with_view_and_plan(self):
+        with self.assertLogs('shop.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/products/?category=bags')
+        records = [record.slow_query for record in logs.records]
+        product_query = next(record for record in records if 'FROM "shop_product"' in record['sql'])
+        self.assertEqual(product_query['view'], 'product-list')
+        self.assertIn('"shop_category"."slug" IN (...)', product_query['sql'])
+        self.assertTrue(product_query['plan'])
+        self.assertEqual(len(product_query['params_fingerprint']), 16)
+
+    def test_repeats_are_rate_limited_and_counted_as_suppressed(self):
+        with self.assertLogs('shop.slow_queries', 'WARNING') as logs:
+            for _ in range(3):
+                list(Product.objects.filter(name='Tote'))
+            slowlog._last_logged.clear()
+            list(Product.objects.filter(name='Tote'))
+        self.assertEqual([record.slow_query['suppressed'] for record in logs.records], [0, 2])
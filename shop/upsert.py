@@ -0,0 +1,242 @@
+"""Bulk product upsert for ERP/PIM synchronization.
+
+Records are validated one by one without touching the database, then
+written ``PRODUCT_UPSERT_CHUNK_SIZE`` at a time. Each chunk costs a fixed
+number of queries however many rows it holds: one to load the existing
+products it names, one ``bulk_create(update_conflicts=True)`` per key kind
+followed by a rebuild of the written rows' cards, and rarely one to resolve
+a clashing generated slug. When a statement breaks a constraint, its rows
+are retried one by one so only the offending records fail. A renamed slug is kept as a ``SlugRedirect``, and a
+redirect from a slug taken again is dropped (one or two more queries when a
+chunk creates or renames products). Categories and
+subcategories are resolved from slug maps loaded once per call. A record is
+keyed by ``external_id`` when it has one and by ``slug`` otherwise. Fields
+a record leaves out keep their current values.
+"""
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from rest_framework.exceptions import ValidationError
+
+from .cards import rebuild_cards
+from .details import record_slug_changes
+from .models import Category, SubCategory, Product
+from .serializers import ProductUpsertSerializer
+
+# Columns an upsert may change; created_at is only set on insert.
+WRITTEN_FIELDS = ('name', 'description', 'category_id', 'subcategory_id')
+UPDATE_FIELDS = {
+    'external_id': ['slug', 'name', 'description', 'category', 'subcategory', 'updated_at'],
+    'slug': ['name', 'description', 'category', 'subcategory', 'updated_at'],
+}
+
+
+def _chunk_size():
+    return getattr(settings, 'PRODUCT_UPSERT_CHUNK_SIZE', 500)
+
+
+def _catalog_maps():
+    categories = dict(Category.objects.filter(is_hidden=False).values_list('slug', 'id'))
+    subcategories = {
+        slug: (pk, category_id)
+        for slug, pk, category_id in SubCategory.objects.filter(category__is_hidden=False)
+        .values_list('slug', 'id', 'category_id')
+    }
+    return categories, subcategories
+
+
+def _validate(records):
+    """Split ``records`` into ``[(index, data)]`` and ``{index: errors}``."""
+    serializer = ProductUpsertSerializer()
+    valid, errors = [], {}
+    for index, record in enumerate(records):
+        try:
+            valid.append((index, serializer.run_validation(record)))
+        except ValidationError as exc:
+            errors[index] = exc.detail
+    return valid, errors
+
+
+def _free_slugs(bases, taken):
+    """Pick ``base``, ``base-1``, ... for each base, skipping ``taken`` and slugs in the database."""
+    taken |= set(Product.objects.filter(slug__in=set(bases)).values_list('slug', flat=True))
+    slugs, expanded = [], set()
+    for base in bases:
+        slug, counter = base, 1
+        if slug in taken and base not in expanded:
+            taken |= set(Product.objects.filter(slug__startswith=f'{base}-').values_list('slug', flat=True))
+            expanded.add(base)
+        while slug in taken:
+            slug = f'{base}-{counter}'
+            counter += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+class _Chunk:
+    """Resolves one chunk of validated records against the rows they name."""
+
+    def __init__(self, rows, categories, subcategories, seen):
+        self.rows = rows
+        self.categories = categories
+        self.subcategories = subcategories
+        self.seen = seen
+        external_ids = [data['external_id'] for _, data in rows if data.get('external_id')]
+        slugs = [data['slug'] for _, data in rows if data.get('slug')]
+        existing = Product.objects.filter(Q(external_id__in=external_ids) | Q(slug__in=slugs)).values(
+            'id', 'slug', 'external_id', *WRITTEN_FIELDS,
+        )
+        self.by_external_id, self.by_slug = {}, {}
+        for product in existing:
+            self.by_slug[product['slug']] = product
+            if product['external_id']:
+                self.by_external_id[product['external_id']] = product
+
+    def resolve(self, data):
+        """Return ``(key kind, current row or None, column values)`` or raise ValueError."""
+        kind = 'external_id' if data.get('external_id') else 'slug'
+        key = (kind, data[kind])
+        if key in self.seen:
+            raise ValueError(f'Duplicate {kind} {data[kind]!r} in this request')
+        self.seen.add(key)
+        current = (self.by_external_id if kind == 'external_id' else self.by_slug).get(data[kind])
+
+        values = {field: current[field] for field in WRITTEN_FIELDS} if current else {'description': ''}
+        values['slug'] = current['slug'] if current else None
+        values['external_id'] = current['external_id'] if current else data.get('external_id')
+        for field in ('name', 'description', 'slug'):
+            if field in data:
+                values[field] = data[field]
+        if kind == 'external_id' and 'slug' in data:
+            if ('slug', data['slug']) in self.seen:
+                raise ValueError(f'Duplicate slug {data["slug"]!r} in this request')
+            self.seen.add(('slug', data['slug']))
+            owner = self.by_slug.get(data['slug'])
+            if owner is not None and (current is None or owner['id'] != current['id']):
+                raise ValueError(f'Slug {data["slug"]!r} belongs to another product')
+
+        if data.get('subcategory'):
+            if data['subcategory'] not in self.subcategories:
+                raise ValueError(f'Unknown subcategory {data["subcategory"]!r}')
+            values['subcategory_id'], values['category_id'] = self.subcategories[data['subcategory']]
+        elif data.get('category'):
+            if data['category'] not in self.categories:
+                raise ValueError(f'Unknown category {data["category"]!r}')
+            category_id = self.categories[data['category']]
+            if values.get('category_id') != category_id:
+                # A subcategory always belongs to the product's category.
+                values['subcategory_id'] = None
+            values['category_id'] = category_id
+        if not values.get('category_id'):
+            raise ValueError('category is required for new products')
+        if not values.get('name'):
+            raise ValueError('name is required for new products')
+        return kind, current, values
+
+
+def _write(kind, products):
+    Product.objects.bulk_create(
+        products,
+        update_conflicts=True,
+        unique_fields=[kind],
+        update_fields=UPDATE_FIELDS[kind],
+    )
+
+
+def _error(index, exc):
+    return {'index': index, 'status': 'error', 'errors': {'non_field_errors': [str(exc)]}}
+
+
+def _write_group(kind, group, results):
+    """Write ``group`` in one statement and return the rows written.
+
+    If the statement fails, each row is retried in its own savepoint, so
+    only the records that break a constraint are reported as errors.
+    """
+    if not group:
+        return group
+    try:
+        with transaction.atomic():
+            _write(kind, [product for _, _, product in group])
+        return group
+    except IntegrityError as exc:
+        if len(group) == 1:
+            results[group[0][0]] = _error(group[0][0], exc)
+            return []
+    written = []
+    for row in group:
+        try:
+            with transaction.atomic():
+                _write(kind, [row[2]])
+        except IntegrityError as exc:
+            results[row[0]] = _error(row[0], exc)
+        else:
+            written.append(row)
+    return written
+
+
+def upsert_products(records):
+    """Create or update products from ERP ``records``; return ``(summary, results)``.
+
+    ``results`` has one entry per record, in order, with its ``status``
+    (``created``, ``updated`` or ``error``) and the product ``id`` and
+    ``slug``, or its ``errors``.
+    """
+    started = time.perf_counter()
+    categories, subcategories = _catalog_maps()
+    valid, errors = _validate(records)
+    results = [None] * len(records)
+    for index, detail in errors.items():
+        results[index] = {'index': index, 'status': 'error', 'errors': detail}
+
+    seen = set()
+    size = _chunk_size()
+    for start in range(0, len(valid), size):
+        chunk = _Chunk(valid[start:start + size], categories, subcategories, seen)
+        pending = {'external_id': [], 'slug': []}
+        unslugged = []
+        for index, data in chunk.rows:
+            try:
+                kind, current, values = chunk.resolve(data)
+            except ValueError as exc:
+                results[index] = _error(index, exc)
+                continue
+            product = Product(**values)
+            if not product.slug:
+                unslugged.append(product)
+            pending[kind].append((index, current, product))
+
+        taken = {product.slug for group in pending.values() for _, _, product in group if product.slug}
+        for product, slug in zip(unslugged, _free_slugs([slugify(product.name) for product in unslugged], taken)):
+            product.slug = slug
+
+        for kind, group in pending.items():
+            group = _write_group(kind, group, results)
+            if not group:
+                continue
+            rebuild_cards(Product.objects.filter(pk__in=[product.pk for _, _, product in group]))
+            record_slug_changes('product', [
+                (product.pk, current['slug'] if current else None, product.slug) for _, current, product in group
+            ])
+            for index, current, product in group:
+                results[index] = {
+                    'index': index,
+                    'status': 'updated' if current else 'created',
+                    'id': product.pk,
+                    'slug': product.slug,
+                }
+
+    if any(result['status'] != 'error' for result in results):
+        from .signals import invalidate_after_bulk_write
+
+        invalidate_after_bulk_write(Product)
+    elapsed = time.perf_counter() - started
+    summary = {
+        status: sum(result['status'] == status for result in results) for status in ('created', 'updated', 'error')
+    }
+    summary.update(total=len(records), elapsed_ms=round(elapsed * 1000, 1))
+    return summary, results
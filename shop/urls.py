@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from . import views
+from . import async_api, views
 
 router = DefaultRouter()
 router.register('banners', views.BannerViewSet, basename='banner')
@@ -9,23 +9,38 @@ router.register('categories', views.CategoryViewSet, basename='category')
 router.register('products', views.ProductViewSet, basename='product')
 
 urlpatterns = [
+    # Readiness probe
+    path('readyz/', views.readiness, name='readiness'),
+    path('metrics', views.metrics, name='metrics'),
+
     # Dashboard
     path('', views.dashboard, name='dashboard'),
+    path('dashboard/stream/', views.dashboard_stream, name='dashboard_stream'),
 
     # Category URLs
     path('categories/', views.category_list, name='category_list'),
+    path('categories/export/', views.category_export, name='category_export'),
     path('categories/create/', views.category_create, name='category_create'),
     path('categories/<int:pk>/edit/', views.category_edit, name='category_edit'),
     path('categories/<int:pk>/delete/', views.category_delete, name='category_delete'),
+    path('categories/deletions/', views.category_deletions, name='category_deletions'),
 
     # Product URLs
     path('products/', views.product_list, name='product_list'),
+    path('products/rows/', views.product_list_rows, name='product_list_rows'),
+    path('products/export/', views.product_export, name='product_export'),
     path('products/create/', views.product_create, name='product_create'),
     path('products/<int:pk>/edit/', views.product_edit, name='product_edit'),
     path('products/<int:pk>/delete/', views.product_delete, name='product_delete'),
 
+    # Bulk edits
+    path('reorder/<str:kind>/', views.bulk_reorder, name='bulk_reorder'),
+    path('subcategories/move/', views.bulk_move_subcategories, name='bulk_move_subcategories'),
+    path('products/recategorize/', views.bulk_recategorize_products, name='bulk_recategorize_products'),
+
     # Landing Page Content URLs
     path('landing-contents/', views.landing_content_list, name='landing_content_list'),
+    path('landing-contents/export/', views.landing_content_export, name='landing_content_export'),
     path('landing-contents/create/', views.landing_content_create, name='landing_content_create'),
     path('landing-contents/<int:pk>/edit/', views.landing_content_edit, name='landing_content_edit'),
     path('landing-contents/<int:pk>/delete/', views.landing_content_delete, name='landing_content_delete'),
@@ -37,6 +52,16 @@ urlpatterns = [
     path('banners/<int:pk>/delete/', views.banner_delete, name='banner_delete'),
 
     # API
+    path('api/landing/', views.landing, name='landing'),
     path('api/', include(router.urls)),
+
+    # Native async API (same response shapes as the viewsets above)
+    path('api/async/banners/', async_api.banner_list, name='async_banner_list'),
+    path('api/async/banners/<int:pk>/', async_api.banner_detail, name='async_banner_detail'),
+    path('api/async/categories/', async_api.category_list, name='async_category_list'),
+    path('api/async/categories/<int:pk>/', async_api.category_detail, name='async_category_detail'),
+    path('api/async/products/', async_api.product_list, name='async_product_list'),
+    path('api/async/products/cards/', async_api.product_cards, name='async_product_cards'),
+    path('api/async/products/<int:pk>/', async_api.product_detail, name='async_product_detail'),
 ]
 
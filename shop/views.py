@@ -1,58 +1,111 @@
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_POST, require_safe
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.db.models import Q, Count, Max
 from django.forms import inlineformset_factory
-from rest_framework import viewsets
-
-from .models import Category, Product, Banner, LandingPageContent, SubCategory, ProductImage
-from .forms import CategoryForm, SubCategoryForm, ProductForm, LandingPageContentForm, BannerForm
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Category, Product, Banner, LandingPageContent, SubCategory, ProductImage, CategoryDeletionJob
+from .forms import CategoryForm, SubCategoryForm, SubCategoryInlineFormSet, ProductForm, LandingPageContentForm, BannerForm
+from .bulk import REORDERABLE, move_subcategories, recategorize_products, reorder
+from .cards import absolute_card, card_rows
+from .deletion import schedule_category_deletion
+from .details import absolute_detail, get_detail
+from .export import category_columns, export_response, landing_content_columns, product_columns
+from .fragments import render_rows
+from .landing import get_landing_payload
+from .listing import api_product_filters, filter_products, product_count, product_facets, product_page
+from .live import broadcaster
+from .metrics import SerializationTimingMixin, render_prometheus, timed
+from .renderers import API_RENDERER_CLASSES
 from .serializers import CategorySerializer, ProductSerializer, BannerSerializer
+from .stats import get_dashboard_stats
+from .upsert import upsert_products
+from .warmup import ensure_warm_up_started, is_ready
 
 
 @login_required
 def dashboard(request):
     """Main admin dashboard"""
-    top_level_categories = Category.objects.all().order_by('sort_order', 'name')
-
-    context = {
-        'total_categories': top_level_categories.count(),
-        'total_subcategories': SubCategory.objects.count(),
-        'total_products': Product.objects.count(),
-        'total_banners': Banner.objects.count(),
-        'total_landing_contents': LandingPageContent.objects.count(),
-        'recent_products': Product.objects.select_related('category', 'subcategory').order_by('-created_at')[:5],
-        'top_categories': top_level_categories.annotate(
-            product_total=Count('products'),
-            subcategory_count=Count('subcategories')
-        ).order_by('-product_total', 'name')[:5],
-    }
+    # Only an ASGI server can hold the live stream open without tying up a worker thread.
+    context = {**get_dashboard_stats(), 'live_updates': isinstance(request, ASGIRequest)}
     return render(request, 'shop/dashboard.html', context)
 
 
+@login_required
+async def dashboard_stream(request):
+    """Server-Sent Events feed of dashboard counters; serve it through ASGI."""
+    if not isinstance(request, ASGIRequest):
+        # WSGI would collect the endless stream into a list; 204 tells EventSource not to reconnect.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(broadcaster.stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def readiness(request):
+    """Report ready only once this process has finished warming up"""
+    if is_ready():
+        return JsonResponse({'status': 'ready'})
+    ensure_warm_up_started()
+    return JsonResponse({'status': 'warming'}, status=503)
+
+
+def metrics(request):
+    """Per-view latency histograms in the Prometheus text format"""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # Category Views
+def _filtered_categories(request):
+    categories = Category.objects.filter(is_hidden=False)
+    category_search = request.GET.get('category_search', '')
+    if category_search:
+        categories = categories.filter(name__icontains=category_search)
+    return categories.order_by('sort_order', 'name')
+
+
 @login_required
 def category_list(request):
     """Manage categories and subcategories from a single page"""
     category_search = request.GET.get('category_search', '')
-
-    categories = Category.objects.all()
-    if category_search:
-        categories = categories.filter(name__icontains=category_search)
-    categories = categories.annotate(subcategory_count=Count('subcategories')).prefetch_related('subcategories').order_by('sort_order', 'name')
+    categories = _filtered_categories(request).annotate(subcategory_count=Count('subcategories'))
 
     context = {
         'categories': categories,
+        'rows': render_rows('category', categories, request),
         'category_search': category_search,
+        'deletion_jobs': CategoryDeletionJob.objects.exclude(status='done'),
     }
     return render(request, 'shop/category_list.html', context)
 
 
+@login_required
+def category_export(request):
+    """Stream the filtered category list as CSV or XLSX"""
+    categories = _filtered_categories(request).prefetch_related('subcategories')
+    return export_response(request, 'categories', categories, category_columns)
+
+
 SubCategoryFormSet = inlineformset_factory(
     Category,
     SubCategory,
     form=SubCategoryForm,
+    formset=SubCategoryInlineFormSet,
     extra=1,
     can_delete=True,
 )
@@ -91,7 +144,7 @@ def category_create(request):
 @login_required
 def category_edit(request, pk):
     """Edit an existing category"""
-    category = get_object_or_404(Category, pk=pk)
+    category = get_object_or_404(Category, pk=pk, is_hidden=False)
 
     if request.method == 'POST':
         form = CategoryForm(request.POST, request.FILES, instance=category)
@@ -121,50 +174,93 @@ def category_edit(request, pk):
 @login_required
 def category_delete(request, pk):
     """Delete a category"""
-    category = get_object_or_404(Category, pk=pk)
+    category = get_object_or_404(Category, pk=pk, is_hidden=False)
 
     if request.method == 'POST':
-        category.delete()
-        messages.success(request, 'Ангилал амжилттай устгагдлаа!')
+        schedule_category_deletion(category)
+        messages.success(request, 'Ангиллыг нууж, устгах ажлыг эхлүүллээ. Явцыг доор харна уу.')
         return redirect('category_list')
 
     return render(request, 'shop/category_confirm_delete.html', {'category': category})
 
 
-# Product Views
 @login_required
-def product_list(request):
-    """List all products"""
-    search_query = request.GET.get('search', '')
-    category_slug = request.GET.get('category', '')
-    subcategory_slug = request.GET.get('subcategory', '')
+def category_deletions(request):
+    """Progress of unfinished category deletions, polled by the category list"""
+    jobs = CategoryDeletionJob.objects.exclude(status='done')
+    return JsonResponse({'jobs': [
+        {
+            'id': job.pk,
+            'category': job.category_name,
+            'status': job.status,
+            'percent': job.percent,
+            'products_deleted': job.products_deleted,
+            'products_total': job.products_total,
+            'error': job.error,
+        }
+        for job in jobs
+    ]})
 
-    products = Product.objects.select_related('category', 'subcategory').prefetch_related('images')
 
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+# Product Views
+def _product_filters(request):
+    return {
+        'search': request.GET.get('search', ''),
+        'category': request.GET.get('category', ''),
+        'subcategory': request.GET.get('subcategory', ''),
+    }
 
-    if category_slug:
-        products = products.filter(category__slug=category_slug)
-    if subcategory_slug:
-        products = products.filter(subcategory__slug=subcategory_slug)
 
-    products = products.order_by('-created_at')
+@login_required
+def product_list(request):
+    """List products one keyset page at a time; further pages load on scroll"""
+    filters = _product_filters(request)
+    products, next_cursor = product_page(filters, request.GET.get('after', ''))
+
+    # Only the selected category's subcategories are offered in the filter.
+    subcategories = SubCategory.objects.none()
+    if filters['category']:
+        subcategories = SubCategory.objects.filter(category__slug=filters['category'])
+    elif filters['subcategory']:
+        subcategories = SubCategory.objects.filter(category__subcategories__slug=filters['subcategory'])
 
     context = {
         'products': products,
-        'categories': Category.objects.all().order_by('sort_order', 'name'),
-        'subcategories': SubCategory.objects.select_related('category').order_by('category__name', 'name'),
-        'search_query': search_query,
-        'category_filter': category_slug,
-        'subcategory_filter': subcategory_slug,
+        'rows': render_rows('product', products, request),
+        'next_cursor': next_cursor,
+        'total_count': product_count(filters),
+        'categories': Category.objects.filter(is_hidden=False).only('name', 'slug').order_by('sort_order', 'name'),
+        'subcategories': subcategories.only('name', 'slug').order_by('sort_order', 'name'),
+        'search_query': filters['search'],
+        'category_filter': filters['category'],
+        'subcategory_filter': filters['subcategory'],
     }
     return render(request, 'shop/product_list.html', context)
 
 
+@login_required
+def product_export(request):
+    """Stream the filtered product list as CSV or XLSX"""
+    products = filter_products(
+        Product.objects.filter(category__is_hidden=False)
+        .select_related('category', 'subcategory').prefetch_related('images').order_by('-created_at', '-pk'),
+        **_product_filters(request),
+    )
+    return export_response(request, 'products', products, product_columns)
+
+
+@login_required
+def product_list_rows(request):
+    """Next page of product table rows as an HTML fragment for infinite scroll"""
+    products, next_cursor = product_page(_product_filters(request), request.GET.get('after', ''))
+    return JsonResponse({
+        'html': render_to_string(
+            'shop/includes/product_rows.html', {'rows': render_rows('product', products, request)}, request,
+        ),
+        'next': next_cursor,
+    })
+
+
 @login_required
 def product_create(request):
     """Create a new product"""
@@ -249,28 +345,89 @@ def product_delete(request, pk):
     return render(request, 'shop/product_confirm_delete.html', {'product': product})
 
 
-# Landing Page Content Views
+# Bulk edits (JSON bodies posted by the drag-and-drop lists)
+def _bulk_payload(request):
+    """Return the posted JSON object and its list of integer ``ids``, or raise ValueError."""
+    payload = json.loads(request.body or b'{}')
+    ids = payload.get('ids') if isinstance(payload, dict) else None
+    if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+        raise ValueError('ids')
+    return payload, ids
+
+
+def _bulk_response(run):
+    try:
+        updated = run()
+    except (KeyError, ValueError, TypeError):
+        return JsonResponse({'error': 'Буруу хүсэлт: ids жагсаалт болон зорилтот ангилал шаардлагатай.'}, status=400)
+    except ObjectDoesNotExist as exc:
+        return JsonResponse({'error': f'Олдсонгүй: {exc}'}, status=400)
+    return JsonResponse({'updated': updated})
+
+
 @login_required
-def landing_content_list(request):
-    """List all landing page contents"""
-    search_query = request.GET.get('search', '')
-    section_filter = request.GET.get('section', '')
+@require_POST
+def bulk_reorder(request, kind):
+    """Save a new order for categories, subcategories, banners or gallery images"""
+    if kind not in REORDERABLE:
+        return JsonResponse({'error': f'Эрэмбэлэх боломжгүй төрөл: {kind}'}, status=404)
+
+    def run():
+        _, ids = _bulk_payload(request)
+        return reorder(kind, ids)
+    return _bulk_response(run)
 
-    contents = LandingPageContent.objects.all()
 
+@login_required
+@require_POST
+def bulk_move_subcategories(request):
+    """Move subcategories (with their products) to another category"""
+    def run():
+        payload, ids = _bulk_payload(request)
+        return move_subcategories(ids, int(payload['category']))
+    return _bulk_response(run)
+
+
+@login_required
+@require_POST
+def bulk_recategorize_products(request):
+    """Move products to another category or subcategory"""
+    def run():
+        payload, ids = _bulk_payload(request)
+        category, subcategory = payload.get('category'), payload.get('subcategory')
+        return recategorize_products(
+            ids,
+            int(category) if category is not None else None,
+            int(subcategory) if subcategory is not None else None,
+        )
+    return _bulk_response(run)
+
+
+# Landing Page Content Views
+def _filtered_landing_contents(request):
+    contents = LandingPageContent.objects.all()
+    search_query = request.GET.get('search', '')
     if search_query:
         contents = contents.filter(
             Q(title__icontains=search_query) |
             Q(content__icontains=search_query)
         )
-
+    section_filter = request.GET.get('section', '')
     if section_filter:
         contents = contents.filter(section_type=section_filter)
+    return contents.order_by('sort_order')
+
 
-    contents = contents.order_by('sort_order')
+@login_required
+def landing_content_list(request):
+    """List all landing page contents"""
+    search_query = request.GET.get('search', '')
+    section_filter = request.GET.get('section', '')
+    contents = _filtered_landing_contents(request)
 
     context = {
         'contents': contents,
+        'rows': render_rows('landing_content', contents, request),
         'search_query': search_query,
         'section_filter': section_filter,
         'section_types': LandingPageContent.SECTION_TYPES,
@@ -278,6 +435,12 @@ def landing_content_list(request):
     return render(request, 'shop/landing_content_list.html', context)
 
 
+@login_required
+def landing_content_export(request):
+    """Stream the filtered landing page contents as CSV or XLSX"""
+    return export_response(request, 'landing-contents', _filtered_landing_contents(request), landing_content_columns)
+
+
 @login_required
 def landing_content_create(request):
     """Create a new landing page content"""
@@ -324,7 +487,20 @@ def landing_content_delete(request, pk):
 
 
 # API ViewSets
-class BannerViewSet(viewsets.ReadOnlyModelViewSet):
+@require_safe
+def landing(request):
+    """Home page sections, banners and featured categories in one cached response"""
+    etag, body = get_landing_payload(request)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'LANDING_PAYLOAD_MAX_AGE', 0))
+    return response
+
+
+class BannerViewSet(SerializationTimingMixin, viewsets.ReadOnlyModelViewSet):
+    renderer_classes = API_RENDERER_CLASSES
     queryset = Banner.objects.all().order_by('order', 'id')
     serializer_class = BannerSerializer
 
@@ -333,7 +509,10 @@ class BannerViewSet(viewsets.ReadOnlyModelViewSet):
 @login_required
 def banner_list(request):
     banners = Banner.objects.all().order_by('order', 'id')
-    return render(request, 'shop/banner_list.html', {'banners': banners})
+    return render(request, 'shop/banner_list.html', {
+        'banners': banners,
+        'rows': render_rows('banner', banners, request),
+    })
 
 
 @login_required
@@ -373,19 +552,83 @@ def banner_delete(request, pk):
     return render(request, 'shop/banner_confirm_delete.html', {'banner': banner})
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+def _slug_detail_response(request, kind, slug):
+    """Cached detail for ``slug``; a former slug also names the current URL in Content-Location."""
+    with timed('serialize'):
+        data = get_detail(kind, slug)
+        if data is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        data = absolute_detail(request, data)
+    response = Response(data)
+    if data['slug'] != slug:
+        response['Content-Location'] = reverse(f'{kind}-by-slug', kwargs={'slug': data['slug']})
+    return response
+
+
+class CategoryViewSet(SerializationTimingMixin, viewsets.ReadOnlyModelViewSet):
+    renderer_classes = API_RENDERER_CLASSES
     serializer_class = CategorySerializer
 
     def get_queryset(self):
-        return Category.objects.all().order_by('sort_order', 'name').prefetch_related('subcategories')
+        return Category.objects.filter(is_hidden=False).order_by('sort_order', 'name').prefetch_related('subcategories')
+
+    @action(detail=False, methods=['get'], url_path=r'by-slug/(?P<slug>[-\w]+)')
+    def by_slug(self, request, slug):
+        """Category detail by current or former slug, cached per category"""
+        return _slug_detail_response(request, 'category', slug)
+
 
+class UpsertPermissions(permissions.DjangoModelPermissions):
+    """An upsert both creates and overwrites rows, so POST needs add and change permissions."""
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+    perms_map = {
+        **permissions.DjangoModelPermissions.perms_map,
+        'POST': ['%(app_label)s.add_%(model_name)s', '%(app_label)s.change_%(model_name)s'],
+    }
+
+
+class ProductViewSet(SerializationTimingMixin, viewsets.ReadOnlyModelViewSet):
+    renderer_classes = API_RENDERER_CLASSES
     serializer_class = ProductSerializer
 
     def get_queryset(self):
-        queryset = Product.objects.select_related('category').prefetch_related('images').order_by('-created_at')
-        category_slug = self.request.query_params.get('category')
-        if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+        queryset = Product.objects.filter(category__is_hidden=False).select_related('category', 'subcategory').prefetch_related('images').order_by('-created_at')
+        if self.action == 'list':
+            queryset = filter_products(queryset, **api_product_filters(self.request.query_params))
         return queryset
+
+    def list(self, request, *args, **kwargs):
+        """Products matching the filters; ?facets=1 wraps them with facet counts"""
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets') in ('1', 'true'):
+            response.data = {'results': response.data, 'facets': product_facets(api_product_filters(request.query_params))}
+        return response
+
+    @action(detail=False, methods=['get'])
+    def cards(self, request):
+        """Product list cards read from the precomputed Product.card column"""
+        with timed('serialize'):
+            rows = card_rows(request.query_params.get('category'))
+            return Response([absolute_card(request, row) for row in rows])
+
+    @action(detail=False, methods=['get'], url_path=r'by-slug/(?P<slug>[-\w]+)')
+    def by_slug(self, request, slug):
+        """Product detail by current or former slug, cached per product"""
+        return _slug_detail_response(request, 'product', slug)
+
+    @action(
+        detail=False, methods=['post'], url_path='bulk-upsert',
+        permission_classes=[permissions.IsAuthenticated, UpsertPermissions],
+    )
+    def bulk_upsert(self, request):
+        """Create or update many products at once, keyed by external_id or slug"""
+        records = request.data
+        limit = getattr(settings, 'PRODUCT_UPSERT_MAX_RECORDS', 10000)
+        if not isinstance(records, list):
+            return Response({'detail': 'Expected a list of product records.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(records) > limit:
+            return Response(
+                {'detail': f'At most {limit} records per request.'}, status=status.HTTP_400_BAD_REQUEST,
+            )
+        summary, results = upsert_products(records)
+        return Response({'summary': summary, 'results': results})
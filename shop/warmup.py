@@ -0,0 +1,194 @@
+"""Warm-up steps that move first-request costs to process start.
+
+``warm_up_process`` does the fork-safe work (imports, template compilation,
+URL resolver population) and is run once in the gunicorn master before it
+forks. ``warm_up_worker`` opens database connections, primes the catalog
+caches and resumes abandoned category deletions in each worker, then marks
+the process ready for ``/readyz``. The cache is shared, so only the first
+worker to start pays for building it.
+"""
+import importlib
+import logging
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, resolve, reverse
+
+logger = logging.getLogger(__name__)
+
+WARM_MODULES = ('shop.views', 'shop.serializers', 'shop.async_api')
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_started = False
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def import_modules():
+    for module in WARM_MODULES:
+        importlib.import_module(module)
+    return len(WARM_MODULES)
+
+
+def compile_templates():
+    compiled = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for path in sorted(Path(directory).glob('shop/**/*.html')):
+                engine.get_template(path.relative_to(directory).as_posix())
+                compiled += 1
+    return compiled
+
+
+def named_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from named_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+def _sample_kwargs(pattern):
+    converters = getattr(pattern.pattern, 'converters', {})
+    if converters:
+        return {name: '1' for name in converters}
+    return {name: '1' for name in pattern.pattern.regex.groupindex if name != 'format'}
+
+
+def resolve_urls():
+    """Reverse and resolve every named route in ``shop.urls``."""
+    get_resolver()
+    shop_urls = importlib.import_module('shop.urls')
+    resolved = 0
+    for pattern in named_patterns(shop_urls.urlpatterns):
+        try:
+            path = reverse(pattern.name, kwargs=_sample_kwargs(pattern))
+        except NoReverseMatch:
+            continue
+        resolve(path)
+        resolved += 1
+    return resolved
+
+
+def build_navigation():
+    from django.urls import get_script_prefix
+
+    from .context_processors import build_navigation
+
+    by_url_name, _ = build_navigation(get_script_prefix())
+    return len(by_url_name)
+
+
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def prime_caches():
+    """Build the catalog caches that the first requests would otherwise fill.
+
+    That is the dashboard totals, the unfiltered product count and facets,
+    the landing payload and the details of the featured categories and the
+    newest page of products.
+    """
+    from django.http import QueryDict
+
+    from .details import get_detail
+    from .landing import get_cached_payload
+    from .listing import api_product_filters, page_size, product_count, product_facets
+    from .models import Category, Product
+    from .stats import get_dashboard_stats
+
+    get_dashboard_stats()
+    product_count({})
+    product_facets(api_product_filters(QueryDict()))
+    get_cached_payload()
+    categories = list(
+        Category.objects.filter(is_hidden=False).order_by('sort_order', 'name')
+        .values_list('slug', flat=True)[:getattr(settings, 'LANDING_FEATURED_CATEGORIES', 8)]
+    )
+    products = list(
+        Product.objects.filter(category__is_hidden=False).order_by('-created_at', '-pk')
+        .values_list('slug', flat=True)[:page_size()]
+    )
+    for slug in categories:
+        get_detail('category', slug)
+    for slug in products:
+        get_detail('product', slug)
+    return 4 + len(categories) + len(products)
+
+
+def resume_deletions():
+    from .deletion import resume_stale_jobs
+
+    return resume_stale_jobs()
+
+
+PROCESS_STEPS = (
+    ('imports', import_modules),
+    ('templates', compile_templates),
+    ('urls', resolve_urls),
+    ('navigation', build_navigation),
+)
+WORKER_STEPS = (
+    ('database', open_connections),
+    ('caches', prime_caches),
+    ('deletions', resume_deletions),
+)
+
+
+def _run(steps):
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        count = step()
+        timings[name] = {'count': count, 'ms': round((time.perf_counter() - started) * 1000, 2)}
+    return timings
+
+
+def warm_up_process():
+    return _run(PROCESS_STEPS)
+
+
+def warm_up_worker():
+    timings = _run(WORKER_STEPS)
+    _ready.set()
+    return timings
+
+
+def warm_up():
+    """Run every warm-up step in this process and mark it ready."""
+    timings = warm_up_process()
+    timings.update(warm_up_worker())
+    return timings
+
+
+def ensure_warm_up_started():
+    """Start warm-up in the background once, for servers that do not run it at boot."""
+    global _started
+    with _lock:
+        if _started or is_ready():
+            return
+        _started = True
+
+    def run():
+        global _started
+        try:
+            timings = warm_up()
+            logger.info('Warm-up finished: %s', timings)
+        except Exception:
+            logger.exception('Warm-up failed')
+            with _lock:
+                _started = False
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=run, name='shop-warm-up', daemon=True).start()
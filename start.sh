@@ -22,5 +22,6 @@ echo ""
 echo "Серверийг зогсоохын тулд Ctrl+C дарна уу"
 echo ""
 
-python manage.py runserver
+# Pre-forked gunicorn workers (one per CPU); use `python manage.py runserver` for development
+python manage.py serve
 